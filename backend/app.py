@@ -5,6 +5,7 @@ from models.user import db
 from models.user import User
 from models.user_behavior import UserBehavior
 from models.learning_path import LearningPath
+from models.user_behavior_sketch import UserBehaviorSketch
 from routes.auth import auth_bp
 from routes.user_behavior import user_behavior_bp
 from routes.user_behavior_stats import user_behavior_stats_bp
@@ -12,6 +13,10 @@ from routes.learning_path import learning_path_bp
 from routes.need_analysis import need_analysis_bp
 from routes.resources import resources_bp
 from routes.user import user_bp  # 添加这一行导入user_bp
+from routes.knowledge_graph import knowledge_graph_bp
+from utils.db_migrate import ensure_columns
+from utils import metrics, query_stats
+import config
 import os
 
 app = Flask(__name__)
@@ -40,12 +45,24 @@ def add_cors_headers(response):
     return response
 
 # 配置数据库
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///evelyn.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = config.DATABASE_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # 初始化数据库
 db.init_app(app)
 
+# 运行指标：请求耗时、Ollama 调用、连接池等待和缓存命中，由 /metrics 导出
+if config.METRICS_ENABLED:
+    metrics.init_app(app, config.METRICS_PATH)
+    with app.app_context():
+        metrics.instrument_pool(db.engine)
+
+# SQL 查询统计：慢查询和 N+1 警告，调试时可在响应头中返回每个请求的查询数
+if config.QUERY_STATS_ENABLED:
+    with app.app_context():
+        query_stats.init_app(app, db.engine, config.SLOW_QUERY_MS, config.QUERY_REPEAT_THRESHOLD,
+                             config.QUERY_DEBUG_HEADER)
+
 # 注册蓝图
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(user_behavior_bp, url_prefix='/api/user-behavior')
@@ -54,11 +71,13 @@ app.register_blueprint(learning_path_bp, url_prefix='/api/learning-path')
 app.register_blueprint(need_analysis_bp, url_prefix='/api/need-analysis')
 app.register_blueprint(user_bp, url_prefix='/api/user')  
 app.register_blueprint(resources_bp, url_prefix='/api/resources')
+app.register_blueprint(knowledge_graph_bp, url_prefix='/api/knowledge-graph')
 
 # 创建数据库表
 @app.before_first_request
 def create_tables():
     db.create_all()
+    ensure_columns(db)
 
 @app.route('/')
 def index():
@@ -74,5 +93,6 @@ if __name__ == '__main__':
         # 注释掉这行，防止数据被删除
         # db.drop_all()
         db.create_all()  # 只创建不存在的表
+        ensure_columns(db)  # 为已有表补充新增字段
     
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+爬虫并发抓取基准
+
+在本地为每个平台启动一个替身服务器（不同端口即不同主机），对比：
+1. 串行抓取：逐个平台请求，每次请求后随机休眠（原实现的方式）
+2. 并发抓取：CrawlEngine 并发请求，按主机令牌桶限速
+3. 缓存命中：新鲜期内的抓取结果直接读取缓存
+4. 条件请求：缓存过了新鲜期，携带 ETag 重新验证（替身服务器返回 304）
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_crawler --skills 3 --latency 0.2 --interval 0.5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import requests
+from benchmarks.stand_in_server import StandInServer
+from services.crawl_cache import CrawlCache
+from services.crawl_engine import HostRateLimiter
+from services.knowledge_crawler import KnowledgeCrawler
+
+def _point_platforms_to(crawler, servers):
+    """将爬虫的平台地址替换为本地替身服务器"""
+    platforms = crawler.course_platforms + crawler.book_platforms
+    for platform, server in zip(platforms, servers):
+        platform['url'] = server.url
+
+def run_serial(crawler, skills, interval):
+    """模拟原实现：逐个平台请求并随机休眠"""
+    started = time.perf_counter()
+    for skill in skills:
+        for platform in crawler.course_platforms + crawler.book_platforms:
+            requests.get(platform['url'], timeout=10)
+            time.sleep(random.uniform(interval, interval * 3))
+    return time.perf_counter() - started
+
+def run_concurrent(crawler, skills):
+    """使用并发抓取引擎"""
+    started = time.perf_counter()
+    crawler.crawl_skills(skills)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫并发抓取基准')
+    parser.add_argument('--skills', type=int, default=3, help='技能数量')
+    parser.add_argument('--latency', type=float, default=0.2, help='替身服务器响应延迟（秒）')
+    parser.add_argument('--interval', type=float, default=0.5, help='同一主机的最小请求间隔（秒）')
+    parser.add_argument('--skip-serial', action='store_true', help='跳过串行基线')
+    args = parser.parse_args()
+    
+    cache_dir = tempfile.mkdtemp(prefix='crawl-bench-')
+    cache = CrawlCache(os.path.join(cache_dir, 'crawl_cache.db'), fresh_seconds=3600, max_age_seconds=86400)
+    crawler = KnowledgeCrawler(cache=cache)
+    servers = [StandInServer(latency=args.latency).start()
+               for _ in crawler.course_platforms + crawler.book_platforms]
+    try:
+        _point_platforms_to(crawler, servers)
+        crawler.fetch_pages = True
+        crawler.engine.rate_limiter = HostRateLimiter(args.interval)
+        skills = [f'skill{i}' for i in range(args.skills)]
+        
+        if not args.skip_serial:
+            serial_seconds = run_serial(crawler, skills, args.interval)
+            print(f"串行抓取: {serial_seconds:.2f}s")
+        
+        for server in servers:
+            server.request_times.clear()
+        concurrent_seconds = run_concurrent(crawler, skills)
+        print(f"并发抓取: {concurrent_seconds:.2f}s")
+        
+        gaps = [server.min_request_gap() for server in servers if server.min_request_gap() is not None]
+        if gaps:
+            print(f"同一主机最小请求间隔: {min(gaps):.3f}s（配置 {args.interval}s）")
+        
+        cached_seconds = run_concurrent(crawler, skills)
+        print(f"缓存命中: {cached_seconds:.4f}s")
+        
+        cache.fresh_seconds = 0
+        revalidate_seconds = run_concurrent(crawler, skills)
+        not_modified = sum(server.not_modified_count for server in servers)
+        print(f"条件请求重新验证: {revalidate_seconds:.2f}s（304 响应 {not_modified} 次）")
+        print(f"缓存统计: {cache.stats()}")
+    finally:
+        for server in servers:
+            server.stop()
+
+if __name__ == '__main__':
+    main()
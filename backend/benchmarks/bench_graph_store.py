@@ -0,0 +1,94 @@
+"""
+知识图谱列式存储基准
+
+对比字典形式的 KnowledgeGraph 与内存映射的 CompactGraph：
+1. 内存占用：字典节点的 Python 堆内存 vs 列式文件大小（多个进程映射同一文件只占一份）
+2. 加载耗时：从缩进JSON重建 vs 内存映射加载
+3. 查询耗时：按ID、按技能+难度、后继节点
+4. 流式JSON导出耗时
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_graph_store --nodes 100000 --skills 5000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from benchmarks.bench_knowledge_graph import generate_items
+from services.graph_store import load_graph_store, write_graph_json, write_graph_store
+from services.knowledge_graph import KnowledgeGraph
+
+def measure(label, func, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label}: {elapsed * 1000:.2f}ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='知识图谱列式存储基准')
+    parser.add_argument('--nodes', type=int, default=100000, help='节点数量')
+    parser.add_argument('--skills', type=int, default=5000, help='技能数量')
+    parser.add_argument('--queries', type=int, default=100000, help='查询次数')
+    args = parser.parse_args()
+    
+    items = generate_items(args.nodes, args.skills)
+    workdir = tempfile.mkdtemp(prefix='graph-store-bench-')
+    store_path = os.path.join(workdir, 'knowledge_graph.bin')
+    json_path = os.path.join(workdir, 'knowledge_graph.json')
+    
+    gc.collect()
+    tracemalloc.start()
+    graph = KnowledgeGraph()
+    for node_type, skill, data in items:
+        graph.add_node(node_type, data, skill=skill)
+    dict_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"字典图谱: {len(graph.nodes)} 个节点，{graph.edge_count} 条边，Python 堆内存 {dict_bytes / 1024 / 1024:.1f} MB")
+    
+    measure("写入列式文件", lambda: write_graph_store(graph, store_path))
+    print(f"列式文件大小: {os.path.getsize(store_path) / 1024 / 1024:.1f} MB")
+    
+    with open(json_path, 'w', encoding='utf-8') as f:
+        measure("流式JSON导出（字典图谱）", lambda: write_graph_json(graph, f))
+    print(f"JSON文件大小: {os.path.getsize(json_path) / 1024 / 1024:.1f} MB")
+    
+    def load_json():
+        with open(json_path, encoding='utf-8') as f:
+            return json.load(f)
+    measure("从JSON加载", load_json)
+    
+    store = measure("内存映射加载", lambda: load_graph_store(store_path), repeat=10)
+    
+    rng = random.Random(7)
+    node_ids = [rng.choice(list(graph.nodes)) for _ in range(1000)]
+    samples = [rng.choice(items) for _ in range(1000)]
+    rounds = max(1, args.queries // 1000)
+    for name, target in (('字典图谱', graph), ('列式图谱', store)):
+        def by_id():
+            for node_id in node_ids:
+                target.get_node(node_id)
+        def by_skill():
+            for _, skill, data in samples:
+                target.nodes_for_skill(skill, difficulty=data['difficulty'])
+        def successors():
+            for node_id in node_ids:
+                target.successors(node_id, 'prerequisite')
+        for label, func in (('按ID', by_id), ('按技能+难度', by_skill), ('前置后继', successors)):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                func()
+            per_query = (time.perf_counter() - started) / (rounds * 1000) * 1e6
+            print(f"{name} {label}: {per_query:.2f}µs/次")
+    
+    with open(os.devnull, 'w', encoding='utf-8') as f:
+        measure("流式JSON导出（列式图谱）", lambda: write_graph_json(store, f))
+    store.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+知识图谱构建基准
+
+对比：
+1. 原实现：节点列表 + 每次调用 build_relationships 时对 Python 相关节点做 O(n²) 双重循环，
+   重复调用会重复追加相同的边
+2. 带索引的 KnowledgeGraph：节点加入时只与同技能桶内的节点增量建立关系，边去重
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_knowledge_graph --nodes 100000 --skills 5000 --legacy-nodes 2000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from services.knowledge_graph import KnowledgeGraph
+
+DIFFICULTIES = ['初级', '中级', '高级']
+PLATFORMS = ['极客时间', 'B站', '慕课网', '豆瓣读书', '当当网']
+
+def generate_items(count, skill_count, seed=42):
+    """生成模拟的课程和书籍数据：[(节点类型, 技能, 数据)]"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        skill = f'skill{rng.randrange(skill_count)}'
+        node_type = rng.choice(['course', 'book'])
+        items.append((node_type, skill, {
+            'title': f'{skill} 教程 {i}',
+            'difficulty': rng.choice(DIFFICULTIES),
+            'platform': rng.choice(PLATFORMS),
+            'url': f'https://example.com/{skill}/{i}',
+            'price': rng.choice([0, 99, 199]),
+            'rating': round(rng.uniform(3.5, 5.0), 1)
+        }))
+    return items
+
+def run_legacy(items, rounds):
+    """原实现：列表存储，所有节点都按 Python 相关处理（最坏情况），每轮重新扫描全部节点"""
+    nodes = []
+    edges = []
+    for node_type, _, data in items:
+        nodes.append({'id': f"{node_type}_{len(nodes)}", 'type': node_type,
+                      'title': data['title'], 'difficulty': data['difficulty']})
+    
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for i, node1 in enumerate(nodes):
+            for j, node2 in enumerate(nodes):
+                if i != j:
+                    if node1['difficulty'] == '初级' and node2['difficulty'] in ['中级', '高级']:
+                        edges.append({'source': node1['id'], 'target': node2['id'], 'relation': 'prerequisite'})
+                    if node1['type'] == 'course' and node2['type'] == 'book':
+                        edges.append({'source': node1['id'], 'target': node2['id'], 'relation': 'complementary'})
+    return time.perf_counter() - started, len(edges)
+
+def run_indexed(items):
+    """带索引的知识图谱：逐个插入节点，关系增量建立"""
+    graph = KnowledgeGraph()
+    started = time.perf_counter()
+    for node_type, skill, data in items:
+        graph.add_node(node_type, data, skill=skill)
+    return graph, time.perf_counter() - started
+
+def time_lookups(graph, items, count=100000, seed=7):
+    """测量按ID、按技能/难度、按URL查询的平均耗时（微秒）"""
+    rng = random.Random(seed)
+    node_ids = list(graph.nodes)
+    samples = [rng.choice(items) for _ in range(count)]
+    
+    started = time.perf_counter()
+    for _ in range(count):
+        graph.get_node(node_ids[rng.randrange(len(node_ids))])
+    by_id = (time.perf_counter() - started) / count * 1e6
+    
+    started = time.perf_counter()
+    for _, skill, data in samples:
+        graph.nodes_for_skill(skill, difficulty=data['difficulty'])
+    by_skill = (time.perf_counter() - started) / count * 1e6
+    
+    started = time.perf_counter()
+    for _, _, data in samples:
+        graph.find_by_url(data['url'])
+    by_url = (time.perf_counter() - started) / count * 1e6
+    return by_id, by_skill, by_url
+
+def main():
+    parser = argparse.ArgumentParser(description='知识图谱构建基准')
+    parser.add_argument('--nodes', type=int, default=100000, help='节点数量')
+    parser.add_argument('--skills', type=int, default=5000, help='技能数量')
+    parser.add_argument('--legacy-nodes', type=int, default=2000, help='原实现基线使用的节点数量（O(n²)，不宜过大）')
+    parser.add_argument('--rounds', type=int, default=2, help='重复构建关系的次数')
+    args = parser.parse_args()
+    
+    items = generate_items(args.nodes, args.skills)
+    
+    if args.legacy_nodes:
+        legacy_items = items[:args.legacy_nodes]
+        legacy_seconds, legacy_edges = run_legacy(legacy_items, args.rounds)
+        print(f"原实现（{len(legacy_items)} 个节点，构建 {args.rounds} 次）: {legacy_seconds:.2f}s，"
+              f"边列表长度 {legacy_edges}（每次调用重复追加）")
+        graph, seconds = run_indexed([(node_type, 'python', data) for node_type, _, data in legacy_items])
+        for _ in range(args.rounds - 1):
+            for node_type, _, data in legacy_items:
+                graph.add_node(node_type, data, skill='python')
+        print(f"索引图谱（同样 {len(legacy_items)} 个节点、单一技能）: {seconds:.2f}s，边 {graph.edge_count}（重复插入不新增）")
+    
+    tracemalloc.start()
+    graph, seconds = run_indexed(items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"索引图谱（{len(graph.nodes)} 个节点，{args.skills} 个技能）: 插入 {seconds:.2f}s "
+          f"（{len(items) / seconds:,.0f} 节点/秒），边 {graph.edge_count}，峰值内存 {peak / 1024 / 1024:.1f} MB")
+    
+    started = time.perf_counter()
+    for node_type, skill, data in items:
+        graph.add_node(node_type, data, skill=skill)
+    print(f"重复插入全部节点（去重）: {time.perf_counter() - started:.2f}s，节点 {len(graph.nodes)}，边 {graph.edge_count}")
+    
+    by_id, by_skill, by_url = time_lookups(graph, items)
+    print(f"查询耗时: 按ID {by_id:.2f}µs，按技能+难度 {by_skill:.2f}µs，按URL {by_url:.2f}µs")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+大模型服务的记录/回放基准
+
+以固定的输入调用需求分析、学习路径生成、页面资源推荐和备选路径生成四个服务：
+- record：请求真实的 Ollama（EVELYN_OLLAMA_API），每次调用追加到调用账本
+- replay：从调用账本回放响应，不需要 Ollama；--speed 0 不等待（测量解析等本地开销），
+  1 按原始耗时等待（复现线上的端到端耗时），0.1 按十分之一的耗时等待
+
+每个服务输出调用数、失败（回退到默认结果）数和平均耗时，并对全部输出计算摘要。
+--runs 大于 1 时检查各轮的摘要是否相同，回放模式下应当完全一致。修改提示词后提示词哈希变化，
+需要重新 record 一次。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_llm_replay --mode record --ledger llm_ledger.db
+    python -m benchmarks.bench_llm_replay --mode replay --ledger llm_ledger.db --runs 3
+    python -m benchmarks.bench_llm_replay --mode replay --ledger llm_ledger.db --speed 1 --only learning_path
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from benchmarks import text_corpus
+
+GOALS = [
+    '零基础学习Python数据分析', '三个月转行前端开发', '学习机器学习找算法工作', '用React做一个个人博客',
+    '准备Java后端面试', '学会用Excel做财务报表', '入门深度学习和PyTorch', '学习Docker和Kubernetes部署',
+    '自学UI设计', '提升SQL查询能力', '学习Go语言写微服务', '考研复习线性代数',
+]
+FRUSTRATED_SKILLS = [['函数'], ['异步编程', '闭包'], ['反向传播'], ['指针', '内存管理']]
+
+def build_cases(service_filter=None):
+    """返回 {服务名: [无参调用]}，调用返回该次的输出（失败时返回None）"""
+    from models.learning_path import LearningPath, db
+    from services.learning_path_service import LearningPathService
+    from services.need_analysis_service import NeedAnalysisService
+    from services.path_templates import get_template_library
+    from services.personalization_service import PersonalizationService
+    from services.resource_service import ResourceService
+    
+    need_analysis = NeedAnalysisService()
+    learning_path = LearningPathService()
+    resources = ResourceService()
+    personalization = PersonalizationService()
+    
+    def generate_path(goal):
+        try:
+            return learning_path._generate_with_llm(goal)[0]
+        except Exception:
+            return None
+    
+    # 备选路径需要数据库中的原始路径：以模板库中最匹配的模板作为原始路径
+    path_ids = []
+    for goal in GOALS:
+        path_data, _ = get_template_library().match(goal)
+        path = LearningPath(title=path_data.get('title', goal), goal=goal,
+                            estimated_time=path_data.get('estimated_time'))
+        path.set_path_data(path_data)
+        db.session.add(path)
+        db.session.flush()
+        path_ids.append(path.id)
+    db.session.commit()
+    
+    cases = {
+        'need_analysis': [lambda goal=goal: need_analysis.analyze_learning_need(goal) for goal in GOALS],
+        'learning_path': [lambda goal=goal: generate_path(goal) for goal in GOALS],
+        'page_resources': [lambda page=page: resources._generate_resources_with_llm(*page)
+                           for page in text_corpus.pages(len(GOALS))],
+        'alternative_path': [
+            lambda path_id=path_id, skills=skills: personalization.generate_alternative_path(None, path_id, skills)
+            for path_id, skills in zip(path_ids, FRUSTRATED_SKILLS * len(GOALS))
+        ],
+    }
+    if service_filter:
+        cases = {name: calls for name, calls in cases.items() if service_filter in name}
+    return cases
+
+def run_once(cases):
+    """运行一轮，返回 ({服务名: (调用数, 失败数, 总耗时)}, 输出摘要)"""
+    from utils import metrics
+    digest = hashlib.sha256()
+    results = {}
+    for name, calls in cases.items():
+        fallbacks_before = metrics.FALLBACKS.total()
+        failures = 0
+        started = time.perf_counter()
+        for call in calls:
+            output = call()
+            if output is None:
+                failures += 1
+            digest.update(json.dumps(output, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        elapsed = time.perf_counter() - started
+        failures += metrics.FALLBACKS.total() - fallbacks_before
+        results[name] = (len(calls), failures, elapsed)
+    return results, digest.hexdigest()[:16]
+
+def main():
+    parser = argparse.ArgumentParser(description='大模型服务的记录/回放基准')
+    parser.add_argument('--mode', choices=('record', 'replay'), default='replay', help='记录或回放')
+    parser.add_argument('--ledger', default='llm_ledger.db', help='调用账本文件')
+    parser.add_argument('--speed', type=float, default=0, help='回放时按原始耗时的倍数等待')
+    parser.add_argument('--runs', type=int, default=1, help='轮数，大于 1 时检查各轮输出是否一致')
+    parser.add_argument('--only', help='只运行名称包含该字符串的服务')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='evelyn-llm-replay-')
+    os.environ['EVELYN_LLM_LEDGER'] = args.mode
+    os.environ['EVELYN_LLM_LEDGER_PATH'] = os.path.abspath(args.ledger)
+    os.environ['EVELYN_LLM_REPLAY_SPEED'] = str(args.speed)
+    os.environ['EVELYN_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'replay.db')}"
+    # 响应缓存和近似目标复用会跳过模型调用，基准中关闭
+    os.environ['EVELYN_RESPONSE_CACHE'] = '0'
+    os.environ['EVELYN_GOAL_REUSE'] = '0'
+    os.environ.setdefault('EVELYN_CRAWL_CACHE_PATH', os.path.join(workdir, 'crawl_cache.db'))
+    
+    import logging
+    logging.disable(logging.WARNING)
+    from tools.generate_synthetic_data import prepare_database
+    from services.llm_ledger import get_llm_ledger
+    prepare_database()
+    from app import app
+    
+    digests = []
+    with app.app_context():
+        cases = build_cases(args.only)
+        for run in range(args.runs):
+            results, digest = run_once(cases)
+            digests.append(digest)
+            print(f"\n第 {run + 1} 轮（输出摘要 {digest}）")
+            for name, (calls, failures, elapsed) in results.items():
+                print(f"  {name:<18} {calls:>3} 次  失败 {failures:>3}  平均 {elapsed / calls * 1000:>9.1f}ms")
+    
+    print(f"\n调用账本: {get_llm_ledger().stats()}")
+    if len(set(digests)) > 1:
+        print(f"各轮输出不一致: {digests}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
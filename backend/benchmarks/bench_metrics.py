@@ -0,0 +1,101 @@
+"""
+运行指标采集开销基准
+
+1. 单项操作：直方图记录、计数器累加，以及多线程同时记录时的单次耗时
+2. 请求中间件：同一个最简单的接口，分别在未启用和启用指标的 Flask 应用上请求，比较单次请求耗时
+3. 导出：按给定的路由数生成序列后，渲染一次 /metrics 文本的耗时
+
+中间件的额外开销应远小于真实接口的耗时（读接口为毫秒级），超过 --max-overhead-us 时以非零状态退出。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --requests 20000 --threads 8 --max-overhead-us 100
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from flask import Flask
+from utils import metrics
+
+def time_per_call(func, count):
+    """单次调用耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - started) / count * 1e6
+
+def bench_primitives(count, threads):
+    histogram = metrics.Histogram('bench_histogram', '基准', ('route', 'method', 'status'))
+    counter = metrics.Counter('bench_counter', '基准', ('task',))
+    print(f"直方图记录: {time_per_call(lambda: histogram.observe('/api/x', 'GET', '200', value=0.012), count):.2f}µs")
+    print(f"计数器累加: {time_per_call(lambda: counter.inc('task', amount=3), count):.2f}µs")
+    
+    # 多线程同时记录同一序列（最坏的锁竞争）
+    per_thread = count // threads
+    def worker():
+        for _ in range(per_thread):
+            histogram.observe('/api/x', 'GET', '200', value=0.012)
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"{threads} 线程同时记录: {elapsed / (per_thread * threads) * 1e6:.2f}µs/次")
+
+def _make_app(instrumented):
+    app = Flask(__name__)
+    
+    @app.route('/api/ping/<int:item_id>')
+    def ping(item_id):
+        return {'id': item_id}
+    
+    if instrumented:
+        metrics.init_app(app)
+    return app
+
+def bench_requests(count, rounds):
+    """返回 (未启用, 启用) 的单次请求耗时（微秒），取多轮的中位数"""
+    results = []
+    for instrumented in (False, True):
+        client = _make_app(instrumented).test_client()
+        client.get('/api/ping/0')
+        samples = [time_per_call(lambda: client.get('/api/ping/1'), count) for _ in range(rounds)]
+        results.append(statistics.median(samples))
+    return results
+
+def bench_render(routes):
+    for index in range(routes):
+        for status in ('200', '304', '404', '500'):
+            metrics.REQUEST_LATENCY.observe(f'/api/bench/{index}', 'GET', status, value=0.01 * (index % 7))
+    started = time.perf_counter()
+    text = metrics.REGISTRY.render()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"导出 {routes} 个路由 × 4 个状态码: {elapsed:.1f}ms，{len(text) / 1024:.0f}KB")
+
+def main():
+    parser = argparse.ArgumentParser(description='运行指标采集开销基准')
+    parser.add_argument('--count', type=int, default=200000, help='单项操作的调用次数')
+    parser.add_argument('--threads', type=int, default=8, help='并发记录的线程数')
+    parser.add_argument('--requests', type=int, default=5000, help='每轮请求数')
+    parser.add_argument('--rounds', type=int, default=5, help='请求轮数')
+    parser.add_argument('--routes', type=int, default=50, help='导出基准的路由数')
+    parser.add_argument('--max-overhead-us', type=float, default=100, help='中间件单次请求允许的额外耗时（微秒）')
+    args = parser.parse_args()
+    
+    bench_primitives(args.count, args.threads)
+    baseline, instrumented = bench_requests(args.requests, args.rounds)
+    overhead = instrumented - baseline
+    print(f"单次请求: 未启用 {baseline:.1f}µs，启用 {instrumented:.1f}µs，"
+          f"额外 {overhead:.1f}µs（{overhead / baseline:+.1%}）")
+    bench_render(args.routes)
+    
+    if overhead > args.max_overhead_us:
+        print(f"中间件额外耗时超过 {args.max_overhead_us:.0f}µs")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+前置关系索引基准
+
+对比按请求做图遍历（BFS）与预计算传递闭包索引的查询耗时，并测量索引构建和增量更新的开销。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_reachability --nodes 100000 --skills 5000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from benchmarks.bench_knowledge_graph import generate_items
+from services.graph_store import load_graph_store, write_graph_store
+from services.knowledge_graph import KnowledgeGraph
+from services.reachability_index import ReachabilityIndex
+
+def bfs_prerequisites(graph, node_id):
+    """按请求遍历入边求前置闭包（无索引时的做法）"""
+    seen = set()
+    stack = list(graph.predecessors(node_id, 'prerequisite'))
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        stack.extend(graph.predecessors(current, 'prerequisite'))
+    return seen
+
+def per_call_us(func, samples):
+    started = time.perf_counter()
+    for sample in samples:
+        func(*sample)
+    return (time.perf_counter() - started) / len(samples) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='前置关系索引基准')
+    parser.add_argument('--nodes', type=int, default=100000, help='节点数量')
+    parser.add_argument('--skills', type=int, default=5000, help='技能数量')
+    parser.add_argument('--incremental', type=int, default=10000, help='建立索引后再增量加入的节点数量')
+    parser.add_argument('--queries', type=int, default=20000, help='查询次数')
+    args = parser.parse_args()
+    
+    items = generate_items(args.nodes + args.incremental, args.skills)
+    graph = KnowledgeGraph()
+    for node_type, skill, data in items[:args.nodes]:
+        graph.add_node(node_type, data, skill=skill)
+    print(f"图谱: {len(graph.nodes)} 个节点，前置关系 {sum(map(len, graph.out_edges['prerequisite'].values()))} 条")
+    
+    started = time.perf_counter()
+    index = ReachabilityIndex().attach(graph).build(graph)
+    print(f"从字典图谱构建索引: {time.perf_counter() - started:.2f}s，{index.stats()}")
+    
+    store_path = os.path.join(tempfile.mkdtemp(prefix='reachability-bench-'), 'knowledge_graph.bin')
+    write_graph_store(graph, store_path)
+    store = load_graph_store(store_path)
+    started = time.perf_counter()
+    ReachabilityIndex().build(store)
+    print(f"从列式文件构建索引: {time.perf_counter() - started:.2f}s")
+    
+    started = time.perf_counter()
+    for node_type, skill, data in items[args.nodes:]:
+        graph.add_node(node_type, data, skill=skill)
+    print(f"增量加入 {args.incremental} 个节点（含图谱自身和索引更新）: {time.perf_counter() - started:.2f}s")
+    
+    rng = random.Random(7)
+    node_ids = list(graph.nodes)
+    pairs = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(args.queries)]
+    # 同一技能内的节点对，保证有一部分查询结果为真
+    skill_pairs = []
+    for _ in range(args.queries):
+        skill = rng.choice(graph.skills())
+        members = list(graph.nodes_for_skill(skill))
+        skill_pairs.append((rng.choice(members), rng.choice(members)))
+    singles = [(node_id,) for node_id, _ in skill_pairs]
+    
+    print(f"索引 是否为前置（随机节点对）: {per_call_us(index.is_upstream, pairs):.2f}µs/次")
+    print(f"索引 是否为前置（同技能节点对）: {per_call_us(index.is_upstream, skill_pairs):.2f}µs/次")
+    print(f"遍历 是否为前置（同技能节点对）: "
+          f"{per_call_us(lambda a, b: a in bfs_prerequisites(graph, b), skill_pairs):.2f}µs/次")
+    print(f"索引 前置闭包: {per_call_us(index.prerequisites, singles):.2f}µs/次")
+    print(f"遍历 前置闭包: {per_call_us(lambda node_id: bfs_prerequisites(graph, node_id), singles):.2f}µs/次")
+    
+    mismatches = sum(set(index.prerequisites(node_id)) != bfs_prerequisites(graph, node_id) for node_id, in singles[:1000])
+    print(f"结果校验（1000个节点）: {'一致' if not mismatches else f'{mismatches} 个不一致'}")
+    store.close()
+
+if __name__ == '__main__':
+    main()
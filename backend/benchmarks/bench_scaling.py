@@ -0,0 +1,123 @@
+"""
+读接口扩容基准
+
+用 tools/generate_synthetic_data.py 将临时数据库逐级扩充到指定的行为记录数，在每个规模下用 Flask 测试客户端
+测量各读接口对最活跃用户和中位用户的耗时：
+- 冷：该用户在本规模下的第一次请求（进程内缓存未命中）
+- 热：之后多次请求的中位数
+
+不携带 If-None-Match，测量的是完整生成响应的耗时。用户数按 --behaviors-per-user 随规模同比增加，
+活跃度服从 Zipf 分布，最活跃用户的行为数也随规模增长，可以看出哪些接口的耗时随单个用户的数据量线性增长。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.bench_scaling --sizes 10000,100000,1000000
+    python -m benchmarks.bench_scaling --sizes 100000,1000000,10000000 --repeat 3 --output scaling.json
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+ENDPOINTS = [
+    ('behavior_stats', '/api/user-behavior-stats/stats'),
+    ('profile', '/api/user/{user_id}/profile'),
+    ('behaviors', '/api/user-behavior'),
+    ('paths', '/api/learning-path'),
+    ('path_detail', '/api/learning-path/{path_id}'),
+    ('detect_frustration', '/api/learning-path/{path_id}/detect-frustration'),
+]
+
+def make_token(user_id):
+    import jwt
+    from utils.auth import JWT_SECRET_KEY, JWT_ALGORITHM
+    return jwt.encode({'user_id': user_id, 'exp': int(time.time()) + 86400}, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+def pick_users(database):
+    """最活跃用户和中位用户（只在有学习路径的用户中选），返回 [(标签, 用户ID, 行为数, 路径ID)]"""
+    import sqlite3
+    conn = sqlite3.connect(database)
+    try:
+        rows = conn.execute(
+            'SELECT b.user_id, COUNT(*) AS n, MIN(p.id) FROM user_behavior b '
+            'JOIN (SELECT user_id, MIN(id) AS id FROM learning_paths GROUP BY user_id) p ON p.user_id = b.user_id '
+            'GROUP BY b.user_id ORDER BY n DESC'
+        ).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return []
+    heaviest = rows[0]
+    median = rows[len(rows) // 2]
+    return [('heaviest', *heaviest), ('median', *median)]
+
+def measure(client, url, token, repeat):
+    """返回 (状态码, 冷耗时ms, 热耗时中位数ms)"""
+    headers = {'Authorization': f'Bearer {token}'}
+    started = time.perf_counter()
+    response = client.get(url, headers=headers)
+    cold = (time.perf_counter() - started) * 1000
+    warm = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        client.get(url, headers=headers)
+        warm.append((time.perf_counter() - started) * 1000)
+    return response.status_code, cold, statistics.median(warm) if warm else cold
+
+def main():
+    parser = argparse.ArgumentParser(description='读接口扩容基准')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='逐级扩充到的行为记录数，逗号分隔')
+    parser.add_argument('--behaviors-per-user', type=int, default=1000, help='平均每个用户的行为数')
+    parser.add_argument('--repeat', type=int, default=5, help='热请求次数')
+    parser.add_argument('--database', help='数据库文件，默认在临时目录中新建')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--output', help='将结果保存为 JSON')
+    args = parser.parse_args()
+    
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    workdir = tempfile.mkdtemp(prefix='evelyn-scaling-')
+    database = os.path.abspath(args.database or os.path.join(workdir, 'scaling.db'))
+    os.environ['EVELYN_DATABASE_URI'] = f'sqlite:///{database}'
+    for name, filename in (('EVELYN_RESPONSE_CACHE_PATH', 'response_cache.db'),
+                           ('EVELYN_CRAWL_CACHE_PATH', 'crawl_cache.db'),
+                           ('EVELYN_GRAPH_STORE_PATH', 'knowledge_graph.bin')):
+        os.environ.setdefault(name, os.path.join(workdir, filename))
+    
+    import logging
+    logging.disable(logging.INFO)
+    from tools.generate_synthetic_data import generate, prepare_database
+    prepare_database()
+    from app import app
+    client = app.test_client()
+    end = datetime(2024, 6, 1)
+    
+    results = []
+    current = 0
+    for step, size in enumerate(sizes):
+        behaviors = size - current
+        if behaviors > 0:
+            users = max(1, behaviors // args.behaviors_per_user)
+            loaded = generate(database, users, behaviors, seed=args.seed * 1000 + step, end=end, progress=lambda _: None)
+            current = size
+            print(f"\n== {size} 条行为（本级写入 {loaded['behaviors']} 条，{loaded['seconds']}s）")
+        
+        for label, user_id, count, path_id in pick_users(database):
+            token = make_token(user_id)
+            print(f"  {label} 用户 {user_id}（{count} 条行为）")
+            for name, template in ENDPOINTS:
+                url = template.format(user_id=user_id, path_id=path_id)
+                status, cold, warm = measure(client, url, token, args.repeat)
+                results.append({'size': size, 'user': label, 'user_behaviors': count, 'endpoint': name,
+                                'status': status, 'cold_ms': round(cold, 2), 'warm_ms': round(warm, 2)})
+                print(f"    {name:<20} {status}  冷 {cold:>9.1f}ms  热 {warm:>9.1f}ms")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'sizes': sizes, 'behaviors_per_user': args.behaviors_per_user, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+开发服务器与生产入口的吞吐对比
+
+启动 Ollama 替身服务器，再依次以两种方式在子进程中启动应用（使用各自的临时数据库和缓存文件）：
+- dev：与 run.py 相同的 Flask 开发服务器（debug 模式）
+- serve：serve.py（gunicorn 预派生，可指定工作进程数和线程数）
+- gevent：serve.py 的协程模式（需要安装 gevent）
+
+对每个服务用 load_test 以相同的虚拟用户数、时长和随机种子压测，报告写入 --output-dir，
+最后并排输出总吞吐、错误率和各接口的 p95。结果与机器相关，应在部署规格的机器上运行。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.compare_servers --users 50 --duration 60
+    python -m benchmarks.compare_servers --workers 4 --threads 16 --ollama-latency 2 --output-dir reports
+    python -m benchmarks.compare_servers --modes serve,gevent --users 300 --ollama-latency 5
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.fake_ollama import FakeOllamaServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEV_SERVER = 'from app import app; app.run(debug=True, host="127.0.0.1", port={port})'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+def start_server(mode, port, ollama_url, workdir, workers, threads):
+    """在子进程中启动应用，返回进程对象"""
+    env = dict(os.environ)
+    env.update({
+        'EVELYN_OLLAMA_API': ollama_url,
+        'EVELYN_DATABASE_URI': f"sqlite:///{os.path.join(workdir, f'{mode}.db')}",
+        'EVELYN_RESPONSE_CACHE_PATH': os.path.join(workdir, f'{mode}_response_cache.db'),
+        'EVELYN_CRAWL_CACHE_PATH': os.path.join(workdir, f'{mode}_crawl_cache.db'),
+        'EVELYN_GRAPH_STORE_PATH': os.path.join(workdir, f'{mode}_knowledge_graph.bin'),
+    })
+    if mode == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER.format(port=port)]
+    else:
+        command = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(workers), '--threads', str(threads)]
+        if mode == 'gevent':
+            command += ['--worker-class', 'gevent']
+    log = open(os.path.join(workdir, f'{mode}.log'), 'w')
+    # 新的进程组，结束时连同开发服务器的重载子进程、gunicorn 的工作进程一起结束
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+def main():
+    parser = argparse.ArgumentParser(description='开发服务器与生产入口的吞吐对比')
+    parser.add_argument('--users', type=int, default=50, help='虚拟用户数')
+    parser.add_argument('--duration', type=float, default=60, help='每个服务的压测时长（秒）')
+    parser.add_argument('--think-time', type=float, default=0.5, help='两次请求之间的平均思考时间（秒）')
+    parser.add_argument('--workers', type=int, default=4, help='serve 模式的工作进程数')
+    parser.add_argument('--threads', type=int, default=8, help='serve 模式每个进程的线程数')
+    parser.add_argument('--ollama-latency', type=float, default=0.5, help='替身服务器首个 token 前的延迟（秒）')
+    parser.add_argument('--tokens-per-sec', type=float, default=40, help='替身服务器的输出速度')
+    parser.add_argument('--modes', default='dev,serve', help='要对比的启动方式（dev / serve / gevent）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--output-dir', default='.', help='报告目录')
+    args = parser.parse_args()
+    
+    ollama = FakeOllamaServer(latency=args.ollama_latency, tokens_per_sec=args.tokens_per_sec, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='evelyn-compare-')
+    reports = {}
+    try:
+        for mode in args.modes.split(','):
+            port = free_port()
+            process = start_server(mode, port, ollama.url, workdir, args.workers, args.threads)
+            try:
+                if not wait_for_port(port, 120):
+                    print(f"{mode} 未能启动，日志见 {os.path.join(workdir, f'{mode}.log')}")
+                    continue
+                output = os.path.join(os.path.abspath(args.output_dir), f'load_test_{mode}.json')
+                print(f"\n== {mode}（端口 {port}）")
+                subprocess.run([sys.executable, '-m', 'benchmarks.load_test', '--target', f'http://127.0.0.1:{port}',
+                                '--users', str(args.users), '--duration', str(args.duration),
+                                '--think-time', str(args.think_time), '--seed', str(args.seed),
+                                '--output', output], cwd=BACKEND_DIR, check=True)
+                with open(output, 'r', encoding='utf-8') as f:
+                    reports[mode] = json.load(f)
+            finally:
+                stop_server(process)
+    finally:
+        ollama.stop()
+    
+    if not reports:
+        return
+    modes = list(reports)
+    print(f"\n{'':<40}" + ''.join(f'{mode:>18}' for mode in modes))
+    print(f"{'总吞吐（请求/秒）':<40}" + ''.join(f"{reports[mode]['total']['throughput_rps']:>18.2f}" for mode in modes))
+    print(f"{'错误率':<40}" + ''.join(f"{reports[mode]['total']['error_rate']:>18.2%}" for mode in modes))
+    endpoints = sorted({endpoint for report in reports.values() for endpoint in report['endpoints']})
+    for endpoint in endpoints:
+        values = [reports[mode]['endpoints'].get(endpoint, {}).get('p95_ms') for mode in modes]
+        print(f"{endpoint + ' p95':<40}" + ''.join(f'{value:>16.1f}ms' if value is not None else f"{'-':>18}"
+                                                   for value in values))
+
+if __name__ == '__main__':
+    main()
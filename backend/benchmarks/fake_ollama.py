@@ -0,0 +1,175 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import random
+import re
+import threading
+import time
+
+class FakeOllamaServer:
+    """
+    本地 Ollama 替身服务器，实现 /api/generate，用于压测时代替真实的大模型
+    
+    - latency: 首个 token 之前的延迟（秒），模拟提示词处理
+    - tokens_per_sec: 输出速度，响应耗时 = latency + 输出 token 数 / tokens_per_sec
+    - failure_rate: 返回 500 的请求比例
+    - hang_rate / hang_seconds: 长时间无响应的请求比例和时长，用于检验超时处理
+    - 支持 "stream": true，按输出速度逐行返回 NDJSON 片段
+    
+    根据提示词内容返回需求分析、学习路径（含按资源ID选择的检索增强格式）或页面资源推荐的 JSON，
+    输出 token 数按字符数粗略估算。
+    """
+    
+    def __init__(self, latency=0.5, tokens_per_sec=40.0, failure_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30.0, seed=0):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'streamed': 0, 'failures': 0, 'hangs': 0, 'tokens': 0}
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/api/generate'
+    
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务器"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def snapshot(self):
+        """请求统计"""
+        with self._lock:
+            return dict(self.stats)
+    
+    def _roll(self):
+        """按配置的比例决定本次请求的结果：ok / fail / hang"""
+        with self._lock:
+            value = self._random.random()
+        if value < self.failure_rate:
+            return 'fail'
+        if value < self.failure_rate + self.hang_rate:
+            return 'hang'
+        return 'ok'
+    
+    def respond(self, prompt):
+        """根据提示词生成响应文本"""
+        goal_match = re.search(r'用户的学习目标是:\s*(.+)', prompt)
+        goal = goal_match.group(1).strip() if goal_match else '学习目标'
+        if '学习需求分析师' in prompt:
+            return json.dumps({
+                'domain': '编程', 'learning_type': '快速入门', 'base_level': '零基础',
+                'learning_time': '', 'budget': '', 'target_job': '', 'implicit_needs': ''
+            }, ensure_ascii=False)
+        if '推荐3个相关的学习资源' in prompt:
+            return json.dumps([
+                {'title': f'资源{index}', 'type': 'course', 'description': '替身服务器返回的资源',
+                 'difficulty': '初级', 'price': 0, 'link': f'https://example.com/resource/{index}'}
+                for index in range(1, 4)
+            ], ensure_ascii=False)
+        if '候选资源' in prompt:
+            ids = re.findall(r'^\s*(R\d+) \|', prompt, re.M)
+            stages = [{'name': f'阶段{index + 1}', 'description': '阶段描述', 'estimated_time': '2周',
+                       'resources': ids[index::3], 'goals': ['目标']} for index in range(3)]
+        else:
+            stages = [{'name': f'阶段{index + 1}', 'description': '阶段描述', 'estimated_time': '2周',
+                       'resources': [{'type': '课程', 'name': f'课程{index + 1}', 'link': 'https://example.com/',
+                                      'description': '替身服务器返回的资源', 'price': '0'}],
+                       'goals': ['目标']} for index in range(3)]
+        return json.dumps({'title': f'{goal}学习路径', 'description': '替身服务器生成的学习路径',
+                           'estimated_time': '6周', 'stages': stages}, ensure_ascii=False)
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    body = {}
+                outcome = server._roll()
+                with server._lock:
+                    server.stats['requests'] += 1
+                    if outcome == 'fail':
+                        server.stats['failures'] += 1
+                    elif outcome == 'hang':
+                        server.stats['hangs'] += 1
+                
+                if outcome == 'hang':
+                    time.sleep(server.hang_seconds)
+                if outcome == 'fail':
+                    self._send_json(500, {'error': 'injected failure'})
+                    return
+                
+                text = server.respond(body.get('prompt', ''))
+                # 粗略估算：一个 token 约两个字符
+                tokens = [text[index:index + 2] for index in range(0, len(text), 2)]
+                with server._lock:
+                    server.stats['tokens'] += len(tokens)
+                time.sleep(server.latency)
+                if body.get('stream', True):
+                    with server._lock:
+                        server.stats['streamed'] += 1
+                    self._stream(body, tokens)
+                else:
+                    time.sleep(len(tokens) / server.tokens_per_sec)
+                    self._send_json(200, self._final(body, text, len(tokens)))
+            
+            def _final(self, body, text, token_count):
+                generation = token_count / server.tokens_per_sec
+                return {
+                    'model': body.get('model', ''),
+                    'response': text,
+                    'done': True,
+                    'prompt_eval_count': len(body.get('prompt', '')) // 2,
+                    'eval_count': token_count,
+                    'eval_duration': int(generation * 1e9),
+                    'total_duration': int((server.latency + generation) * 1e9)
+                }
+            
+            def _stream(self, body, tokens):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                interval = 1 / server.tokens_per_sec
+                for token in tokens:
+                    time.sleep(interval)
+                    self._write_chunk({'model': body.get('model', ''), 'response': token, 'done': False})
+                final = self._final(body, '', len(tokens))
+                self._write_chunk(final)
+                self.wfile.write(b'0\r\n\r\n')
+            
+            def _write_chunk(self, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n'
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+            
+            def _send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
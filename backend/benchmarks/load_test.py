@@ -0,0 +1,316 @@
+"""
+端到端压测
+
+启动 Ollama 替身服务器和应用（使用临时数据库和缓存文件），由一组虚拟用户按浏览器插件的真实流量比例
+并发请求：登录、行为心跳、学习统计、用户画像、页面资源、学习路径列表，以及需求分析 + 生成学习路径。
+每个接口的 p50/p95/p99 延迟、吞吐和错误率写入 JSON 报告；指定 --compare 时与之前的报告对比，
+p95 变慢超过阈值的接口标记为回归。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.load_test --users 20 --duration 60 --output load_test_report.json
+    python -m benchmarks.load_test --ollama-latency 2 --tokens-per-sec 30 --failure-rate 0.05
+    python -m benchmarks.load_test --compare old_report.json --fail-on-regression
+    python -m benchmarks.load_test --target http://127.0.0.1:5000   # 压测已启动的服务（需自行配置 Ollama 地址）
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+import requests
+from benchmarks.fake_ollama import FakeOllamaServer
+
+# 插件上报的页面：(URL, 标题, 正文摘要)
+PAGES = [
+    ('https://www.baidu.com/s?wd={query}', '{query}_百度搜索', ''),
+    ('https://www.google.com/search?q={query}', '{query} - Google Search', ''),
+    ('https://search.bilibili.com/all?keyword={query}', '{query}-哔哩哔哩_bilibili', ''),
+    ('https://www.zhihu.com/question/2734{n}', '如何系统地学习{query}？ - 知乎', '作为一个过来人，建议先打好基础，再做项目练习。'),
+    ('https://blog.csdn.net/weixin_4{n}/article/details/1{n}', '{query}入门教程（超详细）_CSDN博客', '本文介绍了基本概念、安装配置和常见问题。'),
+    ('https://juejin.cn/post/7{n}', '一文搞懂{query} - 掘金', 'This article explains the core ideas with examples and exercises.'),
+    ('https://www.runoob.com/python3/python3-tutorial.html', 'Python3 教程 | 菜鸟教程', 'Python 是一个高层次的结合了解释性、编译性、互动性和面向对象的脚本语言。'),
+    ('https://developer.mozilla.org/zh-CN/docs/Web/JavaScript', 'JavaScript | MDN', 'JavaScript (JS) is a lightweight interpreted programming language.'),
+    ('https://www.coursera.org/learn/machine-learning', 'Machine Learning | Coursera', 'Learn the fundamentals of machine learning, neural networks and deep learning.'),
+    ('https://github.com/pandas-dev/pandas', 'pandas-dev/pandas: Flexible and powerful data analysis', 'Flexible and powerful data analysis / manipulation library for Python.'),
+]
+QUERIES = ['python 装饰器', 'pandas groupby', 'react hooks', '机器学习 入门', 'sql join', '数据分析 excel',
+           'vue3 组合式api', 'java 多线程', '深度学习 pytorch', 'docker 部署', '算法 动态规划', 'css flex 布局']
+GOALS = ['我想学Python做数据分析', '零基础学前端开发', '三个月入门机器学习', '学习Java后端开发', '想学SQL数据库',
+         '学习用python进行数据分析', '自学深度学习', '成为产品经理', '学习React', '数据结构与算法进阶']
+
+# 场景及权重（每个虚拟用户每轮按权重随机选择一个）
+SCENARIOS = [
+    ('heartbeat', 50),
+    ('stats', 10),
+    ('profile', 10),
+    ('page_resources', 15),
+    ('list_paths', 8),
+    ('generate_path', 7),
+]
+
+class Recorder:
+    """按接口记录延迟和状态码"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}  # 接口 -> [(延迟秒, 状态码)]
+    
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append((seconds, status))
+
+def percentile(sorted_values, fraction):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize(samples, elapsed):
+    """汇总一个接口的样本"""
+    latencies = sorted(seconds for seconds, _ in samples)
+    errors = sum(1 for _, status in samples if status is None or status >= 500)
+    client_errors = sum(1 for _, status in samples if status is not None and 400 <= status < 500)
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'client_errors': client_errors,
+        'throughput_rps': round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+class VirtualUser:
+    """一个插件用户：登录后按场景权重循环发请求，两次请求之间按指数分布思考"""
+    
+    def __init__(self, index, base_url, recorder, think_time, rng, timeout):
+        self.index = index
+        self.base_url = base_url
+        self.recorder = recorder
+        self.think_time = think_time
+        self.rng = rng
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.user_id = None
+        self.etags = {}
+        self.path_ids = []
+    
+    def request(self, endpoint, method, path, conditional=False, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if conditional and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        started = time.perf_counter()
+        status = None
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, headers=headers,
+                                            timeout=self.timeout, **kwargs)
+            status = response.status_code
+            if conditional and response.headers.get('ETag'):
+                self.etags[path] = response.headers['ETag']
+        except requests.RequestException:
+            pass
+        self.recorder.record(endpoint, time.perf_counter() - started, status)
+        return response
+    
+    def login(self):
+        response = self.request('POST /api/auth/login', 'POST', '/api/auth/login', json={
+            'email': f'loadtest{self.index}@example.com', 'password': 'loadtest-password'
+        })
+        if response is None or response.status_code != 200:
+            return False
+        data = response.json()
+        self.user_id = data['user_id']
+        self.session.headers['Authorization'] = f"Bearer {data['token']}"
+        return True
+    
+    def run(self, deadline):
+        if not self.login():
+            return
+        names = [name for name, _ in SCENARIOS]
+        weights = [weight for _, weight in SCENARIOS]
+        while time.time() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+            if self.think_time:
+                time.sleep(min(self.rng.expovariate(1 / self.think_time), max(0.0, deadline - time.time())))
+    
+    def _page(self):
+        url, title, content = self.rng.choice(PAGES)
+        query = self.rng.choice(QUERIES)
+        n = self.rng.randrange(1000, 9999)
+        return (url.format(query=quote(query), n=n), title.format(query=query, n=n), content)
+    
+    def heartbeat(self):
+        url, title, _ = self._page()
+        self.request('POST /api/user-behavior', 'POST', '/api/user-behavior', json={
+            'url': url, 'title': title, 'duration': self.rng.randint(5, 300)
+        })
+    
+    def stats(self):
+        self.request('GET /api/user-behavior-stats/stats', 'GET', '/api/user-behavior-stats/stats', conditional=True)
+    
+    def profile(self):
+        self.request('GET /api/user/<id>/profile', 'GET', f'/api/user/{self.user_id}/profile', conditional=True)
+    
+    def page_resources(self):
+        url, title, content = self._page()
+        self.request('POST /api/resources/page', 'POST', '/api/resources/page', json={
+            'url': url, 'title': title, 'content': content
+        })
+    
+    def list_paths(self):
+        self.request('GET /api/learning-path', 'GET', '/api/learning-path')
+        if self.path_ids:
+            path_id = self.rng.choice(self.path_ids)
+            self.request('GET /api/learning-path/<id>', 'GET', f'/api/learning-path/{path_id}', conditional=True)
+    
+    def generate_path(self):
+        goal = self.rng.choice(GOALS)
+        self.request('POST /api/need-analysis', 'POST', '/api/need-analysis', json={'goal': goal})
+        response = self.request('POST /api/learning-path', 'POST', '/api/learning-path', json={'goal': goal})
+        if response is not None and response.status_code == 202:
+            # 先返回了临时模板，轮询正式路径
+            revalidate = response.json().get('revalidate_url')
+            while revalidate:
+                poll = self.request('GET /api/learning-path/revalidate', 'GET', revalidate)
+                if poll is None or poll.status_code != 202:
+                    break
+                time.sleep(0.5)
+        listing = self.request('GET /api/learning-path', 'GET', '/api/learning-path')
+        if listing is not None and listing.status_code == 200:
+            self.path_ids = [path['id'] for path in listing.json()][:20]
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def start_app(ollama_url, workdir):
+    """以临时数据库和缓存文件启动应用，返回 (服务器, 基础URL)"""
+    os.environ['EVELYN_OLLAMA_API'] = ollama_url
+    os.environ.setdefault('EVELYN_DATABASE_URI', f"sqlite:///{os.path.join(workdir, 'loadtest.db')}")
+    for name, filename in (('EVELYN_RESPONSE_CACHE_PATH', 'response_cache.db'),
+                           ('EVELYN_CRAWL_CACHE_PATH', 'crawl_cache.db'),
+                           ('EVELYN_GRAPH_STORE_PATH', 'knowledge_graph.bin')):
+        os.environ.setdefault(name, os.path.join(workdir, filename))
+    
+    import logging
+    logging.disable(logging.INFO)
+    from werkzeug.serving import make_server
+    from app import app
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def compare(report, baseline, threshold):
+    """与之前的报告对比 p95 和错误率，返回回归的接口列表"""
+    regressions = []
+    for endpoint, current in sorted(report['endpoints'].items()):
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous or not previous['p95_ms']:
+            continue
+        change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms']
+        error_change = current['error_rate'] - previous['error_rate']
+        regressed = change > threshold or error_change > 0.01
+        print(f"  {endpoint}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f}ms ({change:+.0%})，"
+              f"错误率 {previous['error_rate']:.2%} -> {current['error_rate']:.2%}{'  << 回归' if regressed else ''}")
+        if regressed:
+            regressions.append(endpoint)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端压测')
+    parser.add_argument('--users', type=int, default=20, help='虚拟用户数')
+    parser.add_argument('--duration', type=float, default=60, help='压测时长（秒）')
+    parser.add_argument('--ramp-up', type=float, default=5, help='虚拟用户逐个启动的总时长（秒）')
+    parser.add_argument('--think-time', type=float, default=1.0, help='两次请求之间的平均思考时间（秒）')
+    parser.add_argument('--timeout', type=float, default=120, help='单个请求的超时时间（秒）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--target', help='压测已启动的服务，不在本进程中启动应用和替身服务器')
+    parser.add_argument('--ollama-latency', type=float, default=0.5, help='替身服务器首个 token 前的延迟（秒）')
+    parser.add_argument('--tokens-per-sec', type=float, default=40, help='替身服务器的输出速度')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='替身服务器返回 500 的比例')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='替身服务器长时间无响应的比例')
+    parser.add_argument('--hang-seconds', type=float, default=30, help='无响应的时长（秒）')
+    parser.add_argument('--output', default='load_test_report.json', help='报告文件')
+    parser.add_argument('--compare', help='与之前的报告对比')
+    parser.add_argument('--regression-threshold', type=float, default=0.2, help='p95 变慢超过该比例视为回归')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有回归时以非零状态退出')
+    args = parser.parse_args()
+    
+    ollama = None
+    server = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+    else:
+        ollama = FakeOllamaServer(latency=args.ollama_latency, tokens_per_sec=args.tokens_per_sec,
+                                  failure_rate=args.failure_rate, hang_rate=args.hang_rate,
+                                  hang_seconds=args.hang_seconds, seed=args.seed).start()
+        server, base_url = start_app(ollama.url, tempfile.mkdtemp(prefix='evelyn-loadtest-'))
+    print(f"压测 {base_url}：{args.users} 个虚拟用户，{args.duration:.0f}s")
+    
+    recorder = Recorder()
+    started = time.time()
+    deadline = started + args.duration
+    threads = []
+    for index in range(args.users):
+        user = VirtualUser(index, base_url, recorder, args.think_time, random.Random(args.seed + index), args.timeout)
+        thread = threading.Thread(target=user.run, args=(deadline,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        if args.ramp_up and args.users > 1:
+            time.sleep(args.ramp_up / args.users)
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.time()) + args.timeout)
+    elapsed = time.time() - started
+    
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed_seconds': round(elapsed, 2),
+            'config': vars(args)
+        },
+        'endpoints': {endpoint: summarize(samples, elapsed) for endpoint, samples in sorted(recorder.samples.items())},
+        'total': summarize(all_samples, elapsed),
+        'ollama': ollama.snapshot() if ollama else None
+    }
+    
+    print(f"{'接口':<40}{'次数':>8}{'错误率':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>8}")
+    for endpoint, summary in list(report['endpoints'].items()) + [('合计', report['total'])]:
+        print(f"{endpoint:<40}{summary['count']:>8}{summary['error_rate']:>9.2%}{summary['p50_ms']:>9.1f}ms"
+              f"{summary['p95_ms']:>8.1f}ms{summary['p99_ms']:>8.1f}ms{summary['throughput_rps']:>8.2f}")
+    if ollama:
+        print(f"替身 Ollama: {report['ollama']}")
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"报告已写入 {args.output}")
+    
+    if server:
+        server.shutdown()
+    if ollama:
+        ollama.stop()
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"与 {args.compare}（{baseline.get('meta', {}).get('commit')}）对比：")
+        regressions = compare(report, baseline, args.regression_threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+文本处理热点函数微基准
+
+在固定语料（benchmarks/text_corpus.py）上测量关键词提取、领域判断、挫折检测和 JSON 提取等纯函数的
+单次调用耗时，与保存的基线比较，任何函数变慢超过阈值时以非零状态退出。
+
+每个用例重复多轮，每轮处理整份语料并至少运行 --min-time 秒，取各轮中最快的一轮折算为单次耗时，
+以减少调度和频率波动的影响。基线与机器相关，应在同一台机器（或同一 CI 规格）上生成和比较。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.microbench_text --save-baseline      # 生成或更新基线
+    python -m benchmarks.microbench_text                      # 与基线比较
+    python -m benchmarks.microbench_text --threshold 0.3 --only keywords
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from types import SimpleNamespace
+from benchmarks import text_corpus
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'microbench_text.json')
+
+# 服务中提取模型响应 JSON 的正则（与 need_analysis_service / learning_path_service / resource_service 相同）
+_JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+_JSON_ARRAY_PATTERN = re.compile(r'\[\s*\{.*\}\s*\]', re.DOTALL)
+
+def build_cases():
+    """
+    构建用例
+    
+    Returns:
+        dict: {用例名: (处理整份语料的函数, 语料条数)}
+    """
+    from services.frustration_monitor import FrustrationMonitor, _UserState, extract_frustrated_skills
+    from services.resource_service import ResourceService
+    from services.user_behavior_stats_service import UserBehaviorStatsService
+    from utils.text import tokenize
+    
+    titles = text_corpus.titles()
+    queries = text_corpus.queries()
+    pages = text_corpus.pages()
+    responses = text_corpus.llm_responses()
+    object_responses = responses[0::2]  # 学习路径（JSON 对象）
+    array_responses = responses[1::2]  # 页面资源推荐（JSON 数组）
+    stats_service = UserBehaviorStatsService()
+    resource_service = ResourceService()
+    behaviors = [SimpleNamespace(title=title, search_query=query) for title, query in zip(titles, queries)]
+    monitor = FrustrationMonitor()
+    
+    def stats_keywords():
+        for text in titles:
+            stats_service._extract_keywords(text)
+        for text in queries:
+            stats_service._extract_keywords(text)
+    
+    def domain_distribution():
+        stats_service._compute_domain_distribution(behaviors)
+    
+    def resource_keywords():
+        for url, title, content in pages:
+            resource_service._extract_keywords(url, title, content)
+    
+    def page_domain():
+        for url, title, content in pages:
+            resource_service._analyze_page_domain(url, title, content)
+    
+    def frustration_extract():
+        for query in queries:
+            extract_frustrated_skills(query)
+    
+    def frustration_window():
+        # 模拟挫折检测的增量扫描：逐条计入环形缓冲区并重新判定
+        state = _UserState(monitor.window_size, 0.0)
+        with monitor._lock:
+            for index, query in enumerate(queries):
+                monitor._ingest(state, index + 1, query, float(index))
+                monitor._evaluate(state, float(index))
+    
+    def json_object():
+        for text in object_responses:
+            json.loads(_JSON_OBJECT_PATTERN.search(text).group(0))
+    
+    def json_array():
+        for text in array_responses:
+            json.loads(_JSON_ARRAY_PATTERN.search(text).group(0))
+    
+    def shared_tokenize():
+        for text in titles:
+            tokenize(text)
+    
+    return {
+        'stats.extract_keywords': (stats_keywords, len(titles) + len(queries)),
+        'stats.domain_distribution': (domain_distribution, len(behaviors)),
+        'resource.extract_keywords': (resource_keywords, len(pages)),
+        'resource.analyze_page_domain': (page_domain, len(pages)),
+        'frustration.extract_skills': (frustration_extract, len(queries)),
+        'frustration.window_scan': (frustration_window, len(queries)),
+        'llm.json_object_extract': (json_object, len(object_responses)),
+        'llm.json_array_extract': (json_array, len(array_responses)),
+        'text.tokenize': (shared_tokenize, len(titles)),
+    }
+
+def measure(func, items, repeat, min_time):
+    """返回单条语料的耗时（微秒），取多轮中最快的一轮"""
+    func()  # 预热（jieba 词典加载、正则编译缓存等）
+    best = float('inf')
+    for _ in range(repeat):
+        rounds = 0
+        started = time.perf_counter()
+        while True:
+            func()
+            rounds += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / rounds / items * 1e6)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='文本处理热点函数微基准')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--threshold', type=float, default=0.25, help='比基线慢超过该比例视为回归')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例的轮数')
+    parser.add_argument('--min-time', type=float, default=0.2, help='每轮最少运行时间（秒）')
+    parser.add_argument('--only', help='只运行名称包含该字符串的用例')
+    args = parser.parse_args()
+    
+    cases = build_cases()
+    if args.only:
+        cases = {name: case for name, case in cases.items() if args.only in name}
+    
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+    
+    results = {}
+    regressions = []
+    print(f"{'用例':<32}{'单次耗时':>12}{'基线':>12}{'变化':>9}")
+    for name, (func, items) in cases.items():
+        micros = measure(func, items, args.repeat, args.min_time)
+        results[name] = round(micros, 3)
+        previous = baseline.get(name)
+        if previous:
+            change = (micros - previous) / previous
+            regressed = change > args.threshold
+            if regressed:
+                regressions.append(name)
+            print(f"{name:<32}{micros:>10.2f}µs{previous:>10.2f}µs{change:>+9.0%}{'  << 回归' if regressed else ''}")
+        else:
+            print(f"{name:<32}{micros:>10.2f}µs{'-':>12}{'-':>9}")
+    
+    if args.save_baseline:
+        merged = dict(baseline)
+        merged.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'processor': platform.processor()},
+                'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': merged
+            }, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.baseline}")
+        return
+    
+    if not baseline:
+        print('没有基线，使用 --save-baseline 生成')
+        return
+    if regressions:
+        print(f"{len(regressions)} 个用例比基线慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print('没有回归')
+
+if __name__ == '__main__':
+    main()
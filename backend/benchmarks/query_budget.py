@@ -0,0 +1,88 @@
+"""
+读接口 SQL 查询数检查
+
+在临时数据库中生成合成数据，对每个读接口分别以行为最多的用户和中位用户请求一次，统计执行的查询数：
+- 超过接口的查询预算（QUERY_BUDGETS）时失败
+- 活跃用户的查询数多于中位用户时失败：查询数随用户数据量增长，通常是循环中的延迟加载（N+1）
+
+请求前先各请求一次预热进程内缓存（认证用户缓存等），统计的是缓存预热后的查询数。
+
+用法（在 backend 目录下）：
+    python -m benchmarks.query_budget
+    python -m benchmarks.query_budget --users 200 --behaviors 200000 --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+from benchmarks.bench_scaling import ENDPOINTS, make_token, pick_users
+
+# 各接口缓存预热后允许的最多查询数
+QUERY_BUDGETS = {
+    'behavior_stats': 6,
+    'profile': 6,
+    'behaviors': 3,
+    'paths': 3,
+    'path_detail': 3,
+    'detect_frustration': 6,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description='读接口 SQL 查询数检查')
+    parser.add_argument('--users', type=int, default=50, help='合成数据的用户数')
+    parser.add_argument('--behaviors', type=int, default=50000, help='合成数据的行为记录数')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--verbose', action='store_true', help='列出每个接口执行的语句')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='evelyn-query-budget-')
+    database = os.path.join(workdir, 'budget.db')
+    os.environ['EVELYN_DATABASE_URI'] = f'sqlite:///{database}'
+    os.environ['EVELYN_RESPONSE_CACHE_PATH'] = os.path.join(workdir, 'response_cache.db')
+    os.environ['EVELYN_CRAWL_CACHE_PATH'] = os.path.join(workdir, 'crawl_cache.db')
+    os.environ['EVELYN_GRAPH_STORE_PATH'] = os.path.join(workdir, 'knowledge_graph.bin')
+    
+    import logging
+    logging.disable(logging.INFO)
+    from tools.generate_synthetic_data import generate, prepare_database
+    from utils.query_stats import record_queries
+    prepare_database()
+    generate(database, args.users, args.behaviors, seed=args.seed, end=datetime(2024, 6, 1), progress=lambda _: None)
+    from app import app
+    client = app.test_client()
+    
+    counts = {}
+    for label, user_id, behaviors, path_id in pick_users(database):
+        headers = {'Authorization': f'Bearer {make_token(user_id)}'}
+        for name, template in ENDPOINTS:
+            url = template.format(user_id=user_id, path_id=path_id)
+            client.get(url, headers=headers)
+            with record_queries() as recorder:
+                response = client.get(url, headers=headers)
+            counts[(name, label)] = recorder.count
+            if args.verbose:
+                print(f"{name} / {label} 用户（{behaviors} 条行为）: {response.status_code}\n{recorder.summary()}")
+    
+    failures = []
+    print(f"{'接口':<22}{'预算':>6}{'中位用户':>10}{'活跃用户':>10}")
+    for name, _ in ENDPOINTS:
+        budget = QUERY_BUDGETS[name]
+        median = counts.get((name, 'median'), 0)
+        heaviest = counts.get((name, 'heaviest'), 0)
+        problems = []
+        if max(median, heaviest) > budget:
+            problems.append('超出预算')
+        if heaviest > median:
+            problems.append('随数据量增长')
+        if problems:
+            failures.append(name)
+        print(f"{name:<22}{budget:>6}{median:>10}{heaviest:>10}  {'、'.join(problems)}")
+    
+    if failures:
+        print(f"{len(failures)} 个接口的查询数不符合要求，使用 --verbose 查看执行的语句")
+        sys.exit(1)
+    print('全部接口符合查询预算')
+
+if __name__ == '__main__':
+    main()
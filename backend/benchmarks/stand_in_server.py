@@ -0,0 +1,74 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import hashlib
+import threading
+import time
+
+class StandInServer:
+    """
+    本地HTTP替身服务器，用于在不访问外网的情况下测试和压测抓取逻辑
+    
+    每个实例监听一个独立端口，相当于一个独立主机；可配置响应延迟，并记录每次请求的时间。
+    响应携带固定的 ETag，请求携带匹配的 If-None-Match 时返回 304。
+    """
+    
+    def __init__(self, latency=0.0, body='<html><body>stand-in</body></html>'):
+        self.latency = latency
+        self.body = body.encode('utf-8')
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:16]}"'
+        self.not_modified_count = 0
+        self.request_times = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/'
+    
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务器"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def min_request_gap(self):
+        """相邻两次请求之间的最小间隔（秒），用于验证按主机限速"""
+        with self._lock:
+            times = sorted(self.request_times)
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        return min(gaps) if gaps else None
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_times.append(time.monotonic())
+                if server.latency:
+                    time.sleep(server.latency)
+                if self.headers.get('If-None-Match') == server.etag:
+                    with server._lock:
+                        server.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header('ETag', server.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', server.etag)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
@@ -0,0 +1,104 @@
+"""
+微基准使用的固定语料：页面标题、搜索查询、页面正文和大模型响应
+
+由固定的片段和固定的随机种子组合生成，每次运行完全相同，保证基准结果可以跨提交比较。
+"""
+import json
+import random
+
+SEED = 20240501
+
+TOPICS = ['Python', 'pandas', 'React', 'Vue3', 'Java', 'Spring Boot', 'SQL', 'Docker', 'Kubernetes', 'PyTorch',
+          'TensorFlow', 'Go', 'Rust', 'C++', 'TypeScript', 'Node.js', 'Excel', 'Tableau', 'Figma', 'Linux',
+          '机器学习', '深度学习', '数据分析', '前端开发', '后端开发', '自然语言处理', '计算机视觉', '数据结构', '算法', '产品经理',
+          '用户增长', '内容营销', '区块链', '微服务', '云计算', '大数据', '神经网络', '数据挖掘', '统计学', '线性代数']
+
+TITLE_TEMPLATES = [
+    '{topic}入门教程（超详细）_CSDN博客',
+    '一文搞懂{topic}的核心概念 - 掘金',
+    '如何系统地学习{topic}？ - 知乎',
+    '{topic} 从零到精通 完整版 -哔哩哔哩_bilibili',
+    '{topic} Tutorial for Beginners - YouTube',
+    '{topic} | MDN Web Docs',
+    'Learn {topic} - Free Interactive Course | Codecademy',
+    '{topic}_百度搜索',
+    '{topic} - Google Search',
+    '【{topic}】面试高频问题总结与解析 - SegmentFault 思否',
+    'GitHub - awesome-{topic}: A curated list of {topic} resources',
+    '{topic}实战：从需求分析到上线部署 | 极客时间',
+]
+
+QUERY_TEMPLATES = [
+    '{topic} 入门', '{topic} 教程', '{topic} 太难了 看不懂', '{topic} 报错 怎么解决', 'how to learn {topic}',
+    '{topic} stuck on error', '{topic} 面试题', '{topic} 和 {other} 的区别', '{topic} 不会 求助', '{topic} best practices',
+]
+
+BODY_SENTENCES = [
+    '本文将从基础概念讲起，逐步深入到实际项目中的应用。',
+    '如果你是零基础，建议先掌握基本语法，再通过小项目巩固。',
+    'This guide walks through installation, configuration and the most common pitfalls.',
+    '下面的示例代码演示了如何读取数据、清洗数据并生成可视化图表。',
+    'In this chapter we build a small web application and deploy it with Docker.',
+    '很多初学者在这里会遇到问题，常见的错误包括路径配置和版本不兼容。',
+    '学习路线：基础语法 → 常用库 → 项目实战 → 性能优化 → 源码阅读。',
+    'We compare the trade-offs between several approaches and benchmark them on real data.',
+    '评论区：讲得很清楚，收藏了！请问有配套的练习题吗？',
+    '推荐书籍：《Python编程：从入门到实践》《利用Python进行数据分析》。',
+]
+
+URL_TEMPLATES = [
+    'https://blog.csdn.net/weixin_{n}/article/details/{m}',
+    'https://juejin.cn/post/{m}',
+    'https://www.zhihu.com/question/{n}',
+    'https://www.bilibili.com/video/BV1{n}',
+    'https://www.baidu.com/s?wd={topic}',
+    'https://www.google.com/search?q={topic}+tutorial',
+    'https://github.com/awesome/{topic}',
+    'https://developer.mozilla.org/zh-CN/docs/Web/{topic}',
+]
+
+def _rng():
+    return random.Random(SEED)
+
+def titles(count=400):
+    rng = _rng()
+    return [rng.choice(TITLE_TEMPLATES).format(topic=rng.choice(TOPICS)) for _ in range(count)]
+
+def queries(count=400):
+    rng = _rng()
+    return [rng.choice(QUERY_TEMPLATES).format(topic=rng.choice(TOPICS), other=rng.choice(TOPICS)) for _ in range(count)]
+
+def pages(count=200):
+    """(URL, 标题, 正文)"""
+    rng = _rng()
+    result = []
+    for _ in range(count):
+        topic = rng.choice(TOPICS)
+        url = rng.choice(URL_TEMPLATES).format(topic=topic, n=rng.randrange(10 ** 6, 10 ** 7), m=rng.randrange(10 ** 9, 10 ** 10))
+        title = rng.choice(TITLE_TEMPLATES).format(topic=topic)
+        body = ' '.join(rng.choice(BODY_SENTENCES) for _ in range(rng.randint(5, 30)))
+        result.append((url, title, f'{topic} {body}'))
+    return result
+
+def llm_responses(count=50):
+    """大模型响应：带推理过程的前缀（deepseek-r1 的 <think> 段）+ JSON 对象或数组"""
+    rng = _rng()
+    result = []
+    for index in range(count):
+        think = '<think>\n' + ' '.join(rng.choice(BODY_SENTENCES) for _ in range(rng.randint(10, 60))) + '\n</think>\n'
+        if index % 2:
+            payload = json.dumps([
+                {'title': f'资源{item}', 'type': 'course', 'description': rng.choice(BODY_SENTENCES),
+                 'difficulty': '初级', 'price': 0, 'link': f'https://example.com/{item}'}
+                for item in range(3)
+            ], ensure_ascii=False, indent=2)
+        else:
+            payload = json.dumps({
+                'title': f'{rng.choice(TOPICS)}学习路径', 'description': rng.choice(BODY_SENTENCES), 'estimated_time': '12周',
+                'stages': [{'name': f'阶段{stage}', 'description': rng.choice(BODY_SENTENCES), 'estimated_time': '4周',
+                            'resources': [{'type': '课程', 'name': f'课程{stage}', 'link': 'https://example.com/',
+                                           'description': rng.choice(BODY_SENTENCES), 'price': '0'}] * 3,
+                            'goals': ['目标一', '目标二']} for stage in range(4)]
+            }, ensure_ascii=False, indent=2)
+        result.append(f'{think}好的，以下是结果：\n```json\n{payload}\n```')
+    return result
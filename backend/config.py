@@ -0,0 +1,165 @@
+import os
+
+# 后端运行配置，均可通过环境变量覆盖
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
+
+
+def _env_bool(name, default):
+    """读取布尔类型的环境变量"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name, default):
+    """读取整数类型的环境变量"""
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+# 数据库连接地址与 Ollama 生成接口地址（压测时指向临时数据库和本地替身服务器）
+DATABASE_URI = os.environ.get('EVELYN_DATABASE_URI', 'sqlite:///evelyn.db')
+OLLAMA_API = os.environ.get('EVELYN_OLLAMA_API', 'http://127.0.0.1:11434/api/generate')
+# 每个进程同时等待 Ollama 响应的调用数上限，超出时排队（0 不限制）
+OLLAMA_MAX_CONCURRENCY = _env_int('EVELYN_OLLAMA_MAX_CONCURRENCY', 0)
+
+# 按任务分级选择模型：大模型（规划学习路径）和小模型（需求分析、页面资源、目标分析等抽取任务）的名称和
+# 请求参数（JSON，作为 Ollama 的 options），各任务的级别（任务=large/small，逗号分隔，未列出的使用大模型）
+LLM_MODEL_LARGE = os.environ.get('EVELYN_LLM_MODEL_LARGE', 'deepseek-r1:8b')
+LLM_MODEL_SMALL = os.environ.get('EVELYN_LLM_MODEL_SMALL', LLM_MODEL_LARGE)
+LLM_OPTIONS_LARGE = os.environ.get('EVELYN_LLM_OPTIONS_LARGE', '{}')
+LLM_OPTIONS_SMALL = os.environ.get('EVELYN_LLM_OPTIONS_SMALL', '{}')
+LLM_TASK_TIERS = os.environ.get('EVELYN_LLM_TASK_TIERS', 'need_analysis=small,page_resources=small,goal_analysis=small')
+# 大模型任务的耗时目标（任务=秒，逗号分隔，如 learning_path=60）：最近若干次调用耗时的中位数超过目标时，
+# 在一段时间（秒）内改用小模型
+LLM_LATENCY_TARGETS = os.environ.get('EVELYN_LLM_LATENCY_TARGETS', '')
+LLM_LATENCY_WINDOW = _env_int('EVELYN_LLM_LATENCY_WINDOW', 20)
+LLM_DOWNGRADE_SECONDS = _env_int('EVELYN_LLM_DOWNGRADE_SECONDS', 300)
+
+# 学习路径数据的压缩编码：none / deflate / zstd（zstd 需要安装 zstandard）
+PATH_DATA_COMPRESSION = os.environ.get('EVELYN_PATH_COMPRESSION', 'deflate').strip().lower()
+# 小于该字节数的路径数据不压缩，直接以文本存储
+PATH_DATA_COMPRESS_MIN_BYTES = _env_int('EVELYN_PATH_COMPRESS_MIN_BYTES', 1024)
+
+# 认证用户缓存：最多缓存的Token数量与缓存有效期（秒）
+AUTH_CACHE_SIZE = _env_int('EVELYN_AUTH_CACHE_SIZE', 1024)
+AUTH_CACHE_TTL = _env_int('EVELYN_AUTH_CACHE_TTL', 60)
+
+# 用户行为频繁项统计：计数器容量与时间衰减半衰期（天）
+BEHAVIOR_SKETCH_DOMAIN_CAPACITY = _env_int('EVELYN_SKETCH_DOMAIN_CAPACITY', 64)
+BEHAVIOR_SKETCH_KEYWORD_CAPACITY = _env_int('EVELYN_SKETCH_KEYWORD_CAPACITY', 128)
+BEHAVIOR_SKETCH_HALF_LIFE_DAYS = _env_int('EVELYN_SKETCH_HALF_LIFE_DAYS', 30)
+# 画像接口返回的衰减计数按该粒度（秒）取整计算时刻，同一时段内响应不变，ETag 随时段变化
+BEHAVIOR_SKETCH_DECAY_EPOCH_SECONDS = _env_int('EVELYN_SKETCH_DECAY_EPOCH_SECONDS', 3600)
+
+# 挫折检测：最近行为窗口大小、技能计数半衰期（小时）、触发阈值、跟踪的最大用户数
+FRUSTRATION_WINDOW_SIZE = _env_int('EVELYN_FRUSTRATION_WINDOW_SIZE', 30)
+FRUSTRATION_HALF_LIFE_HOURS = _env_int('EVELYN_FRUSTRATION_HALF_LIFE_HOURS', 72)
+FRUSTRATION_THRESHOLD = float(os.environ.get('EVELYN_FRUSTRATION_THRESHOLD', '2.5'))
+FRUSTRATION_MAX_USERS = _env_int('EVELYN_FRUSTRATION_MAX_USERS', 10000)
+# 挫折事件推送（SSE）连接的最长保持时间（秒），到期后由客户端重连；每个工作进程同时保持的推送连接和
+# 长轮询数上限（每个连接占用一个线程，协程模式下可以调大）
+FRUSTRATION_STREAM_SECONDS = _env_int('EVELYN_FRUSTRATION_STREAM_SECONDS', 60)
+FRUSTRATION_STREAM_MAX_CONNECTIONS = _env_int('EVELYN_FRUSTRATION_STREAM_MAX_CONNECTIONS', 4)
+# 跨进程的搜索行为变更通知：共享的内存映射文件路径与槽数
+FRUSTRATION_SIGNAL_PATH = os.environ.get('EVELYN_FRUSTRATION_SIGNAL_PATH',
+                                         os.path.join(INSTANCE_DIR, 'frustration_signals.bin'))
+FRUSTRATION_SIGNAL_SLOTS = _env_int('EVELYN_FRUSTRATION_SIGNAL_SLOTS', 65536)
+
+# 爬虫：并发线程数、同一主机两次请求的最小间隔与随机抖动（秒）、单次请求超时与整体超时（秒）
+CRAWLER_MAX_WORKERS = _env_int('EVELYN_CRAWLER_MAX_WORKERS', 8)
+CRAWLER_HOST_MIN_INTERVAL = float(os.environ.get('EVELYN_CRAWLER_HOST_MIN_INTERVAL', '1.0'))
+CRAWLER_HOST_JITTER = float(os.environ.get('EVELYN_CRAWLER_HOST_JITTER', '2.0'))
+CRAWLER_REQUEST_TIMEOUT = float(os.environ.get('EVELYN_CRAWLER_REQUEST_TIMEOUT', '10'))
+CRAWLER_TOTAL_TIMEOUT = float(os.environ.get('EVELYN_CRAWLER_TOTAL_TIMEOUT', '60'))
+# 是否真正请求平台页面（目前各平台的解析逻辑为模拟数据，默认不发起网络请求）
+CRAWLER_FETCH_PAGES = _env_bool('EVELYN_CRAWLER_FETCH_PAGES', False)
+
+# 抓取结果缓存：存储位置、新鲜期（秒，期内直接使用缓存）与最长保留时间（秒，超过后重新抓取）
+CRAWL_CACHE_PATH = os.environ.get('EVELYN_CRAWL_CACHE_PATH', os.path.join(INSTANCE_DIR, 'crawl_cache.db'))
+CRAWL_CACHE_FRESH_SECONDS = _env_int('EVELYN_CRAWL_CACHE_FRESH_SECONDS', 24 * 3600)
+CRAWL_CACHE_MAX_AGE_SECONDS = _env_int('EVELYN_CRAWL_CACHE_MAX_AGE_SECONDS', 7 * 24 * 3600)
+
+# 知识图谱列式存储文件（内存映射，多个工作进程共享）与爬取后重新持久化的最小间隔（秒）；
+# 持久化在后台线程中按列并入增量，间隔内新爬取的节点在下一次写入后才能被查询
+KNOWLEDGE_GRAPH_STORE_PATH = os.environ.get('EVELYN_GRAPH_STORE_PATH', os.path.join(INSTANCE_DIR, 'knowledge_graph.bin'))
+KNOWLEDGE_GRAPH_PERSIST_INTERVAL = _env_int('EVELYN_GRAPH_PERSIST_INTERVAL', 10)
+
+# 基于知识图谱的学习路径规划：是否优先使用（图谱中没有相关资源时再调用大模型）、
+# 是否调用大模型润色规划结果的文字描述、润色请求的超时时间（秒）
+# 爬虫目前返回的是模拟数据，默认关闭，否则规划结果由模拟资源组成，检索增强生成也不会被用到
+PATH_PLANNER_ENABLED = _env_bool('EVELYN_PATH_PLANNER', False)
+PATH_PLANNER_POLISH = _env_bool('EVELYN_PATH_PLANNER_POLISH', False)
+PATH_PLANNER_POLISH_TIMEOUT = float(os.environ.get('EVELYN_PATH_PLANNER_POLISH_TIMEOUT', '30'))
+
+# 检索增强的学习路径生成：是否启用、提供给模型的最大候选资源数、候选资源少于该数量时改为完整生成
+PATH_RAG_ENABLED = _env_bool('EVELYN_PATH_RAG', True)
+PATH_RAG_MAX_CANDIDATES = _env_int('EVELYN_PATH_RAG_MAX_CANDIDATES', 24)
+PATH_RAG_MIN_CANDIDATES = _env_int('EVELYN_PATH_RAG_MIN_CANDIDATES', 3)
+
+# 推测式学习路径预生成：需求分析完成后在后台为同一目标预先生成学习路径。
+# 后台线程数、线程的 nice 值、生成结果的有效期（秒）、最多保留的结果数、
+# 创建学习路径时等待进行中的推测任务的最长时间（秒）。
+# 推测生成和临时模板的后台生成共用这些线程，线程数默认与模型调用名额（EVELYN_OLLAMA_MAX_CONCURRENCY）相同，
+# 不限制名额时为 4；实际并发仍受调用名额限制，多出的线程只是排队等待名额
+SPECULATIVE_PATHS_ENABLED = _env_bool('EVELYN_SPECULATIVE_PATHS', False)
+SPECULATIVE_WORKERS = _env_int('EVELYN_SPECULATIVE_WORKERS', OLLAMA_MAX_CONCURRENCY or 4)
+SPECULATIVE_NICE = _env_int('EVELYN_SPECULATIVE_NICE', 19)
+SPECULATIVE_TTL_SECONDS = _env_int('EVELYN_SPECULATIVE_TTL', 600)
+SPECULATIVE_MAX_PARKED = _env_int('EVELYN_SPECULATIVE_MAX_PARKED', 256)
+SPECULATIVE_WAIT_SECONDS = float(os.environ.get('EVELYN_SPECULATIVE_WAIT_SECONDS', '120'))
+
+# 学习路径模板库文件；启用临时模板时，创建学习路径先立即返回最匹配的模板（标记为临时），
+# 正式路径在后台生成，客户端通过 revalidate 接口获取
+PATH_TEMPLATE_LIBRARY_PATH = os.environ.get('EVELYN_PATH_TEMPLATES', os.path.join(BASE_DIR, 'data', 'path_templates.json'))
+PATH_TEMPLATE_PROVISIONAL = _env_bool('EVELYN_PATH_TEMPLATE_PROVISIONAL', False)
+
+# 近似学习目标复用：是否启用（默认关闭）、MinHash 签名长度、LSH 分段数（须整除签名长度）、
+# 判定为近似目标的 Jaccard 相似度阈值、从数据库增量读取新目标的最小间隔（秒）、
+# 索引保存的最大目标数（超过时淘汰最早加入的）
+GOAL_REUSE_ENABLED = _env_bool('EVELYN_GOAL_REUSE', False)
+GOAL_MINHASH_PERMUTATIONS = _env_int('EVELYN_GOAL_MINHASH_PERMUTATIONS', 64)
+GOAL_LSH_BANDS = _env_int('EVELYN_GOAL_LSH_BANDS', 32)
+GOAL_SIMILARITY_THRESHOLD = float(os.environ.get('EVELYN_GOAL_SIMILARITY_THRESHOLD', '0.6'))
+GOAL_INDEX_REFRESH_SECONDS = _env_int('EVELYN_GOAL_INDEX_REFRESH_SECONDS', 30)
+GOAL_INDEX_MAX_ENTRIES = _env_int('EVELYN_GOAL_INDEX_MAX_ENTRIES', 50000)
+
+# 大模型响应缓存（需求分析和学习路径）：是否启用、SQLite 文件路径、有效期（秒）
+RESPONSE_CACHE_ENABLED = _env_bool('EVELYN_RESPONSE_CACHE', True)
+RESPONSE_CACHE_PATH = os.environ.get('EVELYN_RESPONSE_CACHE_PATH', os.path.join(INSTANCE_DIR, 'response_cache.db'))
+RESPONSE_CACHE_TTL_SECONDS = _env_int('EVELYN_RESPONSE_CACHE_TTL', 7 * 24 * 3600)
+
+# 运行指标：是否启用（启用时所有请求计入耗时统计，并提供 Prometheus 格式的导出接口）、导出接口路径
+METRICS_ENABLED = _env_bool('EVELYN_METRICS', True)
+METRICS_PATH = os.environ.get('EVELYN_METRICS_PATH', '/metrics')
+
+# SQL 查询统计：是否启用、慢查询阈值（毫秒）、同一请求中相同语句执行多少次时记录 N+1 警告、
+# 是否在响应头中返回查询数和耗时（X-Query-Count / X-Query-Time / Server-Timing，仅用于调试）
+QUERY_STATS_ENABLED = _env_bool('EVELYN_QUERY_STATS', True)
+SLOW_QUERY_MS = _env_int('EVELYN_SLOW_QUERY_MS', 200)
+QUERY_REPEAT_THRESHOLD = _env_int('EVELYN_QUERY_REPEAT_THRESHOLD', 5)
+QUERY_DEBUG_HEADER = _env_bool('EVELYN_QUERY_DEBUG_HEADER', False)
+
+# 大模型调用账本：off / record（追加记录每次成功的调用）/ replay（按提示词哈希回放记录的响应）、账本文件路径、
+# 回放时按原始耗时的倍数等待（0 不等待，1 为原始耗时）、回放没有记录时是否请求模型并记录
+LLM_LEDGER_MODE = os.environ.get('EVELYN_LLM_LEDGER', 'off').strip().lower()
+LLM_LEDGER_PATH = os.environ.get('EVELYN_LLM_LEDGER_PATH', os.path.join(INSTANCE_DIR, 'llm_ledger.db'))
+LLM_REPLAY_SPEED = float(os.environ.get('EVELYN_LLM_REPLAY_SPEED', '0'))
+LLM_REPLAY_PASSTHROUGH = _env_bool('EVELYN_LLM_REPLAY_PASSTHROUGH', False)
+
+# 生产环境启动入口（serve.py）：监听地址、工作进程数、每个进程的线程数、请求超时（需大于最长的生成时间）、
+# 平滑重启时等待旧进程处理完请求的时间（秒）、每个工作进程处理多少个请求后替换、
+# 工作模式（auto 按线程数选择 gthread / sync，gevent 为协程模式）、协程模式下每个进程同时处理的连接数
+SERVE_BIND = os.environ.get('EVELYN_SERVE_BIND', '0.0.0.0:5000')
+SERVE_WORKERS = _env_int('EVELYN_SERVE_WORKERS', max(2, os.cpu_count() or 1))
+SERVE_THREADS = _env_int('EVELYN_SERVE_THREADS', 8)
+SERVE_TIMEOUT_SECONDS = _env_int('EVELYN_SERVE_TIMEOUT', 300)
+SERVE_GRACEFUL_TIMEOUT_SECONDS = _env_int('EVELYN_SERVE_GRACEFUL_TIMEOUT', 60)
+SERVE_MAX_REQUESTS = _env_int('EVELYN_SERVE_MAX_REQUESTS', 5000)
+SERVE_WORKER_CLASS = os.environ.get('EVELYN_SERVE_WORKER_CLASS', 'auto').strip().lower()
+SERVE_WORKER_CONNECTIONS = _env_int('EVELYN_SERVE_WORKER_CONNECTIONS', 1000)
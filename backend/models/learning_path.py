@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from models.user import db
+from utils import compression
+import config
+import hashlib
 import json
 
 class LearningPath(db.Model):
@@ -15,21 +18,94 @@ class LearningPath(db.Model):
     estimated_time = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
-    path_data = db.Column(db.Text)  # 存储完整的路径数据（JSON格式）
+    path_data = db.Column(db.Text)  # 存储完整的路径数据（规范化JSON文本，未压缩时使用）
+    path_blob = db.Column(db.LargeBinary)  # 压缩后的规范化JSON
+    path_encoding = db.Column(db.String(16))  # path_blob 的压缩编码（deflate/zstd）
+    path_hash = db.Column(db.String(64))  # 规范化JSON的 SHA-256
+    path_size = db.Column(db.Integer)  # 规范化JSON的字节数（拼接压缩数据时计算校验和）
     completion_rate = db.Column(db.Float, default=0)  # 完成率
+    # 按学习目标生成、未经个性化调整的路径，可以被近似目标复用给其他用户
+    reusable = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
     
     def __repr__(self):
         return f'<LearningPath {self.id} - {self.title}>'
     
     def get_path_data(self):
         """获取完整的路径数据"""
-        if self.path_data:
-            return json.loads(self.path_data)
+        raw = self.get_path_json_bytes()
+        if raw:
+            return json.loads(raw)
         return {}
     
     def set_path_data(self, data):
-        """设置完整的路径数据"""
-        if isinstance(data, dict):
-            self.path_data = json.dumps(data)
+        """设置完整的路径数据，只做一次规范化序列化，按配置压缩并记录内容哈希"""
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError:
+                # 无法解析的文本保存为JSON字符串，保证存储的内容都可以直接拼接进响应体
+                pass
+        
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.path_hash = hashlib.sha256(raw).hexdigest()
+        self.path_size = len(raw)
+        
+        encoding = compression.resolve_encoding(config.PATH_DATA_COMPRESSION)
+        if encoding and len(raw) >= config.PATH_DATA_COMPRESS_MIN_BYTES:
+            self.path_blob = compression.compress(raw, encoding)
+            self.path_encoding = encoding
+            self.path_data = None
         else:
-            self.path_data = data
\ No newline at end of file
+            self.path_data = raw.decode('utf-8')
+            self.path_blob = None
+            self.path_encoding = None
+    
+    def get_path_json_bytes(self):
+        """获取路径数据的JSON字节串（不经过解析，可直接拼接进响应体）"""
+        if self.path_blob is not None:
+            return compression.decompress(self.path_blob, self.path_encoding)
+        if self.path_data:
+            if self.path_hash is None:
+                # 规范化存储之前的旧数据可能不是合法的JSON，按JSON字符串输出
+                try:
+                    json.loads(self.path_data)
+                except json.JSONDecodeError:
+                    return json.dumps(self.path_data, ensure_ascii=False).encode('utf-8')
+            return self.path_data.encode('utf-8')
+        return b''
+    
+    def get_path_deflate_segment(self):
+        """
+        获取可直接拼接进 deflate 响应体的压缩数据段
+        
+        Returns:
+            (bytes, int, int): 压缩块、原始数据的 Adler-32 校验和、原始数据的字节数；
+            未以 deflate 压缩存储或存储格式不支持拼接时返回None
+        """
+        if self.path_blob is None or self.path_encoding != compression.DEFLATE or not self.path_size:
+            return None
+        segment = compression.deflate_segment(self.path_blob)
+        if segment is None:
+            return None
+        return segment[0], segment[1], self.path_size
+    
+    def get_path_encoded(self, accepted_encodings=()):
+        """
+        获取用于响应的路径数据
+        
+        Args:
+            accepted_encodings: 客户端可接受的编码列表
+        
+        Returns:
+            bytes: 响应体
+            str: 响应体的编码，未压缩时为None
+        """
+        if self.path_blob is not None and self.path_encoding in accepted_encodings:
+            return self.path_blob, self.path_encoding
+        return self.get_path_json_bytes() or b'{}', None
+    
+    def get_path_hash(self):
+        """获取路径数据的内容哈希（旧数据没有存储哈希时即时计算）"""
+        if self.path_hash:
+            return self.path_hash
+        return hashlib.sha256(self.get_path_json_bytes()).hexdigest()
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import update
 
 db = SQLAlchemy()
 
@@ -13,10 +14,27 @@ class User(db.Model):
     learning_time = db.Column(db.Integer, nullable=True)  # 每周学习时间（小时）
     budget = db.Column(db.Float, nullable=True)  # 学习预算
     created_at = db.Column(db.DateTime, default=datetime.now)
+    # 用户数据版本号，行为记录、画像或学习路径发生写入时递增，用作ETag
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 关联
     behaviors = db.relationship('UserBehavior', backref='user', lazy=True)
     learning_paths = db.relationship('LearningPath', backref='user', lazy=True)
     
     def __repr__(self):
-        return f'<User {self.email}>'
\ No newline at end of file
+        return f'<User {self.email}>'
+    
+    @classmethod
+    def get_data_version(cls, user_id):
+        """获取用户数据版本号（单次主键查询）"""
+        return db.session.query(cls.data_version).filter(cls.id == user_id).scalar()
+    
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """递增用户数据版本号，在调用方的事务中执行，随调用方一起提交"""
+        db.session.execute(
+            update(cls)
+            .where(cls.id == user_id)
+            .values(data_version=cls.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
\ No newline at end of file
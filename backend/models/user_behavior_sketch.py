@@ -0,0 +1,17 @@
+from datetime import datetime
+from models.user import db
+
+class UserBehaviorSketch(db.Model):
+    """用户行为的频繁项统计（常访问域名、常搜索关键词），在记录行为时增量更新"""
+    __tablename__ = 'user_behavior_sketches'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    domain_sketch = db.Column(db.Text)  # 域名的 Space-Saving 统计（JSON）
+    keyword_sketch = db.Column(db.Text)  # 搜索关键词的 Space-Saving 统计（JSON）
+    behavior_count = db.Column(db.Integer, nullable=False, default=0)  # 行为总数（精确值）
+    total_duration = db.Column(db.Integer, nullable=False, default=0)  # 浏览总时长（精确值）
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 乐观锁版本号，每次更新统计时递增
+    
+    def __repr__(self):
+        return f'<UserBehaviorSketch {self.user_id}>'
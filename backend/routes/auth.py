@@ -5,6 +5,7 @@ import jwt
 import datetime
 import re
 from flask_cors import cross_origin
+from utils.auth import JWT_SECRET_KEY, JWT_ALGORITHM
 import logging  # 添加日志模块
 
 # 配置日志
@@ -89,8 +90,8 @@ def login():
             'user_id': user.id,
             'exp': datetime.datetime.now() + datetime.timedelta(days=7)
         },
-        'evelyn-secret-key',
-        algorithm='HS256'
+        JWT_SECRET_KEY,
+        algorithm=JWT_ALGORITHM
     )
     
     return jsonify({
@@ -0,0 +1,49 @@
+from flask import Blueprint, request, jsonify
+from services.reachability_index import get_prerequisite_index
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+knowledge_graph_bp = Blueprint('knowledge_graph', __name__)
+
+def _node_summary(index, node_id):
+    """节点的简要信息"""
+    node = index.node_info(node_id) or {}
+    return {
+        'id': node_id,
+        'type': node.get('type'),
+        'title': node.get('title'),
+        'difficulty': node.get('difficulty'),
+        'url': node.get('url')
+    }
+
+@knowledge_graph_bp.route('/nodes/<node_id>/prerequisites', methods=['GET'])
+def get_prerequisites(node_id):
+    """获取节点的全部（直接或间接）前置资源"""
+    index = get_prerequisite_index()
+    if index.node_info(node_id) is None:
+        return jsonify({'message': '节点不存在'}), 404
+    
+    prerequisites = index.prerequisites(node_id)
+    return jsonify({
+        'node': _node_summary(index, node_id),
+        'prerequisites': [_node_summary(index, prerequisite) for prerequisite in prerequisites],
+        'count': len(prerequisites)
+    }), 200
+
+@knowledge_graph_bp.route('/upstream', methods=['GET'])
+def check_upstream():
+    """判断 source 是否为 target 的（直接或间接）前置"""
+    source = request.args.get('source', '')
+    target = request.args.get('target', '')
+    if not source or not target:
+        return jsonify({'message': '请提供 source 和 target 节点ID'}), 400
+    
+    index = get_prerequisite_index()
+    return jsonify({
+        'source': source,
+        'target': target,
+        'upstream': index.is_upstream(source, target)
+    }), 200
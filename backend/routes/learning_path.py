@@ -1,10 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context, url_for
 from services.learning_path_service import LearningPathService
-from utils.auth import token_required
+from utils.auth import token_required, client_key, optional_user_id
+from utils.etag import conditional_get
 from models.learning_path import LearningPath, db
+from models.user import User
 from services.personalization_service import PersonalizationService
+from services.frustration_monitor import frustration_monitor
+from services.reachability_index import get_prerequisite_index
+from services.goal_index import get_goal_index
+from services.path_templates import get_template_library
+from services.speculative_generator import DONE, get_speculative_generator
+from utils import compression
+import config
 import json
 import logging
+import time
 
 # 配置日志
 logging.basicConfig(level=logging.DEBUG)
@@ -13,6 +23,51 @@ logger = logging.getLogger(__name__)
 learning_path_bp = Blueprint('learning_path', __name__)
 learning_path_service = LearningPathService()
 
+def _path_meta_prefix(path):
+    """学习路径响应JSON中 path_data 之前的部分"""
+    meta = json.dumps({
+        'id': path.id,
+        'goal': path.goal,
+        'completion_rate': path.completion_rate,
+        'created_at': path.created_at.isoformat(),
+        'updated_at': path.updated_at.isoformat()
+    }, ensure_ascii=False).encode('utf-8')
+    return meta[:-1] + b', "path_data": '
+
+def _build_path_json(path):
+    """构建学习路径的响应JSON，将已存储的path_data字节直接拼接进响应体"""
+    return _path_meta_prefix(path) + (path.get_path_json_bytes() or b'{}') + b'}'
+
+def _paths_response(paths, many=False):
+    """
+    构建单个或多个学习路径的响应
+    
+    客户端接受 deflate 编码且有路径数据以 deflate 压缩存储时，响应体以 deflate 编码返回，
+    已压缩的路径数据不解压，直接拼接进压缩后的响应体；否则返回拼接好的未压缩JSON。
+    """
+    segments = [path.get_path_deflate_segment() for path in paths]
+    if request.accept_encodings[compression.DEFLATE] and any(segments):
+        writer = compression.DeflateWriter()
+        writer.write(b'[' if many else b'')
+        for index, (path, segment) in enumerate(zip(paths, segments)):
+            writer.write((b',' if index else b'') + _path_meta_prefix(path))
+            if segment is not None:
+                writer.write_segment(*segment)
+            else:
+                writer.write(path.get_path_json_bytes() or b'{}')
+            writer.write(b'}')
+        writer.write(b']' if many else b'')
+        response = current_app.response_class(writer.finish(), status=200, mimetype='application/json')
+        response.headers['Content-Encoding'] = compression.DEFLATE
+    else:
+        if many:
+            body = b'[' + b','.join(_build_path_json(path) for path in paths) + b']'
+        else:
+            body = _build_path_json(paths[0])
+        response = current_app.response_class(body, status=200, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 @learning_path_bp.route('', methods=['POST'])
 def create_learning_path():
     """创建学习路径"""
@@ -27,43 +82,101 @@ def create_learning_path():
         return jsonify({'message': '请提供学习目标'}), 400
     
     # 获取用户ID（如果已登录）
-    user_id = None
-    auth_header = request.headers.get('Authorization', '')
-    if auth_header.startswith('Bearer '):
-        try:
-            import jwt
-            token = auth_header.split(' ')[1]
-            data = jwt.decode(token, 'evelyn-secret-key', algorithms=['HS256'])
-            user_id = data.get('user_id')
-        except:
-            pass
+    user_id = optional_user_id()
+    
+    speculative = get_speculative_generator()
+    client = client_key()
+    
+    if config.PATH_TEMPLATE_PROVISIONAL:
+        # 后台生成已完成时直接取用，否则先返回最匹配的模板，后台生成完成后由客户端替换
+        if speculative.status(goal, client) == DONE:
+            path_data, saved = speculative.take_result(goal, client)
+            if path_data is not None:
+                # 发起生成时登记了保存回调的，生成完成时已经保存
+                if not saved:
+                    learning_path_service.save_generated_path(goal, path_data, user_id)
+                return jsonify(path_data), 201
+        template, matched = get_template_library().match(goal, data.get('domain'), data.get('base_level'))
+        if matched:
+            # 生成完成时即为登录用户保存，不依赖客户端回来获取
+            on_done = _save_when_done(goal, user_id) if user_id else None
+            speculative.speculate(goal, client=client, urgent=True, on_done=on_done)
+            template['provisional'] = True
+            template['revalidate_url'] = url_for('learning_path.revalidate_learning_path', goal=goal)
+            return jsonify(template), 202
+    
+    if config.SPECULATIVE_PATHS_ENABLED:
+        # 需求分析后已在后台推测生成时，直接取用结果
+        path_data, saved = speculative.take_result(goal, client)
+        if path_data is not None:
+            if not saved:
+                learning_path_service.save_generated_path(goal, path_data, user_id)
+            return jsonify(path_data), 201
+        # 前台生成期间暂停启动新的推测任务
+        with speculative.foreground():
+            path_data = learning_path_service.generate_learning_path(goal, user_id)
+        return jsonify(path_data), 201
     
     # 生成学习路径
     path_data = learning_path_service.generate_learning_path(goal, user_id)
     
     return jsonify(path_data), 201
 
+@learning_path_bp.route('/revalidate', methods=['GET'])
+def revalidate_learning_path():
+    """
+    获取临时模板对应的正式学习路径：生成中返回202，生成完成后返回路径
+    
+    后台任务按发起请求的客户端（登录用户或来源地址）存放，只有同一客户端能取走；
+    登录用户的路径在生成完成时已经保存。
+    """
+    goal = request.args.get('goal', '')
+    
+    if not goal:
+        return jsonify({'message': '请提供学习目标'}), 400
+    
+    speculative = get_speculative_generator()
+    client = client_key()
+    state = speculative.status(goal, client)
+    if state is None:
+        return jsonify({'message': '没有进行中的学习路径生成'}), 404
+    if state != DONE:
+        return jsonify({'status': state}), 202
+    
+    path_data = speculative.take(goal, client)
+    if path_data is None:
+        return jsonify({'message': '没有进行中的学习路径生成'}), 404
+    
+    return jsonify(path_data), 200
+
+def _save_when_done(goal, user_id):
+    """后台生成完成时为用户保存学习路径的回调（在工作线程中执行，需要应用上下文）"""
+    app = current_app._get_current_object()
+    
+    def save(path_data):
+        with app.app_context():
+            learning_path_service.save_generated_path(goal, path_data, user_id)
+    return save
+
+@learning_path_bp.route('/similar-goals/stats', methods=['GET'])
+def get_similar_goal_stats():
+    """获取近似目标复用的命中统计"""
+    stats = get_goal_index().stats()
+    stats['enabled'] = config.GOAL_REUSE_ENABLED
+    return jsonify(stats), 200
+
 @learning_path_bp.route('', methods=['GET'])
 @token_required
 def get_learning_paths(current_user):
     """获取用户的学习路径列表"""
     paths = LearningPath.query.filter_by(user_id=current_user.id).order_by(LearningPath.created_at.desc()).all()
     
-    result = []
-    for path in paths:
-        result.append({
-            'id': path.id,
-            'goal': path.goal,
-            'path_data': path.get_path_data(),
-            'completion_rate': path.completion_rate,
-            'created_at': path.created_at.isoformat(),
-            'updated_at': path.updated_at.isoformat()
-        })
-    
-    return jsonify(result), 200
+    # 直接拼接已存储的JSON字节（或压缩数据），避免对path_data反序列化再序列化
+    return _paths_response(paths, many=True)
 
 @learning_path_bp.route('/<int:path_id>', methods=['GET'])
 @token_required
+@conditional_get('learning-path')
 def get_learning_path(current_user, path_id):
     """获取指定学习路径"""
     path = LearningPath.query.filter_by(id=path_id, user_id=current_user.id).first()
@@ -75,20 +188,34 @@ def get_learning_path(current_user, path_id):
     if path.user_id != current_user.id:
         return jsonify({'message': '无权访问此学习路径'}), 403
     
-    # 获取原始路径数据
-    original_path_data = path.get_path_data()
-    
-    # 构建响应数据
-    response_data = {
-        'id': path.id,
-        'goal': path.goal,
-        'path_data': original_path_data,
-        'completion_rate': path.completion_rate,
-        'created_at': path.created_at.isoformat(),
-        'updated_at': path.updated_at.isoformat()
-    }
+    # 构建响应数据，path_data 直接使用已存储的JSON字节（或压缩数据）
+    return _paths_response([path])
 
-    return jsonify(response_data), 200
+@learning_path_bp.route('/<int:path_id>/path-data', methods=['GET'])
+@token_required
+def get_learning_path_data(current_user, path_id):
+    """获取学习路径的原始路径数据，客户端支持相同编码时直接返回压缩后的字节"""
+    path = LearningPath.query.filter_by(id=path_id, user_id=current_user.id).first()
+    
+    if not path:
+        return jsonify({'message': '学习路径不存在'}), 404
+    
+    etag = path.get_path_hash()
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
+    accepted_encodings = [encoding for encoding in compression.available_encodings()
+                          if request.accept_encodings[encoding]]
+    body, encoding = path.get_path_encoded(accepted_encodings)
+    
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    return response
 
 # 新增：检测用户是否遇到挫折的接口
 @learning_path_bp.route('/<int:path_id>/detect-frustration', methods=['GET'])
@@ -100,6 +227,18 @@ def detect_frustration(current_user, path_id):
     if not path:
         return jsonify({'message': '学习路径不存在'}), 404
     
+    # 长轮询：传入 wait（秒）和 since（上次的事件序号）时，等待新的挫折事件或超时后再返回
+    # 本进程的推送连接名额已用完时不等待，立即返回当前结果
+    wait = min(request.args.get('wait', 0, type=int), 60)
+    if wait > 0 and frustration_monitor.try_acquire_stream():
+        try:
+            since = request.args.get('since', 0, type=int)
+            # 等待期间不占用数据库连接
+            db.session.close()
+            frustration_monitor.wait_for_event(current_user.id, since, wait)
+        finally:
+            frustration_monitor.release_stream()
+    
     # 初始化个性化服务
     personalization_service = PersonalizationService()
     
@@ -110,9 +249,60 @@ def detect_frustration(current_user, path_id):
     
     return jsonify({
         'has_frustration': bool(frustrated_skills),
-        'frustrated_skills': frustrated_skills if frustrated_skills else []
+        'frustrated_skills': frustrated_skills if frustrated_skills else [],
+        'seq': frustration_monitor.get_seq(current_user.id)
     }), 200
 
+# 新增：挫折事件推送接口（Server-Sent Events）
+@learning_path_bp.route('/<int:path_id>/frustration-events', methods=['GET'])
+@token_required
+def frustration_events(current_user, path_id):
+    """检测到新的挫折技能时推送事件，连接保持一段时间后由客户端重连"""
+    path = LearningPath.query.filter_by(id=path_id, user_id=current_user.id).first()
+    if not path:
+        return jsonify({'message': '学习路径不存在'}), 404
+    
+    # 每个推送连接在保持期间占用一个线程，本进程的名额用完时让客户端稍后重连（或改用长轮询）
+    if not frustration_monitor.try_acquire_stream():
+        response = jsonify({'message': '推送连接过多，请稍后重试'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    user_id = current_user.id
+    # 断线重连时浏览器会携带 Last-Event-ID
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', 0, type=int)
+    
+    def generate():
+        last_seq = since
+        deadline = time.time() + config.FRUSTRATION_STREAM_SECONDS
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            event = frustration_monitor.wait_for_event(user_id, last_seq, min(15, remaining))
+            # 长连接期间不占用数据库连接
+            db.session.close()
+            if event:
+                last_seq, frustrated_skills = event
+                data = json.dumps({
+                    'has_frustration': bool(frustrated_skills),
+                    'frustrated_skills': frustrated_skills,
+                    'seq': last_seq
+                }, ensure_ascii=False)
+                yield f"id: {last_seq}\nevent: frustration\ndata: {data}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # 连接结束（包括客户端提前断开）时释放名额
+    response.call_on_close(frustration_monitor.release_stream)
+    return response
+
 # 新增：生成备选学习路径的接口
 @learning_path_bp.route('/<int:path_id>/generate-alternative', methods=['POST'])
 @token_required
@@ -153,6 +343,48 @@ def generate_alternative_path(current_user, path_id):
         logger.error(f"解析调整后的路径数据失败: {str(e)}")
         return jsonify({'message': '解析备选学习路径失败'}), 500
 
+@learning_path_bp.route('/<int:path_id>/prerequisite-check', methods=['GET'])
+@token_required
+def check_path_prerequisites(current_user, path_id):
+    """检查学习路径中的资源是否缺少前置资源，或前置资源被安排在了后面的阶段"""
+    path = LearningPath.query.filter_by(id=path_id, user_id=current_user.id).first()
+    
+    if not path:
+        return jsonify({'message': '学习路径不存在'}), 404
+    
+    index = get_prerequisite_index()
+    path_data = path.get_path_data() or {}
+    
+    # 按学习顺序将路径中的资源对应到知识图谱节点
+    node_ids = []
+    locations = {}
+    for stage_index, stage in enumerate(path_data.get('stages', [])):
+        for resource in stage.get('resources', []):
+            node_id = index.resolve_resource(resource)
+            if node_id is None:
+                continue
+            node_ids.append(node_id)
+            locations.setdefault(node_id, {
+                'stage_index': stage_index,
+                'stage': stage.get('name') or stage.get('title'),
+                'resource': resource.get('name') or resource.get('title')
+            })
+    
+    issues = []
+    for node_id, result in index.missing_prerequisites(node_ids).items():
+        issues.append(dict(
+            locations[node_id],
+            node_id=node_id,
+            missing=[index.node_info(prerequisite) for prerequisite in result['missing']],
+            out_of_order=[dict(locations[prerequisite], node_id=prerequisite) for prerequisite in result['out_of_order']]
+        ))
+    
+    return jsonify({
+        'path_id': path_id,
+        'matched_resources': len(set(node_ids)),
+        'issues': issues
+    }), 200
+
 @learning_path_bp.route('/<int:path_id>/completion', methods=['PUT'])
 @token_required
 def update_completion_rate(current_user, path_id):
@@ -177,6 +409,7 @@ def update_completion_rate(current_user, path_id):
     path.completion_rate = completion_rate
     
     try:
+        User.bump_data_version(current_user.id)
         db.session.commit()
         return jsonify({
             'message': '更新成功',
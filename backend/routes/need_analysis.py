@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from services.need_analysis_service import NeedAnalysisService
+from services.speculative_generator import get_speculative_generator
+from utils.auth import client_key
+import config
 
 need_analysis_bp = Blueprint('need_analysis', __name__)
 need_analysis_service = NeedAnalysisService()
@@ -20,4 +23,15 @@ def analyze_need():
     # 分析学习需求
     analysis_data = need_analysis_service.analyze_learning_need(goal)
     
-    return jsonify(analysis_data), 200
\ No newline at end of file
+    # 用户接下来通常会为同一目标创建学习路径，在后台提前生成
+    if config.SPECULATIVE_PATHS_ENABLED:
+        get_speculative_generator().speculate(goal, client=client_key())
+    
+    return jsonify(analysis_data), 200
+
+@need_analysis_bp.route('/speculation/stats', methods=['GET'])
+def get_speculation_stats():
+    """获取推测式学习路径预生成的统计信息"""
+    stats = get_speculative_generator().stats()
+    stats['enabled'] = config.SPECULATIVE_PATHS_ENABLED
+    return jsonify(stats), 200
@@ -1,47 +1,24 @@
 from flask import Blueprint, request, jsonify
 import json
 from models.user import User, db
-from models.user_behavior import UserBehavior
-from utils.auth import token_required  # 导入统一的装饰器
+from services.behavior_profile_service import BehaviorProfileService
+from utils.auth import token_required, invalidate_cached_user  # 导入统一的装饰器
+from utils.etag import conditional_get
 
 user_bp = Blueprint('user', __name__)
+behavior_profile_service = BehaviorProfileService()
 
 @user_bp.route('/<user_id>/profile', methods=['GET'], endpoint='get_profile')
 @token_required  # 使用统一的装饰器
+@conditional_get('profile', extra_key=lambda: behavior_profile_service.decay_epoch())  # 衰减计数按时段变化
 def get_user_profile(current_user, user_id):
     """获取用户画像"""
     # 验证用户ID - 将user_id转换为整数再比较
     if current_user.id != int(user_id):
         return jsonify({'message': f'无权访问此用户信息'}), 403
     
-    # 获取用户行为数据
-    behaviors = UserBehavior.query.filter_by(user_id=user_id).all()
-    
-    # 分析用户行为
-    domains = {}
-    search_keywords = {}
-    total_duration = 0
-    
-    for behavior in behaviors:
-        # 分析域名
-        domain = behavior.url.split('/')[2] if behavior.url and '/' in behavior.url else ''
-        domains[domain] = domains.get(domain, 0) + 1
-        
-        # 分析搜索关键词
-        if behavior.search_query:
-            for keyword in behavior.search_query.split():
-                search_keywords[keyword] = search_keywords.get(keyword, 0) + 1
-        
-        # 累计浏览时长
-        total_duration += behavior.duration
-    
-    # 构建用户画像
-    behavior_analysis = {
-        'top_domains': sorted(domains.items(), key=lambda x: x[1], reverse=True)[:5],
-        'top_keywords': sorted(search_keywords.items(), key=lambda x: x[1], reverse=True)[:10],
-        'total_duration': total_duration,
-        'behavior_count': len(behaviors)
-    }
+    # 分析用户行为（读取记录行为时增量维护的频繁项统计，计数按时间衰减）
+    behavior_analysis = behavior_profile_service.get_behavior_analysis(current_user.id)
     
     # 解析用户存储的JSON数据
     try:
@@ -92,7 +69,9 @@ def update_user_profile(current_user, user_id):
             current_user.skill_levels = json.dumps(data['skill_levels'])
         
         # 保存更新
+        User.bump_data_version(current_user.id)
         db.session.commit()
+        invalidate_cached_user(current_user.id)
         return jsonify({'message': '用户画像更新成功'}), 200
     except AttributeError as e:
         return jsonify({'message': f'更新失败: 用户模型缺少必要的属性 - {str(e)}'}), 400
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from models.user_behavior import UserBehavior, db
+from models.user import User
+from services.behavior_profile_service import BehaviorProfileService
+from services.frustration_monitor import frustration_monitor
 from utils.auth import token_required
 import re
 from urllib.parse import urlparse, parse_qs
@@ -11,6 +14,7 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 user_behavior_bp = Blueprint('user_behavior', __name__)
+behavior_profile_service = BehaviorProfileService()
 
 @user_behavior_bp.route('', methods=['POST'])
 @token_required
@@ -53,11 +57,19 @@ def record_behavior(current_user):
     
     try:
         db.session.add(behavior)
+        behavior_profile_service.record_behavior(behavior)
+        User.bump_data_version(current_user.id)
         db.session.commit()
-        return jsonify({'message': '记录成功', 'id': behavior.id}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'记录失败: {str(e)}'}), 500
+    
+    # 增量更新挫折检测状态；行为已经提交，这里出错不影响记录结果
+    try:
+        frustration_monitor.observe(current_user.id, behavior.id, search_query, behavior.timestamp)
+    except Exception as e:
+        logger.error(f"更新挫折检测状态失败: {str(e)}")
+    return jsonify({'message': '记录成功', 'id': behavior.id}), 201
 
 @user_behavior_bp.route('', methods=['GET'])
 @token_required
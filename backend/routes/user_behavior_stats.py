@@ -8,6 +8,7 @@ from urllib.parse import urlparse
 import re
 from services.user_behavior_stats_service import UserBehaviorStatsService
 from utils.auth import token_required
+from utils.etag import conditional_get
 import logging
 
 # 配置日志
@@ -20,6 +21,7 @@ stats_service = UserBehaviorStatsService()
 
 @user_behavior_stats_bp.route('/stats', methods=['GET'])
 @token_required
+@conditional_get('stats', extra_key=lambda: datetime.now().date().isoformat())  # 每周统计随日期变化
 def get_user_stats(current_user):
     """获取用户行为统计"""
     try:
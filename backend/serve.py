@@ -0,0 +1,161 @@
+"""
+生产环境启动入口
+
+run.py / app.py 使用 Flask 开发服务器（单进程、debug 模式），只适合本地开发。本入口在 gunicorn 的预派生
+（prefork）模型下运行应用：
+
+- 主进程先导入应用并预加载 jieba 词典、路径模板库和领域关键词、知识图谱和前置关系索引、近似目标索引，
+  然后冻结垃圾回收跟踪的对象（gc.freeze），再派生工作进程；工作进程以写时复制的方式共享这部分内存，
+  不必各自加载一遍
+- 工作进程数和每个进程的线程数可配置（线程数大于 1 时使用 gthread 工作模式）
+- 协程模式（--worker-class gevent）：生成学习路径、需求分析、页面资源和备选路径都要等待大模型几秒到几分钟，
+  线程模式下每个等待中的请求占用一个线程，并发数受线程数限制；协程模式下等待 Ollama 响应时让出执行权，
+  一个工作进程可同时处理上千个连接，调用 Ollama 前归还数据库连接，只读数据库的接口不受影响。
+  需要安装 gevent，并在导入应用之前替换标准库（本入口在预加载之前完成）。分词、规划等计算仍在进程内同步执行，
+  协程模式下工作进程数不应少于 CPU 核数
+- 平滑重启：向主进程发送 HUP 信号，新的工作进程启动后旧的工作进程处理完手头的请求再退出；
+  预加载模式下 HUP 不会重新导入代码，部署新代码时发送 USR2 启动新的主进程，确认正常后向旧主进程发送 QUIT
+- 每个工作进程处理一定数量的请求后自动替换（带随机抖动），防止内存缓慢增长
+
+gunicorn 只支持类 Unix 系统，需要单独安装（pip install gunicorn，协程模式另需 pip install gevent）。
+
+用法（在 backend 目录下）：
+    python serve.py
+    python serve.py --bind 0.0.0.0:5000 --workers 4 --threads 16
+    python serve.py --worker-class gevent --worker-connections 1000
+    kill -HUP <主进程PID>   # 平滑重启工作进程
+"""
+import argparse
+import gc
+import logging
+import time
+import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def preload():
+    """在主进程中导入应用并加载各进程共享的只读数据，返回应用对象"""
+    started = time.perf_counter()
+    from app import app
+    from models.user import db
+    from utils.db_migrate import ensure_columns
+    
+    def step(name, func):
+        step_started = time.perf_counter()
+        try:
+            func()
+            logger.info(f"预加载 {name}: {(time.perf_counter() - step_started) * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"预加载 {name} 失败（工作进程中首次使用时再加载）: {str(e)}")
+    
+    def load_jieba():
+        import jieba
+        jieba.initialize()
+    
+    def load_templates():
+        from services.path_templates import get_template_library
+        get_template_library().load()
+    
+    def load_graph():
+        from services.reachability_index import get_prerequisite_index
+        get_prerequisite_index()
+    
+    with app.app_context():
+        db.create_all()
+        ensure_columns(db)
+        
+        step('jieba 词典', load_jieba)
+        step('路径模板库', load_templates)
+        step('知识图谱和前置关系索引', load_graph)
+        if config.GOAL_REUSE_ENABLED:
+            from services.goal_index import get_goal_index
+            step('近似目标索引', lambda: get_goal_index().refresh(force=True))
+        
+        # 数据库连接不能跨进程共享：派生前关闭主进程的连接，工作进程各自建立连接
+        db.engine.dispose()
+    
+    # 预加载的对象不再参与垃圾回收扫描，避免回收时写入对象头导致共享的内存页被复制
+    gc.collect()
+    gc.freeze()
+    logger.info(f"预加载完成，耗时 {time.perf_counter() - started:.1f}s")
+    return app
+
+def patch_for_gevent():
+    """协程模式下替换标准库中的阻塞调用（socket、threading、time.sleep 等），必须在导入应用之前执行"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise SystemExit('协程模式需要安装 gevent（pip install gevent）')
+    monkey.patch_all()
+
+def worker_class(args):
+    if args.worker_class != 'auto':
+        return args.worker_class
+    return 'gthread' if args.threads > 1 else 'sync'
+
+def build_options(args):
+    """gunicorn 配置"""
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': worker_class(args),
+        'worker_connections': args.worker_connections if worker_class(args) == 'gevent' else None,
+        'preload_app': True,
+        # 生成学习路径要等待大模型，超时时间需要大于最长的生成时间
+        'timeout': config.SERVE_TIMEOUT_SECONDS,
+        'graceful_timeout': config.SERVE_GRACEFUL_TIMEOUT_SECONDS,
+        'keepalive': 5,
+        'max_requests': config.SERVE_MAX_REQUESTS,
+        'max_requests_jitter': config.SERVE_MAX_REQUESTS // 10,
+        'accesslog': '-' if args.access_log else None,
+        'errorlog': '-',
+        'proc_name': 'evelyn',
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+def main():
+    parser = argparse.ArgumentParser(description='Evelyn 后端生产环境启动入口')
+    parser.add_argument('--bind', default=config.SERVE_BIND, help='监听地址')
+    parser.add_argument('--workers', type=int, default=config.SERVE_WORKERS, help='工作进程数')
+    parser.add_argument('--threads', type=int, default=config.SERVE_THREADS, help='每个工作进程的线程数')
+    parser.add_argument('--worker-class', choices=('auto', 'sync', 'gthread', 'gevent'),
+                        default=config.SERVE_WORKER_CLASS, help='工作模式（auto 按线程数选择 gthread 或 sync）')
+    parser.add_argument('--worker-connections', type=int, default=config.SERVE_WORKER_CONNECTIONS,
+                        help='协程模式下每个工作进程同时处理的连接数')
+    parser.add_argument('--access-log', action='store_true', help='输出访问日志')
+    args = parser.parse_args()
+    
+    if worker_class(args) == 'gevent':
+        patch_for_gevent()
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit('未安装 gunicorn（pip install gunicorn）；Windows 下请使用 python run.py 启动')
+    
+    class EvelynApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            self.application = preload()
+            super().__init__()
+        
+        def load_config(self):
+            for name, value in self.options.items():
+                self.cfg.set(name, value)
+        
+        def load(self):
+            return self.application
+    
+    options = build_options(args)
+    if options['worker_class'] == 'gevent':
+        logger.info(f"以 {options['workers']} 个工作进程 × {options['worker_connections']} 个连接（gevent）"
+                    f"监听 {options['bind']}")
+    else:
+        logger.info(f"以 {options['workers']} 个工作进程 × {options['threads']} 个线程（{options['worker_class']}）"
+                    f"监听 {options['bind']}")
+    EvelynApplication(options).run()
+
+if __name__ == '__main__':
+    main()
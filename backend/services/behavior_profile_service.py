@@ -0,0 +1,162 @@
+from datetime import datetime
+from models.user import db
+from sqlalchemy.exc import IntegrityError
+from models.user_behavior import UserBehavior
+from models.user_behavior_sketch import UserBehaviorSketch
+from utils.topk_sketch import DecayedSpaceSaving
+import config
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 版本号冲突时重新读取统计结构的次数
+SKETCH_UPDATE_RETRIES = 5
+
+class BehaviorProfileService:
+    """用户行为画像服务，在记录行为时增量维护常访问域名和常搜索关键词"""
+    
+    def __init__(self):
+        self.domain_capacity = config.BEHAVIOR_SKETCH_DOMAIN_CAPACITY
+        self.keyword_capacity = config.BEHAVIOR_SKETCH_KEYWORD_CAPACITY
+        self.half_life = config.BEHAVIOR_SKETCH_HALF_LIFE_DAYS * 24 * 3600
+        self.decay_epoch_seconds = max(1, config.BEHAVIOR_SKETCH_DECAY_EPOCH_SECONDS)
+    
+    def record_behavior(self, behavior):
+        """
+        将一条新行为计入用户的频繁项统计，在调用方的事务中执行
+        
+        统计结构在内存中更新后按版本号条件写回：其他请求已先一步写入（版本号已变化）时重新读取再计入，
+        并发记录行为时不会丢失更新。同一用户的首次统计记录被并发请求抢先插入时，
+        回滚到保存点（保留调用方的行为记录）后按更新路径重新计入。
+        
+        Args:
+            behavior: 已加入会话、尚未提交的 UserBehavior 对象
+        """
+        for _ in range(SKETCH_UPDATE_RETRIES):
+            row = db.session.query(
+                UserBehaviorSketch.domain_sketch, UserBehaviorSketch.keyword_sketch, UserBehaviorSketch.version
+            ).filter_by(user_id=behavior.user_id).first()
+            if row is None:
+                # 首次统计时从历史数据回填，回填查询会先刷新会话，已包含这条新行为
+                sketch = self._build_sketch(behavior.user_id)
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(sketch)
+                    return
+                except IntegrityError:
+                    # 其他请求已插入统计记录（其回填不包含这条未提交的行为），重新读取后计入
+                    logger.info(f"用户 {behavior.user_id} 的行为统计已由并发请求创建，改为更新")
+                    continue
+            
+            domains, keywords = self._load(row)
+            self._apply(domains, keywords, behavior.url, behavior.search_query,
+                        behavior.timestamp or datetime.now())
+            updated = UserBehaviorSketch.query.filter_by(user_id=behavior.user_id, version=row.version).update({
+                UserBehaviorSketch.domain_sketch: domains.to_json(),
+                UserBehaviorSketch.keyword_sketch: keywords.to_json(),
+                UserBehaviorSketch.version: UserBehaviorSketch.version + 1,
+                UserBehaviorSketch.behavior_count: UserBehaviorSketch.behavior_count + 1,
+                UserBehaviorSketch.total_duration: UserBehaviorSketch.total_duration + (behavior.duration or 0)
+            }, synchronize_session=False)
+            if updated:
+                return
+        raise RuntimeError(f"用户 {behavior.user_id} 的行为统计并发更新冲突")
+    
+    def get_behavior_analysis(self, user_id, domain_limit=5, keyword_limit=10):
+        """
+        获取用户行为分析结果，耗时只与返回条数有关，与行为历史长度无关
+        
+        计数衰减到当前时段（decay_epoch）的起点，同一时段内结果不变，与条件GET的ETag一致。
+        """
+        sketch = self._get_or_build_sketch(user_id)
+        domains, keywords = self._load(sketch)
+        now = self.decay_epoch() * self.decay_epoch_seconds
+        
+        return {
+            'top_domains': [(domain, round(count, 1)) for domain, count in domains.top(domain_limit, now)],
+            'top_keywords': [(keyword, round(count, 1)) for keyword, count in keywords.top(keyword_limit, now)],
+            'total_duration': sketch.total_duration,
+            'behavior_count': sketch.behavior_count
+        }
+    
+    def decay_epoch(self, now=None):
+        """当前的衰减时段编号，参与画像接口的ETag计算"""
+        return int((time.time() if now is None else now) // self.decay_epoch_seconds)
+    
+    def get_top_interests(self, user_id, domain_limit=5, keyword_limit=10, min_keyword_length=3):
+        """获取用户最常访问的域名和搜索关键词（只返回名称）"""
+        sketch = self._get_or_build_sketch(user_id)
+        if not sketch.behavior_count:
+            return [], []
+        
+        domains, keywords = self._load(sketch)
+        now = datetime.now().timestamp()
+        top_domains = [domain for domain, _ in domains.top(domain_limit, now) if domain]
+        top_keywords = [keyword for keyword, _ in keywords.top(self.keyword_capacity, now)
+                        if len(keyword) >= min_keyword_length][:keyword_limit]
+        return top_domains, top_keywords
+    
+    def _get_or_build_sketch(self, user_id):
+        """
+        获取用户的统计记录
+        
+        不存在时从历史数据临时构建，不写入数据库（读取接口不产生写入），
+        统计记录在该用户下一次记录行为时回填保存。
+        """
+        sketch = UserBehaviorSketch.query.get(user_id)
+        if sketch is not None:
+            return sketch
+        return self._build_sketch(user_id)
+    
+    def _build_sketch(self, user_id):
+        """从用户的全部历史行为构建统计记录（未加入会话）"""
+        logger.info(f"回填用户 {user_id} 的行为统计")
+        domains = DecayedSpaceSaving(self.domain_capacity, self.half_life)
+        keywords = DecayedSpaceSaving(self.keyword_capacity, self.half_life)
+        behavior_count = 0
+        total_duration = 0
+        
+        rows = UserBehavior.query.with_entities(
+            UserBehavior.url, UserBehavior.search_query, UserBehavior.duration, UserBehavior.timestamp
+        ).filter_by(user_id=user_id).order_by(UserBehavior.timestamp).yield_per(1000)
+        
+        for url, search_query, duration, timestamp in rows:
+            self._apply(domains, keywords, url, search_query, timestamp or datetime.now())
+            behavior_count += 1
+            total_duration += duration or 0
+        
+        sketch = UserBehaviorSketch(
+            user_id=user_id,
+            behavior_count=behavior_count,
+            total_duration=total_duration
+        )
+        self._store(sketch, domains, keywords)
+        return sketch
+    
+    def _apply(self, domains, keywords, url, search_query, timestamp):
+        """将一条行为计入域名和关键词统计"""
+        ts = timestamp.timestamp()
+        domains.add(self._extract_domain(url), ts)
+        if search_query:
+            for keyword in search_query.split():
+                keywords.add(keyword, ts)
+    
+    def _extract_domain(self, url):
+        """从URL中提取域名"""
+        if not url or '/' not in url:
+            return ''
+        parts = url.split('/')
+        return parts[2] if len(parts) > 2 else ''
+    
+    def _load(self, sketch):
+        """反序列化统计结构"""
+        domains = DecayedSpaceSaving.from_json(sketch.domain_sketch, self.domain_capacity, self.half_life)
+        keywords = DecayedSpaceSaving.from_json(sketch.keyword_sketch, self.keyword_capacity, self.half_life)
+        return domains, keywords
+    
+    def _store(self, sketch, domains, keywords):
+        """序列化统计结构"""
+        sketch.domain_sketch = domains.to_json()
+        sketch.keyword_sketch = keywords.to_json()
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CrawlCacheEntry:
+    """一条抓取缓存记录"""
+    
+    def __init__(self, items, fetched_at, etag=None, last_modified=None):
+        self.items = items
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+    
+    def age(self, now=None):
+        """缓存的时长（秒）"""
+        return (now or time.time()) - self.fetched_at
+
+class CrawlCache:
+    """
+    持久化的抓取结果缓存，以 (平台, 节点类型, 关键词) 为键
+    
+    使用独立的 SQLite 文件存储，不依赖 Flask 应用上下文，可在抓取线程和多个进程间共享。
+    - 新鲜期内：直接使用缓存，不发起网络请求
+    - 新鲜期后、最长保留时间内：携带 ETag / Last-Modified 发起条件请求重新验证
+    - 超过最长保留时间：视为不存在，重新抓取
+    """
+    
+    def __init__(self, path, fresh_seconds, max_age_seconds):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS crawl_cache (
+                    platform TEXT NOT NULL,
+                    node_type TEXT NOT NULL,
+                    keyword TEXT NOT NULL,
+                    items TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    PRIMARY KEY (platform, node_type, keyword)
+                )
+            ''')
+        self.purge_expired()
+    
+    def get(self, platform, node_type, keyword):
+        """获取缓存记录，不存在或已过期时返回None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT items, fetched_at, etag, last_modified FROM crawl_cache '
+                'WHERE platform = ? AND node_type = ? AND keyword = ?',
+                (platform, node_type, self._normalize(keyword))
+            ).fetchone()
+        
+        if row is None or time.time() - row[1] > self.max_age_seconds:
+            self.misses += 1
+            return None
+        
+        entry = CrawlCacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+        if self.is_fresh(entry):
+            self.hits += 1
+        else:
+            self.revalidations += 1
+        return entry
+    
+    def is_fresh(self, entry):
+        """缓存是否仍在新鲜期内"""
+        return entry.age() <= self.fresh_seconds
+    
+    def put(self, platform, node_type, keyword, items, etag=None, last_modified=None):
+        """写入或覆盖缓存记录"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO crawl_cache '
+                '(platform, node_type, keyword, items, fetched_at, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (platform, node_type, self._normalize(keyword),
+                 json.dumps(items, ensure_ascii=False), time.time(), etag, last_modified)
+            )
+    
+    def touch(self, platform, node_type, keyword):
+        """条件请求返回 304 时刷新抓取时间"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'UPDATE crawl_cache SET fetched_at = ? WHERE platform = ? AND node_type = ? AND keyword = ?',
+                (time.time(), platform, node_type, self._normalize(keyword))
+            )
+    
+    def purge_expired(self):
+        """删除超过最长保留时间的记录"""
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute(
+                'DELETE FROM crawl_cache WHERE fetched_at < ?',
+                (time.time() - self.max_age_seconds,)
+            ).rowcount
+        if deleted:
+            logger.info(f"清理了 {deleted} 条过期的抓取缓存")
+    
+    def stats(self):
+        """缓存命中统计"""
+        return {
+            'hits': self.hits,
+            'revalidations': self.revalidations,
+            'misses': self.misses
+        }
+    
+    @contextmanager
+    def _connect(self):
+        """打开连接，退出时提交事务并关闭连接"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _normalize(self, keyword):
+        return keyword.strip().lower()
@@ -0,0 +1,191 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+import logging
+import random
+import threading
+import time
+import requests
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CrawlCancelled(Exception):
+    """抓取任务被取消或超过整体超时"""
+
+class HostRateLimiter:
+    """
+    按主机限速的令牌桶
+    
+    同一主机两次请求之间至少间隔 min_interval 秒（外加随机抖动），
+    等待只阻塞访问该主机的线程，不影响其他主机的请求。
+    时钟和等待函数可以替换（测试中注入假时钟，不依赖真实的时间流逝）。
+    """
+    
+    def __init__(self, min_interval=1.0, jitter=0.0, burst=1, clock=time.monotonic, sleep=None):
+        """
+        Args:
+            clock: 返回当前时间（秒）的函数，acquire 的 deadline 使用同一时钟
+            sleep: 等待函数 sleep(秒数, 取消标记或None)，等待期间被取消时返回 True
+        """
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep or _wait
+        self._buckets = {}  # host -> [可用令牌数, 上次补充时间]
+        self._lock = threading.Lock()
+    
+    def acquire(self, host, cancel_event=None, deadline=None):
+        """
+        为访问 host 获取一个令牌，必要时等待
+        
+        Raises:
+            CrawlCancelled: 等待期间任务被取消或超过截止时间
+        """
+        while True:
+            with self._lock:
+                now = self.clock()
+                bucket = self._buckets.setdefault(host, [float(self.burst), now])
+                if self.min_interval > 0:
+                    bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) / self.min_interval)
+                else:
+                    bucket[0] = self.burst
+                bucket[1] = now
+                # 容许浮点误差：补充的令牌差一点点到 1 时不再等待一个极短的时间
+                if bucket[0] >= 1 - 1e-9:
+                    bucket[0] = max(0.0, bucket[0] - 1)
+                    # 抖动计入该主机的下一次请求，模拟人工访问节奏
+                    if self.jitter > 0:
+                        bucket[0] -= random.uniform(0, self.jitter) / max(self.min_interval, 1e-6)
+                    return
+                wait_seconds = (1 - bucket[0]) * self.min_interval
+            
+            if deadline is not None and self.clock() + wait_seconds > deadline:
+                raise CrawlCancelled(f"等待主机 {host} 的请求配额超过截止时间")
+            if self.sleep(wait_seconds, cancel_event):
+                raise CrawlCancelled("抓取任务已取消")
+
+def _wait(seconds, cancel_event=None):
+    """等待指定秒数，有取消标记时可被提前唤醒；返回是否被取消"""
+    if cancel_event is not None:
+        return cancel_event.wait(seconds)
+    time.sleep(seconds)
+    return False
+
+class CrawlTask:
+    """一个抓取任务：请求 url（可为空，表示无需网络请求）后交给 parser 解析"""
+    
+    def __init__(self, key, url, parser, headers=None):
+        self.key = key
+        self.url = url
+        self.parser = parser
+        self.headers = headers or {}
+
+class CrawlRun:
+    """
+    一次抓取的句柄
+    
+    每次抓取使用独立的取消标记，共享同一个引擎的多个抓取互不影响；
+    可在其他线程中调用 cancel() 取消，result() 等待完成并返回结果。
+    """
+    
+    def __init__(self, tasks, futures, executor, cancel_event, deadline):
+        self.tasks = tasks
+        self._futures = futures
+        self._executor = executor
+        self._cancel_event = cancel_event
+        self._deadline = deadline
+    
+    def cancel(self):
+        """取消本次抓取：等待配额的任务立即结束，尚未开始的任务不再执行"""
+        self._cancel_event.set()
+    
+    def cancelled(self):
+        return self._cancel_event.is_set()
+    
+    def result(self):
+        """
+        等待抓取完成
+        
+        Returns:
+            list: 与 tasks 顺序一致的 (task, 解析结果, 异常) 列表，未完成的任务异常为 CrawlCancelled
+        """
+        try:
+            timeout = max(0.0, self._deadline - time.monotonic()) if self._deadline is not None else None
+            done, not_done = wait(self._futures, timeout=timeout)
+            if not_done:
+                logger.warning(f"抓取超时，取消 {len(not_done)} 个未完成的任务")
+                self._cancel_event.set()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        
+        results = []
+        for task, future in zip(self.tasks, self._futures):
+            if future in done and not future.cancelled():
+                error = future.exception()
+                results.append((task, None if error else future.result(), error))
+            else:
+                results.append((task, None, CrawlCancelled("抓取任务未在整体超时内完成")))
+        return results
+
+class CrawlEngine:
+    """线程池并发抓取引擎，支持按主机限速、单次请求超时、整体超时与取消"""
+    
+    def __init__(self, max_workers=8, min_interval=1.0, jitter=0.0, request_timeout=10.0, headers=None,
+                 rate_limiter=None):
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.headers = headers or {}
+        self.rate_limiter = rate_limiter or HostRateLimiter(min_interval, jitter)
+        self._local = threading.local()
+    
+    def start(self, tasks, timeout=None):
+        """
+        开始并发执行抓取任务，立即返回句柄
+        
+        Args:
+            tasks: CrawlTask 列表
+            timeout: 整体超时（秒），超时后取消未完成的任务
+        
+        Returns:
+            CrawlRun: 本次抓取的句柄
+        """
+        cancel_event = threading.Event()
+        deadline = time.monotonic() + timeout if timeout else None
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tasks))),
+                                      thread_name_prefix='crawl')
+        futures = [executor.submit(self._run_task, task, cancel_event, deadline) for task in tasks]
+        return CrawlRun(tasks, futures, executor, cancel_event, deadline)
+    
+    def run(self, tasks, timeout=None):
+        """并发执行抓取任务并等待完成，返回值同 CrawlRun.result()"""
+        if not tasks:
+            return []
+        return self.start(tasks, timeout).result()
+    
+    def _run_task(self, task, cancel_event, deadline):
+        """执行单个抓取任务"""
+        if cancel_event.is_set():
+            raise CrawlCancelled("抓取任务已取消")
+        
+        response = None
+        if task.url:
+            host = urlparse(task.url).netloc
+            self.rate_limiter.acquire(host, cancel_event, deadline)
+            request_timeout = self.request_timeout
+            if deadline is not None:
+                request_timeout = max(0.1, min(request_timeout, deadline - time.monotonic()))
+            response = self._session().get(task.url, headers=task.headers, timeout=request_timeout)
+        
+        if cancel_event.is_set():
+            raise CrawlCancelled("抓取任务已取消")
+        return task.parser(response)
+    
+    def _session(self):
+        """每个线程使用独立的 requests.Session 复用连接"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
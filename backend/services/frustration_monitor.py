@@ -0,0 +1,308 @@
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from models.user_behavior import UserBehavior
+import config
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 下只运行单进程的开发服务器，不需要跨进程加锁
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 挫折信号关键词
+FRUSTRATION_KEYWORDS = ["太难了", "看不懂", "不理解", "困难", "放弃", "help", "难度大",
+                        "confused", "stuck", "不会", "问题", "错误", "失败", "卡住"]
+_FRUSTRATION_KEYWORD_SET = frozenset(FRUSTRATION_KEYWORDS)
+# 预编译的关键词匹配器，一次扫描即可判断是否包含任一关键词
+_FRUSTRATION_PATTERN = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(FRUSTRATION_KEYWORDS, key=len, reverse=True)
+))
+
+def extract_frustrated_skills(search_query):
+    """如果搜索内容包含挫折关键词，返回其中可能的技能名称，否则返回空元组"""
+    if not search_query:
+        return ()
+    text = search_query.lower()
+    if not _FRUSTRATION_PATTERN.search(text):
+        return ()
+    return tuple(word for word in text.split() if word not in _FRUSTRATION_KEYWORD_SET and len(word) > 2)
+
+class ChangeSignals:
+    """
+    跨进程的搜索行为变更通知
+
+    多个工作进程共享一个内存映射文件，按用户ID散列分槽，每槽保存最近一条带搜索内容的行为ID。
+    记录行为的进程提交后写入对应的槽，其他进程读取挫折状态时只比较槽中的值，有变化才查询数据库；
+    不同用户落在同一槽时只会多同步一次。
+    """
+
+    _SLOT = struct.Struct('<q')
+
+    def __init__(self, path, slots):
+        self.path = path
+        self.slots = slots
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        size = slots * self._SLOT.size
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def read(self, user_id):
+        """读取用户所在槽的最近行为ID"""
+        return self._SLOT.unpack_from(self._map, self._offset(user_id))[0]
+
+    def publish(self, user_id, behavior_id):
+        """写入新提交的行为ID，返回写入前槽中的值"""
+        offset = self._offset(user_id)
+        with self._lock, self._file_lock(offset):
+            previous = self._SLOT.unpack_from(self._map, offset)[0]
+            if behavior_id > previous:
+                self._SLOT.pack_into(self._map, offset, behavior_id)
+            return previous
+
+    def _offset(self, user_id):
+        return (user_id % self.slots) * self._SLOT.size
+
+    @contextmanager
+    def _file_lock(self, offset):
+        """对单个槽加跨进程的记录锁"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.lockf(self._file, fcntl.LOCK_EX, self._SLOT.size, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._file, fcntl.LOCK_UN, self._SLOT.size, offset)
+
+class _UserState:
+    """单个用户的挫折检测状态"""
+    __slots__ = ('window', 'counts', 'landmark', 'skills', 'valid_until', 'seq',
+                 'last_behavior_id', 'synced_marker')
+
+    def __init__(self, window_size, landmark):
+        self.window = deque(maxlen=window_size)  # 最近的搜索：(行为ID, 权重, 技能)
+        self.counts = {}  # 技能 -> 前向衰减计数（以 landmark 为基准）
+        self.landmark = landmark
+        self.skills = []  # 当前判定为遇到挫折的技能
+        self.valid_until = 0.0  # skills 在此时间之前无需重新计算
+        self.seq = 0  # 挫折事件序号
+        self.last_behavior_id = 0
+        self.synced_marker = 0  # 最近一次与数据库同步时变更通知槽中的值
+
+class FrustrationMonitor:
+    """
+    事件驱动的挫折检测
+
+    记录行为时增量更新每个用户最近搜索的环形缓冲区和按时间衰减的技能计数，
+    读取时直接返回已计算好的结果；检测到新的挫折技能时通知等待中的推送连接。
+    其他工作进程记录的搜索通过共享的变更通知得知，读取时不查询数据库。
+    """
+
+    # 权重指数超过该值时重新设置基准时间，避免浮点溢出
+    _MAX_EXPONENT = 40
+
+    def __init__(self):
+        self.window_size = config.FRUSTRATION_WINDOW_SIZE
+        self.half_life = config.FRUSTRATION_HALF_LIFE_HOURS * 3600
+        self.threshold = config.FRUSTRATION_THRESHOLD
+        self.max_users = config.FRUSTRATION_MAX_USERS
+        self._states = OrderedDict()  # user_id -> _UserState（LRU）
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._signals = None
+        self._signals_lock = threading.Lock()
+        self._stream_slots = threading.BoundedSemaphore(config.FRUSTRATION_STREAM_MAX_CONNECTIONS)
+
+    def observe(self, user_id, behavior_id, search_query, timestamp):
+        """记录一条新行为（在行为写入数据库之后调用）"""
+        if not search_query:
+            return
+        previous = self._get_signals().publish(user_id, behavior_id)
+        state = self._get_state(user_id)
+        with self._lock:
+            if previous <= state.synced_marker:
+                # 同步之后只有本进程写入的这一条，已在下面直接计入，不需要再查询数据库
+                state.synced_marker = max(state.synced_marker, behavior_id)
+            if behavior_id <= state.last_behavior_id:
+                return
+            self._ingest(state, behavior_id, search_query, timestamp.timestamp())
+            self._evaluate(state, time.time())
+
+    def get_frustrated_skills(self, user_id):
+        """获取用户遇到挫折的技能列表"""
+        state = self._get_state(user_id)
+        self._sync(user_id, state)
+        with self._lock:
+            now = time.time()
+            if now >= state.valid_until:
+                self._evaluate(state, now)
+            return list(state.skills)
+
+    def get_seq(self, user_id):
+        """获取用户当前的挫折事件序号"""
+        with self._lock:
+            state = self._states.get(user_id)
+            return state.seq if state else 0
+
+    def try_acquire_stream(self):
+        """占用一个推送连接（SSE / 长轮询）名额，本进程的名额已用完时返回False"""
+        return self._stream_slots.acquire(blocking=False)
+
+    def release_stream(self):
+        """释放推送连接名额"""
+        self._stream_slots.release()
+
+    def wait_for_event(self, user_id, after_seq, timeout, poll_interval=5):
+        """
+        等待序号大于 after_seq 的挫折事件
+
+        Returns:
+            tuple: (事件序号, 挫折技能列表)，超时返回None
+        """
+        deadline = time.time() + timeout
+        while True:
+            # 每个轮询周期检查一次变更通知，以获取其他进程记录的行为
+            self.get_frustrated_skills(user_id)
+            with self._condition:
+                state = self._states.get(user_id)
+                if state is not None and state.seq > after_seq:
+                    return state.seq, list(state.skills)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(remaining, poll_interval))
+                state = self._states.get(user_id)
+                if state is not None and state.seq > after_seq:
+                    return state.seq, list(state.skills)
+
+    def _get_state(self, user_id):
+        """获取用户状态，不存在时从数据库中最近的搜索记录预热"""
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is not None:
+                self._states.move_to_end(user_id)
+                return state
+
+        # 先读取变更通知再查询，查询之后提交的行为会使通知的值变大
+        marker = self._get_signals().read(user_id)
+        rows = self._fetch_recent_searches(user_id)
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is None:
+                state = _UserState(self.window_size, time.time())
+                state.synced_marker = marker
+                for behavior_id, search_query, timestamp in rows:
+                    self._ingest(state, behavior_id, search_query, timestamp.timestamp())
+                self._evaluate(state, time.time())
+                self._states[user_id] = state
+                while len(self._states) > self.max_users:
+                    self._states.popitem(last=False)
+            return state
+
+    def _sync(self, user_id, state):
+        """变更通知的值变化时，补充读取其他进程写入的搜索记录"""
+        marker = self._get_signals().read(user_id)
+        if marker <= state.synced_marker:
+            return
+        rows = self._fetch_recent_searches(user_id, after_id=state.last_behavior_id)
+        with self._lock:
+            for behavior_id, search_query, timestamp in rows:
+                if behavior_id > state.last_behavior_id:
+                    self._ingest(state, behavior_id, search_query, timestamp.timestamp())
+            self._evaluate(state, time.time())
+            state.synced_marker = max(state.synced_marker, marker)
+
+    def _get_signals(self):
+        """首次使用时打开共享的变更通知文件"""
+        with self._signals_lock:
+            if self._signals is None:
+                self._signals = ChangeSignals(config.FRUSTRATION_SIGNAL_PATH, config.FRUSTRATION_SIGNAL_SLOTS)
+            return self._signals
+
+    def _fetch_recent_searches(self, user_id, after_id=0):
+        """查询用户最近的搜索行为（按时间正序返回）"""
+        rows = UserBehavior.query.with_entities(
+            UserBehavior.id, UserBehavior.search_query, UserBehavior.timestamp
+        ).filter(
+            UserBehavior.user_id == user_id,
+            UserBehavior.id > after_id,
+            UserBehavior.search_query.isnot(None),
+            UserBehavior.search_query != ''
+        ).order_by(UserBehavior.id.desc()).limit(self.window_size).all()
+        return list(reversed(rows))
+
+    def _ingest(self, state, behavior_id, search_query, ts):
+        """将一条搜索计入环形缓冲区和技能计数（调用方需持有锁）"""
+        state.last_behavior_id = max(state.last_behavior_id, behavior_id)
+
+        if len(state.window) == state.window.maxlen:
+            # 移出最旧的搜索，并扣除其计数
+            _, old_weight, old_skills = state.window[0]
+            for skill in old_skills:
+                remaining = state.counts.get(skill, 0) - old_weight
+                if remaining > old_weight * 1e-9:
+                    state.counts[skill] = remaining
+                else:
+                    state.counts.pop(skill, None)
+
+        exponent = (ts - state.landmark) / self.half_life
+        if exponent > self._MAX_EXPONENT:
+            self._rescale(state, ts)
+            exponent = 0.0
+        weight = math.pow(2.0, exponent)
+
+        skills = extract_frustrated_skills(search_query)
+        state.window.append((behavior_id, weight, skills))
+        for skill in skills:
+            state.counts[skill] = state.counts.get(skill, 0) + weight
+
+    def _rescale(self, state, ts):
+        """将基准时间移动到 ts，并同步缩放所有权重（调用方需持有锁）"""
+        scale = math.pow(2.0, -(ts - state.landmark) / self.half_life)
+        state.window = deque(((behavior_id, weight * scale, skills) for behavior_id, weight, skills in state.window),
+                             maxlen=state.window.maxlen)
+        for skill in state.counts:
+            state.counts[skill] *= scale
+        state.landmark = ts
+
+    def _evaluate(self, state, now):
+        """重新计算挫折技能，出现新的挫折技能时发布事件（调用方需持有锁）"""
+        scale = math.pow(2.0, -(now - state.landmark) / self.half_life)
+        flagged = sorted(
+            ((skill, count) for skill, count in state.counts.items() if count * scale >= self.threshold),
+            key=lambda item: item[1], reverse=True
+        )
+        skills = [skill for skill, _ in flagged]
+
+        # 计数只会随时间衰减，最早跌破阈值的时刻之前结果保持不变
+        if flagged:
+            state.valid_until = min(
+                state.landmark + self.half_life * math.log2(count / self.threshold)
+                for _, count in flagged
+            )
+        else:
+            state.valid_until = float('inf')
+
+        if set(skills) - set(state.skills):
+            state.seq += 1
+            logger.info(f"检测到新的挫折技能: {skills}")
+            self._condition.notify_all()
+        state.skills = skills
+
+frustration_monitor = FrustrationMonitor()
@@ -0,0 +1,241 @@
+from collections import OrderedDict
+from utils.text import tokenize
+import config
+import hashlib
+import logging
+import random
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+def _token_hash(token):
+    """词语的稳定哈希（不受 PYTHONHASHSEED 影响，各进程一致）"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def goal_constraints(goal):
+    """学习目标中的约束：(基础水平, 预算金额, 学习时长小时数)，未提及的预算和时长为None；约束不同的目标不复用路径"""
+    from services.path_planner import parse_budget, parse_duration_hours, parse_goal
+    info = parse_goal(goal or '', ())
+    return info['level'], parse_budget(info['budget']), parse_duration_hours(info['duration'])
+
+def jaccard(a, b):
+    """两个词语集合的 Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class GoalSimilarityIndex:
+    """
+    学习目标近似重复检测：MinHash + LSH
+    
+    目标经分词后得到词语集合，计算 MinHash 签名并按 band 分桶；查询时取同桶的历史目标为候选，
+    再用精确的 Jaccard 相似度校验，超过阈值的最相似目标即为命中。
+    例如 "我想学Python做数据分析" 与 "学习用python进行数据分析" 分词后的词语基本重合，可以复用同一条学习路径。
+    条目数超过上限时淘汰最早加入的条目。
+    """
+    
+    def __init__(self, num_perm=None, bands=None, threshold=None, seed=1, max_entries=None):
+        self.num_perm = num_perm or config.GOAL_MINHASH_PERMUTATIONS
+        self.bands = bands or config.GOAL_LSH_BANDS
+        if self.num_perm % self.bands:
+            raise ValueError('num_perm 必须是 bands 的整数倍')
+        self.rows = self.num_perm // self.bands
+        self.threshold = threshold if threshold is not None else config.GOAL_SIMILARITY_THRESHOLD
+        self.max_entries = max_entries or config.GOAL_INDEX_MAX_ENTRIES
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(self.num_perm)]
+        self._buckets = [{} for _ in range(self.bands)]  # band -> {签名片段: [条目ID]}
+        self._tokens = OrderedDict()  # 条目ID -> 词语集合（按加入顺序）
+        self._lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self._tokens)
+    
+    def signature(self, tokens):
+        """词语集合的 MinHash 签名"""
+        hashes = [_token_hash(token) for token in tokens]
+        return [min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms]
+    
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+    
+    def add(self, entry_id, goal):
+        """加入一个历史目标，返回是否加入（没有有效词语的目标不加入）"""
+        tokens = frozenset(tokenize(goal))
+        if not tokens:
+            return False
+        with self._lock:
+            if entry_id in self._tokens:
+                return False
+            self._tokens[entry_id] = tokens
+            for band, key in enumerate(self._band_keys(self.signature(tokens))):
+                self._buckets[band].setdefault(key, []).append(entry_id)
+            while len(self._tokens) > self.max_entries:
+                self.remove(next(iter(self._tokens)))
+        return True
+    
+    def remove(self, entry_id):
+        """移除一个条目，返回是否存在"""
+        with self._lock:
+            tokens = self._tokens.pop(entry_id, None)
+            if tokens is None:
+                return False
+            for band, key in enumerate(self._band_keys(self.signature(tokens))):
+                bucket = self._buckets[band].get(key)
+                if bucket is None:
+                    continue
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        return True
+    
+    def query(self, goal, threshold=None):
+        """
+        查找与学习目标最相似的历史目标
+        
+        Returns:
+            tuple: (条目ID, 相似度)，没有超过阈值的目标时返回 (None, 最高相似度)
+        """
+        scored = self._score(goal)
+        if not scored:
+            return None, 0.0
+        # 相似度相同时取最新的条目
+        similarity, entry_id = max(scored)
+        if similarity >= (self.threshold if threshold is None else threshold):
+            return entry_id, similarity
+        return None, similarity
+    
+    def matches(self, goal, threshold=None):
+        """
+        超过阈值的全部历史目标，按相似度从高到低（相同时新条目在前）排列
+        
+        Returns:
+            list: [(条目ID, 相似度)]
+        """
+        threshold = self.threshold if threshold is None else threshold
+        scored = sorted(self._score(goal), reverse=True)
+        return [(entry_id, similarity) for similarity, entry_id in scored if similarity >= threshold]
+    
+    def _score(self, goal):
+        """同桶候选及其 Jaccard 相似度：[(相似度, 条目ID)]"""
+        tokens = frozenset(tokenize(goal))
+        if not tokens:
+            return []
+        keys = self._band_keys(self.signature(tokens))
+        candidates = set()
+        with self._lock:
+            for band, key in enumerate(keys):
+                candidates.update(self._buckets[band].get(key, ()))
+            return [(jaccard(tokens, self._tokens[entry_id]), entry_id) for entry_id in candidates]
+
+class StoredGoalIndex:
+    """
+    基于 learning_paths 表的近似目标索引
+    
+    只索引可复用的路径（按目标生成、未经个性化调整），首次查询时加载最近的历史目标（不超过索引上限），
+    之后按自增ID增量读取新保存的路径（包括其他工作进程保存的），命中时返回已保存的学习路径数据。
+    命中的路径已被删除或改为个性化路径时从索引中移除。词语相近但基础水平、预算或学习时间不同的目标
+    （如 "预算0元" 与 "预算500元"）不复用，继续检查下一个近似目标。需要在应用上下文中调用。
+    """
+    
+    MAX_CANDIDATES = 5  # 每次查询最多检查的近似目标数
+    
+    def __init__(self, index=None, refresh_interval=None):
+        self.index = index or GoalSimilarityIndex()
+        self.refresh_interval = config.GOAL_INDEX_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        self._max_id = 0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'hits': 0, 'misses': 0, 'similarity_sum': 0.0}
+    
+    def refresh(self, force=False):
+        """读取上次之后新保存的学习路径目标"""
+        from models.learning_path import LearningPath
+        now = time.time()
+        if not force and now - self._refreshed_at < self.refresh_interval:
+            return 0
+        with self._lock:
+            # 只取最新的 max_entries 条，更早的加入后也会立即被淘汰
+            rows = (LearningPath.query.with_entities(LearningPath.id, LearningPath.goal)
+                    .filter(LearningPath.id > self._max_id, LearningPath.reusable.is_(True))
+                    .order_by(LearningPath.id.desc()).limit(self.index.max_entries).all())
+            added = 0
+            for path_id, goal in reversed(rows):
+                added += self.index.add(path_id, goal or '')
+                self._max_id = max(self._max_id, path_id)
+            self._refreshed_at = now
+        if added:
+            logger.info(f"近似目标索引新增 {added} 个目标，共 {len(self.index)} 个")
+        return added
+    
+    def add(self, path_id, goal):
+        """登记刚保存的可复用学习路径"""
+        self.index.add(path_id, goal or '')
+    
+    def remove(self, path_id):
+        """学习路径不再可复用（如替换为个性化的备选路径）时移除"""
+        self.index.remove(path_id)
+    
+    def find(self, goal):
+        """
+        查找近似目标对应的已保存学习路径
+        
+        Returns:
+            tuple: (学习路径数据, 学习路径ID, 相似度)，未命中时返回 (None, None, 最高相似度)
+        """
+        from models.learning_path import LearningPath
+        self.refresh()
+        path_data = path_id = None
+        constraints = goal_constraints(goal)
+        for candidate_id, similarity in self.index.matches(goal)[:self.MAX_CANDIDATES]:
+            path = LearningPath.query.get(candidate_id)
+            if path is None or not path.reusable:
+                self.index.remove(candidate_id)
+                continue
+            if goal_constraints(path.goal) != constraints:
+                continue
+            path_data = path.get_path_data()
+            path_id = candidate_id
+            break
+        if not path_data:
+            # 未命中时返回最高相似度（可能低于阈值，或约束不同）
+            similarity = self.index.query(goal, threshold=2.0)[1]
+        with self._lock:
+            self._stats['lookups'] += 1
+            if path_data:
+                self._stats['hits'] += 1
+                self._stats['similarity_sum'] += similarity
+            else:
+                self._stats['misses'] += 1
+        if not path_data:
+            return None, None, similarity
+        return path_data, path_id, similarity
+    
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        similarity_sum = stats.pop('similarity_sum')
+        stats['hit_rate'] = round(stats['hits'] / stats['lookups'], 4) if stats['lookups'] else 0.0
+        stats['avg_hit_similarity'] = round(similarity_sum / stats['hits'], 4) if stats['hits'] else 0.0
+        stats['indexed_goals'] = len(self.index)
+        stats['threshold'] = self.index.threshold
+        return stats
+
+_stored_index = None
+_stored_index_lock = threading.Lock()
+
+def get_goal_index():
+    """进程内共享的近似目标索引"""
+    global _stored_index
+    with _stored_index_lock:
+        if _stored_index is None:
+            _stored_index = StoredGoalIndex()
+        return _stored_index
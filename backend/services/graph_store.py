@@ -0,0 +1,650 @@
+from array import array
+from contextlib import contextmanager
+import heapq
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from services.knowledge_graph import KnowledgeGraph, get_shared_graph
+import config
+
+try:
+    import fcntl
+except ImportError:  # Windows 下只运行单进程的开发服务器，不需要跨进程加锁
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 文件格式：魔数 + 头部长度 + JSON头部（分类字典、各列的偏移/类型/长度）+ 按8字节对齐的列数据
+MAGIC = b'EKG\x01'
+_PREAMBLE = struct.Struct('<4sI')
+_ALIGN = 8
+
+# 字符串列：UTF-8 拼接存储，配合 n+1 个偏移量
+STRING_COLUMNS = ('id', 'title', 'description', 'url')
+# 分类列：节点上只保存编码，取值表保存在头部
+CATEGORY_COLUMNS = (('type', 'B'), ('difficulty', 'B'), ('platform', 'H'))
+RELATIONS = ('prerequisite', 'complementary')
+
+class CompactGraph:
+    """
+    列式存储、可内存映射的只读知识图谱
+    
+    - 类型、难度、平台为分类编码，价格、评分为 float32 数组
+    - 每种关系以 CSR（indptr + indices）保存出边和入边
+    - 技能 -> 节点同样以 CSR 保存
+    - 节点ID按字典序另存一份排列，按ID查找为二分查找，加载时无需构建字典
+    
+    通过 load_graph_store 加载时各列直接指向内存映射的文件，多个工作进程共享同一份物理内存。
+    """
+    
+    def __init__(self, header, buffer, mapped=None):
+        self.header = header
+        self._mapped = mapped
+        self.node_count = header['node_count']
+        self.categories = header['categories']
+        self.skill_names = header['skills']
+        self._skill_index = {skill: i for i, skill in enumerate(self.skill_names)}
+        self._category_index = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self.categories.items()
+        }
+        
+        view = memoryview(buffer)
+        self.columns = {}
+        for name, (offset, typecode, length) in header['sections'].items():
+            size = length * array(typecode).itemsize
+            self.columns[name] = view[offset:offset + size].cast(typecode)
+    
+    # ---- 节点 ----
+    
+    def __len__(self):
+        return self.node_count
+    
+    def edge_count(self, relation=None):
+        """边数量，relation 为空时返回所有关系的边数之和"""
+        relations = [relation] if relation else RELATIONS
+        return sum(len(self.columns[f'{rel}_out_indices']) for rel in relations)
+    
+    def string(self, column, index):
+        """读取第 index 个节点的字符串列"""
+        offsets = self.columns[f'{column}_offsets']
+        return bytes(self.columns[f'{column}_data'][offsets[index]:offsets[index + 1]]).decode('utf-8')
+    
+    def category(self, column, index):
+        """读取第 index 个节点的分类列取值"""
+        return self.categories[column][self.columns[column][index]]
+    
+    def node_at(self, index):
+        """按下标读取节点，返回与 KnowledgeGraph 相同结构的字典"""
+        return {
+            'id': self.string('id', index),
+            'type': self.category('type', index),
+            'title': self.string('title', index),
+            'description': self.string('description', index),
+            'difficulty': self.category('difficulty', index),
+            'price': _round_float(self.columns['price'][index]),
+            'platform': self.category('platform', index),
+            'url': self.string('url', index),
+            'rating': _round_float(self.columns['rating'][index])
+        }
+    
+    def index_of(self, node_id):
+        """按节点ID查找下标（二分查找），不存在时返回None"""
+        target = node_id.encode('utf-8')
+        order = self.columns['id_order']
+        offsets = self.columns['id_offsets']
+        data = self.columns['id_data']
+        low, high = 0, len(order)
+        while low < high:
+            mid = (low + high) // 2
+            index = order[mid]
+            value = bytes(data[offsets[index]:offsets[index + 1]])
+            if value < target:
+                low = mid + 1
+            elif value > target:
+                high = mid
+            else:
+                return index
+        return None
+    
+    def get_node(self, node_id):
+        """按ID获取节点"""
+        index = self.index_of(node_id)
+        return self.node_at(index) if index is not None else None
+    
+    def iter_nodes(self):
+        """遍历所有节点"""
+        for index in range(self.node_count):
+            yield self.node_at(index)
+    
+    # ---- 关系 ----
+    
+    def successor_indices(self, index, relation):
+        """出边邻居的下标（内存视图，不复制）"""
+        indptr = self.columns[f'{relation}_out_indptr']
+        return self.columns[f'{relation}_out_indices'][indptr[index]:indptr[index + 1]]
+    
+    def predecessor_indices(self, index, relation):
+        """入边邻居的下标（内存视图，不复制）"""
+        indptr = self.columns[f'{relation}_in_indptr']
+        return self.columns[f'{relation}_in_indices'][indptr[index]:indptr[index + 1]]
+    
+    def successors(self, node_id, relation):
+        """获取节点在某种关系下的后继节点ID"""
+        index = self.index_of(node_id)
+        if index is None:
+            return set()
+        return {self.string('id', other) for other in self.successor_indices(index, relation)}
+    
+    def predecessors(self, node_id, relation):
+        """获取节点在某种关系下的前驱节点ID"""
+        index = self.index_of(node_id)
+        if index is None:
+            return set()
+        return {self.string('id', other) for other in self.predecessor_indices(index, relation)}
+    
+    def iter_edges(self):
+        """遍历所有边"""
+        for relation in RELATIONS:
+            indptr = self.columns[f'{relation}_out_indptr']
+            indices = self.columns[f'{relation}_out_indices']
+            for source in range(self.node_count):
+                start, end = indptr[source], indptr[source + 1]
+                if start == end:
+                    continue
+                source_id = self.string('id', source)
+                for position in range(start, end):
+                    yield {'source': source_id, 'target': self.string('id', indices[position]), 'relation': relation}
+    
+    # ---- 技能 ----
+    
+    def skills(self):
+        """获取所有技能"""
+        return list(self.skill_names)
+    
+    def skill_indices(self, skill, difficulty=None, node_type=None):
+        """获取某个技能下的节点下标，可按难度或类型过滤"""
+        skill_index = self._skill_index.get(str(skill).strip().lower())
+        if skill_index is None:
+            return []
+        indptr = self.columns['skill_indptr']
+        indices = self.columns['skill_nodes'][indptr[skill_index]:indptr[skill_index + 1]]
+        if difficulty is None and node_type is None:
+            return list(indices)
+        
+        difficulty_code = self._category_index['difficulty'].get(difficulty) if difficulty is not None else None
+        type_code = self._category_index['type'].get(node_type) if node_type is not None else None
+        if (difficulty is not None and difficulty_code is None) or (node_type is not None and type_code is None):
+            return []
+        difficulties = self.columns['difficulty']
+        types = self.columns['type']
+        return [index for index in indices
+                if (difficulty_code is None or difficulties[index] == difficulty_code)
+                and (type_code is None or types[index] == type_code)]
+    
+    def nodes_for_skill(self, skill, difficulty=None, node_type=None):
+        """获取某个技能下的节点ID，可按难度或类型过滤"""
+        return {self.string('id', index) for index in self.skill_indices(skill, difficulty, node_type)}
+    
+    def node_skills(self):
+        """节点下标 -> 技能列表"""
+        result = {}
+        indptr = self.columns['skill_indptr']
+        nodes = self.columns['skill_nodes']
+        for skill_index, skill in enumerate(self.skill_names):
+            for position in range(indptr[skill_index], indptr[skill_index + 1]):
+                result.setdefault(nodes[position], []).append(skill)
+        return result
+    
+    def close(self):
+        """释放内存映射（之后不能再访问各列）"""
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+def _round_float(value):
+    """float32 还原为便于展示的数值（整数价格保持为整数）"""
+    value = float(f'{value:.6g}')
+    return int(value) if value.is_integer() else value
+
+def _build_csr(node_count, pairs):
+    """由 (行, 列) 对构建 CSR 的 indptr 与 indices"""
+    counts = [0] * (node_count + 1)
+    for row, _ in pairs:
+        counts[row + 1] += 1
+    for i in range(node_count):
+        counts[i + 1] += counts[i]
+    indptr = array('I', counts)
+    indices = array('I', bytes(4 * len(pairs)))
+    cursor = list(counts[:-1])
+    for row, column in pairs:
+        indices[cursor[row]] = column
+        cursor[row] += 1
+    return indptr, indices
+
+def build_columns(graph):
+    """
+    将 KnowledgeGraph 转换为列式数据
+    
+    Returns:
+        tuple: (分类字典, 技能列表, {列名: array})
+    """
+    with graph._lock:
+        node_ids = list(graph.nodes)
+        nodes = [graph.nodes[node_id] for node_id in node_ids]
+        positions = {node_id: i for i, node_id in enumerate(node_ids)}
+        node_count = len(node_ids)
+        
+        categories = {name: [] for name, _ in CATEGORY_COLUMNS}
+        codes = {name: {} for name, _ in CATEGORY_COLUMNS}
+        columns = {}
+        for name, typecode in CATEGORY_COLUMNS:
+            column = array(typecode)
+            for node in nodes:
+                value = node.get(name) or ''
+                code = codes[name].get(value)
+                if code is None:
+                    code = codes[name][value] = len(categories[name])
+                    categories[name].append(value)
+                column.append(code)
+            columns[name] = column
+        
+        columns['price'] = array('f', (float(node.get('price') or 0) for node in nodes))
+        columns['rating'] = array('f', (float(node.get('rating') or 0) for node in nodes))
+        
+        for name in STRING_COLUMNS:
+            offsets = array('I', [0])
+            data = bytearray()
+            for node in nodes:
+                data += (node.get(name) or '').encode('utf-8')
+                offsets.append(len(data))
+            columns[f'{name}_offsets'] = offsets
+            columns[f'{name}_data'] = array('B', data)
+        columns['id_order'] = array('I', sorted(range(node_count), key=lambda i: node_ids[i].encode('utf-8')))
+        
+        for relation in RELATIONS:
+            pairs = [(positions[source], positions[target])
+                     for source, targets in graph.out_edges[relation].items() if source in positions
+                     for target in targets if target in positions]
+            pairs.sort()
+            columns[f'{relation}_out_indptr'], columns[f'{relation}_out_indices'] = _build_csr(node_count, pairs)
+            reverse = sorted((target, source) for source, target in pairs)
+            columns[f'{relation}_in_indptr'], columns[f'{relation}_in_indices'] = _build_csr(node_count, reverse)
+        
+        skills = sorted({skill for node_skills in graph.node_skills.values() for skill in node_skills})
+        skill_positions = {skill: i for i, skill in enumerate(skills)}
+        pairs = sorted((skill_positions[skill], positions[node_id])
+                       for node_id, node_skills in graph.node_skills.items() if node_id in positions
+                       for skill in node_skills)
+        columns['skill_indptr'], columns['skill_nodes'] = _build_csr(len(skills), pairs)
+    
+    return categories, skills, columns
+
+def write_graph_store(graph, path):
+    """
+    将知识图谱写入列式存储文件
+    
+    先写临时文件再原子替换，已映射旧文件的进程不受影响，下次检查时加载新文件。
+    """
+    return write_columns(*build_columns(graph), path)
+
+def write_columns(categories, skills, columns, path):
+    """将列式数据（build_columns / merge_delta_columns 的结果）写入文件"""
+    sections = {}
+    layout = []
+    offset = 0
+    for name, column in columns.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        sections[name] = [offset, column.typecode, len(column)]
+        layout.append((offset, column))
+        offset += len(column) * column.itemsize
+    
+    header = json.dumps({
+        'node_count': len(columns['type']),
+        'categories': categories,
+        'skills': skills,
+        'sections': sections
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    data_start = -(-(_PREAMBLE.size + len(header)) // _ALIGN) * _ALIGN
+    
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        for section_offset, column in layout:
+            f.seek(data_start + section_offset)
+            column.tofile(f)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    logger.info(f"知识图谱已写入 {path}：{len(columns['type'])} 个节点")
+    return path
+
+def _copy_column(store, name):
+    """复制内存映射的列（之后可以修改，关闭映射后仍然有效）"""
+    view = store.columns[name]
+    column = array(view.format)
+    column.frombytes(view.tobytes())
+    return column
+
+def merge_delta_columns(store, delta):
+    """
+    将增量图谱并入列式存储，返回新的 (分类字典, 技能列表, {列名: array})，不重建整个字典图谱
+    
+    只有增量节点所属技能桶内的已有节点（以及增量的边涉及的已有节点）载入临时的字典图谱，在其中并入增量，
+    由 KnowledgeGraph 按技能桶推导关系、处理难度变化；其余节点的属性、边和技能按下标整段复制原有的列。
+    已有节点保持原下标，新节点追加在末尾。旧版本文件中的节点ID不是由资源派生的，无法与增量对应，
+    此时抛出 ValueError，由调用方改为完整重建。
+    """
+    node_count = len(store)
+    stored_skills = store.node_skills()
+    with delta._lock:
+        delta_ids = set(delta.nodes)
+        endpoints = {node_id for edge in delta.iter_edges() for node_id in (edge['source'], edge['target'])}
+        affected_skills = set().union(*(delta.node_skills.get(node_id, ()) for node_id in delta_ids))
+    
+    # 受影响的已有节点：增量中的节点和边端点，以及受影响技能桶内的全部节点
+    affected = set()
+    for node_id in delta_ids | endpoints:
+        index = store.index_of(node_id)
+        if index is not None:
+            affected.add(index)
+            if node_id in delta_ids:
+                affected_skills.update(stored_skills.get(index, ()))
+    for skill in affected_skills:
+        affected.update(store.skill_indices(skill))
+    
+    partial = KnowledgeGraph()
+    positions = {}  # 节点ID -> 合并后的下标
+    for index in sorted(affected):
+        node = store.node_at(index)
+        for skill in stored_skills.get(index) or [None]:
+            node_id = partial.add_node(node['type'], node, skill=skill)
+        if node_id != node['id']:
+            raise ValueError('列式文件中的节点ID不是由资源派生的，需要完整重建')
+        positions[node_id] = index
+    for relation in RELATIONS:
+        for index in affected:
+            for other in store.successor_indices(index, relation):
+                if other in affected:
+                    partial.add_edge(store.string('id', index), store.string('id', other), relation)
+    partial.merge_graph(delta)
+    
+    new_ids = [node_id for node_id in partial.nodes if node_id not in positions]
+    for offset, node_id in enumerate(new_ids):
+        positions[node_id] = node_count + offset
+    total = node_count + len(new_ids)
+    changed = {index: partial.nodes[store.string('id', index)] for index in affected}
+    changed.update((positions[node_id], partial.nodes[node_id]) for node_id in new_ids)
+    
+    # 节点属性：复制原有的列，改写受影响的节点，追加新节点
+    categories = {name: list(values) for name, values in store.categories.items()}
+    columns = {}
+    for name, _ in CATEGORY_COLUMNS:
+        codes = {value: code for code, value in enumerate(categories[name])}
+        column = _copy_column(store, name)
+        column.extend([0] * len(new_ids))
+        for index, node in changed.items():
+            value = node.get(name) or ''
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(categories[name])
+                categories[name].append(value)
+            column[index] = code
+        columns[name] = column
+    for name in ('price', 'rating'):
+        column = _copy_column(store, name)
+        column.extend([0.0] * len(new_ids))
+        for index, node in changed.items():
+            column[index] = float(node.get(name) or 0)
+        columns[name] = column
+    
+    # 字符串列：相邻的未变化节点整段复制
+    for name in STRING_COLUMNS:
+        old_offsets = store.columns[f'{name}_offsets']
+        old_data = store.columns[f'{name}_data']
+        offsets = array('I', [0])
+        data = bytearray()
+        start = 0
+        for index in sorted(changed):
+            end = min(index, node_count)
+            if start < end:
+                shift = len(data) - old_offsets[start]
+                data += old_data[old_offsets[start]:old_offsets[end]]
+                offsets.extend(offset + shift for offset in old_offsets[start + 1:end + 1])
+            data += (changed[index].get(name) or '').encode('utf-8')
+            offsets.append(len(data))
+            start = index + 1
+        if start < node_count:
+            shift = len(data) - old_offsets[start]
+            data += old_data[old_offsets[start]:old_offsets[node_count]]
+            offsets.extend(offset + shift for offset in old_offsets[start + 1:node_count + 1])
+        columns[f'{name}_offsets'] = offsets
+        columns[f'{name}_data'] = array('B', data)
+    
+    id_offsets = columns['id_offsets']
+    id_data = columns['id_data']
+    id_bytes = lambda index: id_data[id_offsets[index]:id_offsets[index + 1]].tobytes()
+    new_order = sorted(range(node_count, total), key=id_bytes)
+    columns['id_order'] = array('I', heapq.merge(store.columns['id_order'], new_order, key=id_bytes))
+    
+    # 关系：未受影响节点的邻接表整段复制，受影响节点保留与未受影响节点之间的原有边，其余取自临时图谱
+    for relation in RELATIONS:
+        for direction, neighbours in (('out', partial.successors), ('in', partial.predecessors)):
+            old_indptr = store.columns[f'{relation}_{direction}_indptr']
+            old_indices = store.columns[f'{relation}_{direction}_indices']
+            indptr = array('I', [0])
+            indices = array('I')
+            for index in range(total):
+                node = changed.get(index)
+                if node is None:
+                    indices.frombytes(old_indices[old_indptr[index]:old_indptr[index + 1]].tobytes())
+                else:
+                    kept = [] if index >= node_count else [
+                        other for other in old_indices[old_indptr[index]:old_indptr[index + 1]] if other not in affected]
+                    indices.extend(sorted(kept + [positions[other] for other in neighbours(node['id'], relation)]))
+                indptr.append(len(indices))
+            columns[f'{relation}_{direction}_indptr'] = indptr
+            columns[f'{relation}_{direction}_indices'] = indices
+    
+    # 技能：受影响的技能取临时图谱中的完整成员，其余复制原有成员
+    skills = sorted(set(store.skill_names) | affected_skills)
+    old_indptr = store.columns['skill_indptr']
+    old_nodes = store.columns['skill_nodes']
+    skill_indptr = array('I', [0])
+    skill_nodes = array('I')
+    for skill in skills:
+        if skill in affected_skills:
+            skill_nodes.extend(sorted(positions[node_id] for node_id in partial.nodes_for_skill(skill)))
+        else:
+            old = store._skill_index[skill]
+            skill_nodes.frombytes(old_nodes[old_indptr[old]:old_indptr[old + 1]].tobytes())
+        skill_indptr.append(len(skill_nodes))
+    columns['skill_indptr'] = skill_indptr
+    columns['skill_nodes'] = skill_nodes
+    return categories, skills, columns
+
+def load_graph_store(path):
+    """以只读内存映射方式加载列式存储文件"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"知识图谱文件为空: {path}")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, header_length = _PREAMBLE.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        mapped.close()
+        raise ValueError(f"无法识别的知识图谱文件: {path}")
+    header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_length].decode('utf-8'))
+    data_start = -(-(_PREAMBLE.size + header_length) // _ALIGN) * _ALIGN
+    return CompactGraph(header, memoryview(mapped)[data_start:], mapped)
+
+def write_graph_json(graph, fp, chunk_size=1000):
+    """
+    流式导出 {'nodes': [...], 'edges': [...]} 格式的JSON，不在内存中构建完整结构
+    
+    graph 可以是 KnowledgeGraph 或 CompactGraph。
+    """
+    def write_items(items):
+        buffer = []
+        first = True
+        for item in items:
+            buffer.append(('\n    ' if first else ',\n    ') + json.dumps(item, ensure_ascii=False))
+            first = False
+            if len(buffer) >= chunk_size:
+                fp.write(''.join(buffer))
+                buffer = []
+        if buffer:
+            fp.write(''.join(buffer))
+        fp.write('\n  ' if not first else '')
+    
+    fp.write('{\n  "nodes": [')
+    write_items(graph.iter_nodes())
+    fp.write('],\n  "edges": [')
+    write_items(graph.iter_edges())
+    fp.write(']\n}\n')
+
+_store = None
+_store_mtime = None
+_store_lock = threading.Lock()
+
+def get_graph_store(path=None):
+    """
+    获取进程内的列式知识图谱（文件更新后自动重新映射），文件不存在时返回None
+    """
+    global _store, _store_mtime
+    path = path or config.KNOWLEDGE_GRAPH_STORE_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if _store is not None and mtime == _store_mtime:
+        return _store
+    with _store_lock:
+        if _store is None or mtime != _store_mtime:
+            try:
+                _store = load_graph_store(path)
+                _store_mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.error(f"加载知识图谱文件失败: {str(e)}")
+                return _store
+    return _store
+
+def get_query_graph():
+    """
+    获取用于查询的知识图谱：优先使用多进程共享的列式文件，不存在时退回到进程内的图谱
+    """
+    store = get_graph_store()
+    if store is not None and len(store):
+        return store
+    return get_shared_graph()
+
+_persist_state = {'at': 0.0}
+_persist_lock = threading.Lock()
+_schedule_state = {'running': False, 'pending': False}
+_schedule_lock = threading.Lock()
+
+@contextmanager
+def _store_file_lock(path):
+    """持久化期间对列式文件加跨进程锁，避免两个进程基于同一份旧文件各自写入而互相覆盖"""
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def persist_graph(graph, path=None, force=False):
+    """
+    将进程内图谱中的增量并入共享的列式文件
+    
+    查询统一使用内存映射的列式文件，各进程内的图谱只保存上次持久化之后新爬取的节点和边。写入时持有
+    跨进程的文件锁：读取最新的文件、按列并入增量（merge_delta_columns，不重建整个图谱）、原子替换，
+    成功后增量从进程内图谱中清空。距上次写入不足 KNOWLEDGE_GRAPH_PERSIST_INTERVAL 秒或没有增量时跳过
+    （force=True 时立即写入）。请求中应使用 schedule_persist 在后台线程中持久化。
+    
+    Returns:
+        bool: 是否写入了文件
+    """
+    path = path or config.KNOWLEDGE_GRAPH_STORE_PATH
+    with _persist_lock:
+        now = time.time()
+        if not force and now - _persist_state['at'] < config.KNOWLEDGE_GRAPH_PERSIST_INTERVAL:
+            return False
+        
+        delta = graph.take()
+        if not delta.nodes and not delta.edge_count:
+            return False
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            with _store_file_lock(path):
+                # 直接读取磁盘上的最新文件，不使用本进程可能尚未重新映射的缓存
+                if os.path.exists(path):
+                    store = load_graph_store(path)
+                    try:
+                        merged = _merge_into_store(store, delta)
+                    finally:
+                        store.close()
+                else:
+                    merged = build_columns(delta)
+                write_columns(*merged, path)
+        except Exception:
+            # 写入失败时放回增量，下次持久化时重试
+            graph.merge_graph(delta)
+            raise
+        _persist_state['at'] = now
+        return True
+
+def _merge_into_store(store, delta):
+    """按列并入增量，旧版本文件无法按ID对应时退回到完整重建"""
+    try:
+        return merge_delta_columns(store, delta)
+    except ValueError as e:
+        logger.warning(f"{str(e)}，按完整图谱重新写入")
+    full = KnowledgeGraph()
+    full.merge_store(store)
+    full.merge_graph(delta)
+    return build_columns(full)
+
+def schedule_persist(graph, path=None):
+    """
+    在后台线程中持久化增量，不阻塞请求；同一时间只有一个持久化线程，期间的新请求在其结束后再写入一次
+    
+    两次写入之间至少间隔 KNOWLEDGE_GRAPH_PERSIST_INTERVAL 秒，间隔内的增量合并到下一次写入。
+    """
+    with _schedule_lock:
+        if _schedule_state['running']:
+            _schedule_state['pending'] = True
+            return
+        _schedule_state['running'] = True
+        _schedule_state['pending'] = False
+    threading.Thread(target=_persist_worker, args=(graph, path), name='graph-persist', daemon=True).start()
+
+def _persist_worker(graph, path):
+    while True:
+        wait = _persist_state['at'] + config.KNOWLEDGE_GRAPH_PERSIST_INTERVAL - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            persist_graph(graph, path, force=True)
+        except Exception as e:
+            logger.error(f"持久化知识图谱失败: {str(e)}")
+        with _schedule_lock:
+            if not _schedule_state['pending']:
+                _schedule_state['running'] = False
+                return
+            _schedule_state['pending'] = False
@@ -1,22 +1,39 @@
 import requests
 from bs4 import BeautifulSoup
-import json
-import time
+from functools import partial
+from services.crawl_engine import CrawlEngine, CrawlTask, HostRateLimiter
+from services.crawl_cache import CrawlCache
+from services.knowledge_graph import get_shared_graph
+from services.graph_store import persist_graph, schedule_persist, write_graph_json
+import config
 import random
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 进程内共享的主机限速器，多个爬虫实例访问同一平台时也遵守最小间隔
+_host_rate_limiter = HostRateLimiter(config.CRAWLER_HOST_MIN_INTERVAL, config.CRAWLER_HOST_JITTER)
+_crawl_cache = None
+
+def get_crawl_cache():
+    """获取进程内共享的抓取结果缓存（首次使用时创建）"""
+    global _crawl_cache
+    if _crawl_cache is None:
+        _crawl_cache = CrawlCache(
+            config.CRAWL_CACHE_PATH,
+            config.CRAWL_CACHE_FRESH_SECONDS,
+            config.CRAWL_CACHE_MAX_AGE_SECONDS
+        )
+    return _crawl_cache
+
 class KnowledgeCrawler:
-    def __init__(self):
+    def __init__(self, cache=None, graph=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
         }
-        self.knowledge_graph = {
-            'nodes': [],  # 存储课程、技能、领域、工具、书籍等节点
-            'edges': [],  # 存储节点之间的关系
-        }
+        # 带索引的知识图谱：存储课程、书籍等节点及节点之间的关系，默认使用进程内共享的图谱
+        self.graph = graph or get_shared_graph()
         self.course_platforms = [
             {'name': '得到', 'url': 'https://www.dedao.cn/'},
             {'name': '极客时间', 'url': 'https://time.geekbang.org/'},
@@ -31,127 +48,177 @@ class KnowledgeCrawler:
             {'name': '京东读书', 'url': 'https://book.jd.com/'},
             {'name': '当当网', 'url': 'http://book.dangdang.com/'}
         ]
+        # 并发抓取引擎：不同平台并发请求，同一平台按最小间隔限速
+        self.fetch_pages = config.CRAWLER_FETCH_PAGES
+        self.engine = CrawlEngine(
+            max_workers=config.CRAWLER_MAX_WORKERS,
+            request_timeout=config.CRAWLER_REQUEST_TIMEOUT,
+            headers=self.headers,
+            rate_limiter=_host_rate_limiter
+        )
+        # 持久化的抓取结果缓存，热门技能无需重复抓取
+        self.cache = cache or get_crawl_cache()
     
     def crawl_courses(self, keyword, platform=None):
         """爬取特定关键词的课程信息"""
         logger.info(f"开始爬取关键词 '{keyword}' 的课程信息")
         
-        courses = []
         platforms = [platform] if platform else self.course_platforms
-        
-        for platform in platforms:
-            try:
-                logger.info(f"从 {platform['name']} 爬取课程")
-                
-                # 这里应该是具体的爬虫逻辑，根据不同平台实现不同的爬取方式
-                # 为了演示，我们使用模拟数据
-                if platform['name'] == '极客时间':
-                    courses.extend(self._mock_geektime_courses(keyword))
-                elif platform['name'] == 'B站':
-                    courses.extend(self._mock_bilibili_courses(keyword))
-                else:
-                    courses.extend(self._mock_general_courses(keyword, platform['name']))
-                
-                # 随机延时，避免请求过于频繁
-                time.sleep(random.uniform(1, 3))
-                
-            except Exception as e:
-                logger.error(f"爬取 {platform['name']} 课程时出错: {str(e)}")
-        
-        # 将爬取的课程添加到知识图谱
-        for course in courses:
-            self._add_node('course', course)
-        
-        return courses
+        return self._crawl([('course', keyword, platform) for platform in platforms])
     
     def crawl_books(self, keyword, platform=None):
         """爬取特定关键词的书籍信息"""
         logger.info(f"开始爬取关键词 '{keyword}' 的书籍信息")
         
-        books = []
         platforms = [platform] if platform else self.book_platforms
+        return self._crawl([('book', keyword, platform) for platform in platforms])
+    
+    def crawl_skills(self, skills):
+        """一次性并发爬取多个技能的课程和书籍信息"""
+        logger.info(f"开始爬取技能 {skills} 的课程和书籍信息")
         
-        for platform in platforms:
-            try:
-                logger.info(f"从 {platform['name']} 爬取书籍")
-                
-                # 这里应该是具体的爬虫逻辑
-                # 为了演示，我们使用模拟数据
-                books.extend(self._mock_books(keyword, platform['name']))
-                
-                # 随机延时
-                time.sleep(random.uniform(1, 3))
-                
-            except Exception as e:
-                logger.error(f"爬取 {platform['name']} 书籍时出错: {str(e)}")
-        
-        # 将爬取的书籍添加到知识图谱
-        for book in books:
-            self._add_node('book', book)
-        
-        return books
+        jobs = []
+        for skill in skills:
+            jobs.extend(('course', skill, platform) for platform in self.course_platforms)
+            jobs.extend(('book', skill, platform) for platform in self.book_platforms)
+        return self._crawl(jobs)
     
-    def build_relationships(self):
-        """构建知识图谱中节点之间的关系"""
-        logger.info("开始构建知识图谱关系")
+    def _crawl(self, jobs):
+        """
+        并发执行抓取，同一平台的请求按主机限速，不同平台互不阻塞
+        
+        新鲜期内的缓存直接使用；过了新鲜期的缓存携带 ETag / Last-Modified 发起条件请求。
+        
+        Args:
+            jobs: [(节点类型, 关键词, 平台)] 列表
+        
+        Returns:
+            list: 按 jobs 顺序合并的抓取结果
+        """
+        job_items = [None] * len(jobs)
+        cached_entries = {}
+        tasks = []
+        
+        for index, (node_type, keyword, platform) in enumerate(jobs):
+            entry = self.cache.get(platform['name'], node_type, keyword)
+            if entry is not None and self.cache.is_fresh(entry):
+                job_items[index] = entry.items
+                continue
+            
+            headers = {}
+            if entry is not None:
+                cached_entries[index] = entry
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+            
+            tasks.append(CrawlTask(
+                index,
+                platform['url'] if self.fetch_pages else None,
+                partial(self._fetch_result, node_type, keyword, platform, entry),
+                headers
+            ))
         
-        nodes = self.knowledge_graph['nodes']
+        for task, result, error in self.engine.run(tasks, timeout=config.CRAWLER_TOTAL_TIMEOUT):
+            node_type, keyword, platform = jobs[task.key]
+            if error:
+                logger.error(f"爬取 {platform['name']} 的 '{keyword}' 时出错: {str(error)}")
+                # 抓取失败时退回到过期的缓存
+                stale_entry = cached_entries.get(task.key)
+                if stale_entry is not None:
+                    job_items[task.key] = stale_entry.items
+                continue
+            
+            items, etag, last_modified, not_modified = result
+            if not_modified:
+                self.cache.touch(platform['name'], node_type, keyword)
+            else:
+                self.cache.put(platform['name'], node_type, keyword, items, etag, last_modified)
+            job_items[task.key] = items
         
-        # 为了演示，我们使用一些预定义的关系规则
-        # 实际项目中，这部分可能需要更复杂的逻辑或者人工标注
+        merged = []
+        for (node_type, keyword, platform), items in zip(jobs, job_items):
+            if not items:
+                continue
+            # 将爬取的课程和书籍添加到知识图谱，并与同一技能下的已有节点建立关系
+            for item in items:
+                self._add_node(node_type, item, skill=keyword)
+            merged.extend(items)
         
-        # 例如：找出所有Python相关的课程和书籍，建立它们之间的关系
-        python_nodes = [node for node in nodes if 'python' in node['title'].lower()]
+        return merged
+    
+    def _fetch_result(self, node_type, keyword, platform, cached_entry, response):
+        """处理抓取响应：304 时沿用缓存，否则解析页面并记录缓存校验信息"""
+        if response is not None and response.status_code == 304 and cached_entry is not None:
+            return cached_entry.items, cached_entry.etag, cached_entry.last_modified, True
+        
+        etag = last_modified = None
+        if response is not None:
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        return self._parse_platform(node_type, keyword, platform, response), etag, last_modified, False
+    
+    def _parse_platform(self, node_type, keyword, platform, response):
+        """解析平台页面，提取课程或书籍信息"""
+        logger.info(f"从 {platform['name']} 爬取{'课程' if node_type == 'course' else '书籍'}")
         
-        for i, node1 in enumerate(python_nodes):
-            for j, node2 in enumerate(python_nodes):
-                if i != j:
-                    # 根据难度建立前置关系
-                    if node1['difficulty'] == '初级' and node2['difficulty'] in ['中级', '高级']:
-                        self._add_edge(node1['id'], node2['id'], 'prerequisite')
-                    
-                    # 根据类型建立互补关系
-                    if node1['type'] == 'course' and node2['type'] == 'book':
-                        self._add_edge(node1['id'], node2['id'], 'complementary')
+        # 这里应该是具体的解析逻辑，根据不同平台实现不同的解析方式
+        # 为了演示，我们使用模拟数据
+        if node_type == 'book':
+            return self._mock_books(keyword, platform['name'])
+        if platform['name'] == '极客时间':
+            return self._mock_geektime_courses(keyword)
+        if platform['name'] == 'B站':
+            return self._mock_bilibili_courses(keyword)
+        return self._mock_general_courses(keyword, platform['name'])
+    
+    @property
+    def knowledge_graph(self):
+        """知识图谱的 {'nodes': [...], 'edges': [...]} 视图"""
+        return self.graph.to_dict()
+    
+    def build_relationships(self):
+        """
+        构建知识图谱中节点之间的关系
         
-        logger.info(f"知识图谱关系构建完成，共 {len(self.knowledge_graph['edges'])} 条关系")
+        关系在节点加入图谱时按技能桶增量建立（同一技能下初级 -> 中级/高级为前置关系，
+        课程 -> 书籍为互补关系），这里只输出统计信息，重复调用不会产生重复的边。
+        """
+        logger.info(f"知识图谱关系构建完成，共 {len(self.graph.nodes)} 个节点、{self.graph.edge_count} 条关系")
+        return self.graph.edge_count
     
     def export_knowledge_graph(self, filepath):
-        """导出知识图谱到文件"""
+        """以流式JSON导出知识图谱到文件，用于与其他系统交换数据"""
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.knowledge_graph, f, ensure_ascii=False, indent=2)
+            write_graph_json(self.graph, f)
         
         logger.info(f"知识图谱已导出到 {filepath}")
         return filepath
     
-    def _add_node(self, node_type, data):
-        """添加节点到知识图谱"""
-        node_id = f"{node_type}_{len(self.knowledge_graph['nodes'])}"
-        
-        node = {
-            'id': node_id,
-            'type': node_type,
-            'title': data['title'],
-            'description': data.get('description', ''),
-            'difficulty': data.get('difficulty', '中级'),
-            'price': data.get('price', 0),
-            'platform': data.get('platform', ''),
-            'url': data.get('url', ''),
-            'rating': data.get('rating', 0)
-        }
+    def save_graph_store(self, force=False):
+        """
+        将本进程新爬取的节点并入列式存储文件，供各工作进程内存映射共享
         
-        self.knowledge_graph['nodes'].append(node)
-        return node_id
+        默认在后台线程中写入（按最小间隔节流），不阻塞请求；force=True 时立即在当前线程写入，返回是否写入。
+        """
+        if not force:
+            schedule_persist(self.graph)
+            return False
+        try:
+            return persist_graph(self.graph, force=True)
+        except (OSError, ValueError) as e:
+            logger.error(f"持久化知识图谱失败: {str(e)}")
+            return False
+    
+    def _add_node(self, node_type, data, skill=None):
+        """添加节点到知识图谱，相同平台上标题相同的资源只保留一个节点"""
+        return self.graph.add_node(node_type, data, skill=skill)
     
     def _add_edge(self, source_id, target_id, relation_type):
-        """添加边到知识图谱"""
-        edge = {
-            'source': source_id,
-            'target': target_id,
-            'relation': relation_type
-        }
-        
-        self.knowledge_graph['edges'].append(edge)
+        """添加边到知识图谱，已存在的边不会重复添加"""
+        return self.graph.add_edge(source_id, target_id, relation_type)
     
     # 以下是模拟数据生成方法，实际项目中应替换为真实爬虫逻辑
     
@@ -0,0 +1,295 @@
+import hashlib
+import threading
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 难度等级
+BEGINNER = '初级'
+ADVANCED_DIFFICULTIES = ('中级', '高级')
+
+class KnowledgeGraph:
+    """
+    带索引的知识图谱
+    
+    - 节点以 id -> 节点 的字典保存，按 (类型, 平台, 标题) 去重；节点ID由这三项派生，
+      各工作进程各自爬取的同一资源得到相同的ID，合并时不会冲突
+    - 每种关系按 source -> {target} 保存邻接集合，边天然去重
+    - 按技能维护难度桶和类型桶，新增节点时只与同技能桶内的节点计算关系
+    """
+    
+    RELATIONS = ('prerequisite', 'complementary')
+    
+    def __init__(self):
+        self._edge_listeners = []
+        self._lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        self.nodes = {}  # id -> 节点
+        self._node_keys = {}  # (类型, 平台, 标题) -> id
+        self.out_edges = {relation: {} for relation in self.RELATIONS}  # relation -> source -> {target}
+        self.in_edges = {relation: {} for relation in self.RELATIONS}  # relation -> target -> {source}
+        self.edge_count = 0
+        self._skill_difficulty = {}  # skill -> difficulty -> {id}
+        self._skill_type = {}  # skill -> type -> {id}
+        self.node_skills = {}  # id -> {skill}
+        self._url_index = {}  # url -> id
+        self.version = 0  # 每次节点或边变化时递增
+    
+    def add_node(self, node_type, data, skill=None):
+        """
+        添加节点，已存在的节点（类型、平台、标题相同）会更新属性而不是重复添加
+        
+        Args:
+            node_type: 节点类型（course/book/...）
+            data: 节点数据
+            skill: 节点所属技能，指定时与该技能下的已有节点建立关系
+        
+        Returns:
+            str: 节点ID
+        """
+        key = (node_type, data.get('platform', ''), data['title'].strip().lower())
+        with self._lock:
+            existing_id = self._node_keys.get(key)
+            if existing_id is not None:
+                node_id = existing_id
+            else:
+                node_id = node_key_id(key)
+                self._node_keys[key] = node_id
+                self.nodes[node_id] = {'id': node_id, 'type': node_type}
+                self.node_skills[node_id] = set()
+                self.version += 1
+            
+            node = self.nodes[node_id]
+            old_url = node.get('url')
+            old_difficulty = node.get('difficulty')
+            attributes = {
+                'title': data['title'],
+                'description': data.get('description', ''),
+                'difficulty': data.get('difficulty', '中级'),
+                'price': data.get('price', 0),
+                'platform': data.get('platform', ''),
+                'url': data.get('url', ''),
+                'rating': data.get('rating', 0)
+            }
+            if existing_id is not None and any(node.get(name) != value for name, value in attributes.items()):
+                self.version += 1
+            node.update(attributes)
+            if old_url and old_url != node['url'] and self._url_index.get(old_url) == node_id:
+                del self._url_index[old_url]
+            if node['url']:
+                self._url_index[node['url']] = node_id
+            
+            # 难度变化后，原难度桶推导出的前置关系不再成立，移出旧桶后按新难度重新建立
+            if existing_id is not None and old_difficulty != node['difficulty']:
+                self._relink_difficulty(node_id, old_difficulty)
+            
+            if skill:
+                self._link_skill(node_id, self._normalize_skill(skill))
+            return node_id
+    
+    def add_edge(self, source_id, target_id, relation):
+        """添加边，已存在的边不会重复添加；返回是否新增"""
+        if source_id == target_id:
+            return False
+        with self._lock:
+            targets = self.out_edges[relation].setdefault(source_id, set())
+            if target_id in targets:
+                return False
+            targets.add(target_id)
+            self.in_edges[relation].setdefault(target_id, set()).add(source_id)
+            self.edge_count += 1
+            self.version += 1
+            for listener in self._edge_listeners:
+                listener(source_id, target_id, relation, True)
+            return True
+    
+    def remove_edge(self, source_id, target_id, relation):
+        """删除边；返回是否删除"""
+        with self._lock:
+            targets = self.out_edges[relation].get(source_id)
+            if not targets or target_id not in targets:
+                return False
+            targets.discard(target_id)
+            if not targets:
+                del self.out_edges[relation][source_id]
+            sources = self.in_edges[relation][target_id]
+            sources.discard(source_id)
+            if not sources:
+                del self.in_edges[relation][target_id]
+            self.edge_count -= 1
+            self.version += 1
+            for listener in self._edge_listeners:
+                listener(source_id, target_id, relation, False)
+            return True
+    
+    def add_edge_listener(self, listener):
+        """注册边变化的回调：listener(source_id, target_id, relation, added)，added 为 False 表示删除"""
+        with self._lock:
+            self._edge_listeners.append(listener)
+    
+    def get_node(self, node_id):
+        """按ID获取节点"""
+        return self.nodes.get(node_id)
+    
+    def find_by_url(self, url):
+        """按资源链接查找节点ID"""
+        return self._url_index.get(url)
+    
+    def successors(self, node_id, relation):
+        """获取节点在某种关系下的后继节点ID"""
+        return self.out_edges[relation].get(node_id, set())
+    
+    def predecessors(self, node_id, relation):
+        """获取节点在某种关系下的前驱节点ID"""
+        return self.in_edges[relation].get(node_id, set())
+    
+    def nodes_for_skill(self, skill, difficulty=None, node_type=None):
+        """获取某个技能下的节点ID，可按难度或类型过滤"""
+        skill = self._normalize_skill(skill)
+        if difficulty is not None:
+            ids = self._skill_difficulty.get(skill, {}).get(difficulty, set())
+            if node_type is not None:
+                ids = ids & self._skill_type.get(skill, {}).get(node_type, set())
+            return ids
+        if node_type is not None:
+            return self._skill_type.get(skill, {}).get(node_type, set())
+        return set().union(*self._skill_difficulty.get(skill, {}).values())
+    
+    def skills(self):
+        """获取所有技能"""
+        return list(self._skill_difficulty)
+    
+    def iter_nodes(self):
+        """遍历所有节点"""
+        return iter(list(self.nodes.values()))
+    
+    def iter_edges(self):
+        """遍历所有边"""
+        for relation, adjacency in self.out_edges.items():
+            for source_id, targets in adjacency.items():
+                for target_id in targets:
+                    yield {'source': source_id, 'target': target_id, 'relation': relation}
+    
+    def to_dict(self):
+        """转换为 {'nodes': [...], 'edges': [...]} 结构"""
+        with self._lock:
+            return {
+                'nodes': list(self.nodes.values()),
+                'edges': list(self.iter_edges())
+            }
+    
+    def merge_store(self, store):
+        """将列式存储（CompactGraph）中的节点、技能和边合并进来，技能桶推导的关系重新建立"""
+        node_skills = store.node_skills()
+        with self._lock:
+            # 旧版本文件中的节点ID是进程内的自增编号，合并时统一换成由资源派生的ID
+            ids = []
+            for index in range(len(store)):
+                node = store.node_at(index)
+                for skill in node_skills.get(index) or [None]:
+                    node_id = self.add_node(node['type'], node, skill=skill)
+                ids.append(node_id)
+            for relation in self.RELATIONS:
+                for index in range(len(store)):
+                    for other in store.successor_indices(index, relation):
+                        self.add_edge(ids[index], ids[other], relation)
+    
+    def merge_graph(self, graph):
+        """将另一个 KnowledgeGraph 的节点、技能和边合并进来"""
+        with self._lock, graph._lock:
+            for node in list(graph.nodes.values()):
+                for skill in graph.node_skills.get(node['id']) or [None]:
+                    self.add_node(node['type'], node, skill=skill)
+            for edge in list(graph.iter_edges()):
+                if edge['source'] in self.nodes and edge['target'] in self.nodes:
+                    self.add_edge(edge['source'], edge['target'], edge['relation'])
+    
+    def take(self):
+        """
+        取出当前的全部节点和边并清空自身（边变化的回调保留）
+        
+        Returns:
+            KnowledgeGraph: 包含取出内容的新图谱
+        """
+        with self._lock:
+            taken = KnowledgeGraph()
+            taken.__dict__.update({name: value for name, value in self.__dict__.items()
+                                   if name not in ('_edge_listeners', '_lock')})
+            self._reset()
+            return taken
+    
+    def _link_skill(self, node_id, skill):
+        """将节点加入技能桶，并与桶内已有节点建立前置和互补关系"""
+        skills = self.node_skills[node_id]
+        if skill in skills:
+            return
+        skills.add(skill)
+        
+        node = self.nodes[node_id]
+        by_difficulty = self._skill_difficulty.setdefault(skill, {})
+        by_type = self._skill_type.setdefault(skill, {})
+        
+        # 根据难度建立前置关系：初级 -> 中级/高级
+        if node['difficulty'] == BEGINNER:
+            for difficulty in ADVANCED_DIFFICULTIES:
+                for other_id in list(by_difficulty.get(difficulty, ())):
+                    self.add_edge(node_id, other_id, 'prerequisite')
+        elif node['difficulty'] in ADVANCED_DIFFICULTIES:
+            for other_id in list(by_difficulty.get(BEGINNER, ())):
+                self.add_edge(other_id, node_id, 'prerequisite')
+        
+        # 根据类型建立互补关系：课程 -> 书籍
+        if node['type'] == 'course':
+            for other_id in list(by_type.get('book', ())):
+                self.add_edge(node_id, other_id, 'complementary')
+        elif node['type'] == 'book':
+            for other_id in list(by_type.get('course', ())):
+                self.add_edge(other_id, node_id, 'complementary')
+        
+        by_difficulty.setdefault(node['difficulty'], set()).add(node_id)
+        by_type.setdefault(node['type'], set()).add(node_id)
+    
+    def _relink_difficulty(self, node_id, old_difficulty):
+        """节点难度变化：从各技能的旧难度桶移出，删除与同技能桶内节点的前置关系，再按新难度重新加入"""
+        skills = list(self.node_skills[node_id])
+        for skill in skills:
+            bucket = self._skill_difficulty.get(skill, {}).get(old_difficulty)
+            if bucket is not None:
+                bucket.discard(node_id)
+        
+        members = set().union(*(self.nodes_for_skill(skill) for skill in skills)) if skills else set()
+        for other_id in list(self.successors(node_id, 'prerequisite') & members):
+            self.remove_edge(node_id, other_id, 'prerequisite')
+        for other_id in list(self.predecessors(node_id, 'prerequisite') & members):
+            self.remove_edge(other_id, node_id, 'prerequisite')
+        
+        self.node_skills[node_id] = set()
+        for skill in skills:
+            self._link_skill(node_id, skill)
+    
+    def _normalize_skill(self, skill):
+        return str(skill).strip().lower()
+
+def node_key_id(key):
+    """由 (类型, 平台, 小写标题) 派生节点ID，如 course_3f2a..."""
+    digest = hashlib.sha1('\x1f'.join(key).encode('utf-8')).hexdigest()[:16]
+    return f"{key[0]}_{digest}"
+
+_shared_graph = None
+_shared_graph_lock = threading.Lock()
+
+def get_shared_graph():
+    """
+    获取进程内共享的知识图谱，所有爬虫实例向同一个图谱中累积节点
+    
+    持久化后内容并入共享的列式文件并从这里清空，因此它只保存本进程尚未持久化的增量。
+    """
+    global _shared_graph
+    if _shared_graph is None:
+        with _shared_graph_lock:
+            if _shared_graph is None:
+                _shared_graph = KnowledgeGraph()
+    return _shared_graph
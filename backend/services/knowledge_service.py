@@ -2,21 +2,22 @@ import ollama
 import json
 import logging
 from services.knowledge_crawler import KnowledgeCrawler
+from services.path_planner import PathPlanner
+import config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 import json
 import uuid
-import requests
+from services.ollama_client import post_generate
 from models.learning_path import LearningPath, db
 
 class KnowledgeService:
     """知识服务，用于生成学习路径"""
     
     def __init__(self):
-        self.ollama_api = "http://127.0.0.1:11434/api/generate"
-        self.model = "deepseek-r1:8b"  # 使用本地模型
+        self.ollama_api = config.OLLAMA_API
             
         self.crawler = KnowledgeCrawler()
     
@@ -63,14 +64,7 @@ class KnowledgeService:
         
         try:
             # 调用本地Ollama模型
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'knowledge_path')
             
             if response.status_code != 200:
                 raise Exception(f"调用Ollama API失败: {response.text}")
@@ -177,14 +171,7 @@ class KnowledgeService:
         """调用大语言模型生成内容"""
         try:
             # 调用本地Ollama模型
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'knowledge_llm')
             
             if response.status_code != 200:
                 raise Exception(f"调用Ollama API失败: {response.text}")
@@ -229,14 +216,7 @@ class KnowledgeService:
         
         try:
             # 修改为使用与__init__中相同的API调用方式
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'goal_analysis')
             
             if response.status_code != 200:
                 raise Exception(f"调用Ollama API失败: {response.text}")
@@ -277,14 +257,24 @@ class KnowledgeService:
         
         # 2. 根据分析结果爬取相关资源
         if goal_info['skills']:
-            for skill in goal_info['skills']:
-                self.crawler.crawl_courses(skill)
-                self.crawler.crawl_books(skill)
+            skills = goal_info['skills'] if isinstance(goal_info['skills'], list) else [goal_info['skills']]
+            self.crawler.crawl_skills(skills)
         
         # 3. 构建资源之间的关系
         self.crawler.build_relationships()
         
-        # 4. 使用大模型生成学习路径
+        # 4. 优先基于本次爬取的资源规划学习路径（在持久化之前规划：持久化后进程内的增量会清空）
+        learning_path = None
+        if config.PATH_PLANNER_ENABLED:
+            learning_path = PathPlanner(graph=self.crawler.graph).plan(goal_text, goal_info)
+        
+        # 5. 在后台持久化供其他工作进程共享
+        self.crawler.save_graph_store()
+        if learning_path is not None:
+            logger.info(f"基于知识图谱规划的学习路径: {learning_path['title']}")
+            return learning_path
+        
+        # 6. 图谱中没有相关资源时使用大模型生成学习路径
         prompt = f"""
         请根据以下用户学习目标和信息，生成一个详细的学习路径:
         
@@ -333,14 +323,7 @@ class KnowledgeService:
         
         try:
             # 修改为使用与__init__中相同的API调用方式
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'advanced_path')
             
             if response.status_code != 200:
                 raise Exception(f"调用Ollama API失败: {response.text}")
@@ -367,23 +350,23 @@ class KnowledgeService:
     
     def save_learning_path(self, user_id, goal_text, learning_path):
         """保存用户的学习路径"""
-        from models.learning_path import LearningPath, LearningStage, db
-        import uuid
+        from models.learning_path import LearningPath, db
+        from models.user import User
         
-        # 创建学习路径记录
-        path_id = str(uuid.uuid4())
+        # 创建学习路径记录（learning_paths.id 为自增整数）
         new_path = LearningPath(
-            id=path_id,
             user_id=user_id,
             title=learning_path['title'],
-            estimated_time=learning_path['estimated_time'],
+            estimated_time=learning_path.get('estimated_time'),
             goal=goal_text,
-            path_data=json.dumps(learning_path, ensure_ascii=False),
             completion_rate=0
         )
+        new_path.set_path_data(learning_path)
         
-        db.session.add(new_path) 
+        db.session.add(new_path)
+        # 用户数据变化，递增版本号使条件GET的ETag失效
+        User.bump_data_version(user_id)
         db.session.commit()
         logger.info(f"已保存用户 {user_id} 的学习路径")
         
-        return path_id
\ No newline at end of file
+        return new_path.id
\ No newline at end of file
@@ -1,7 +1,16 @@
-import requests
+from services.ollama_client import post_generate
 import json
 import re
 from models.learning_path import LearningPath, db
+from models.user import User
+from services.goal_index import get_goal_index
+from services.model_router import get_model_router
+from services.path_planner import PathPlanner
+from services.path_templates import get_template_library
+from services.response_cache import get_response_cache, prompt_fingerprint
+from services.resource_catalog import ResourceCatalog, assign_short_ids, expand_resource_ids, format_candidates
+from utils import metrics
+import config
 import logging
 
 # 配置日志
@@ -12,71 +21,21 @@ class LearningPathService:
     """学习路径服务"""
     
     def __init__(self):
-        self.ollama_api = "http://127.0.0.1:11434/api/generate"
-        self.model = "deepseek-r1:8b"
+        self.ollama_api = config.OLLAMA_API
+        self._catalog = None  # 资源目录在首次检索时创建
     
     def generate_learning_path(self, goal, user_id=None):
         """生成学习路径"""
         try:
-            # 构建提示词
-            prompt = self._build_prompt(goal)
-            
-            # 调用Ollama API
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Ollama API调用失败: {response.text}")
-            
-            # 解析响应
-            result = response.json()
-            response_text = result.get("response", "")
-            
-            # 提取JSON部分
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if not json_match:
-                raise Exception("无法解析学习路径")
-            
-            json_str = json_match.group(0)
-            path_data = json.loads(json_str)
-            
+            # 先查找近似的历史目标，命中时复用已保存的学习路径
+            path_data = self.find_similar_path(goal) if config.GOAL_REUSE_ENABLED else None
+            reused = path_data is not None
+            if path_data is None:
+                path_data = self.build_learning_path(goal)
             print(f"学习路径内容: {path_data}")
-
-            # 保存到数据库
-            learning_path = LearningPath(
-                user_id=user_id,
-                goal=goal
-            )
-            learning_path.set_path_data(path_data)
             
-            if user_id:  # 只有登录用户才保存到数据库
-                try:
-                    # 从path_data中提取title
-                    title = path_data.get('title', goal)  # 如果没有title，使用goal作为默认值
-                    description = path_data.get('description', goal)  # 如果没有description，使用goal作为默认值
-                    estimated_time = path_data.get('estimated_time', "48小时")  # 如果没有description，使用48小时作为默认值
-                            
-                    # 创建学习路径记录
-                    path = LearningPath(
-                        user_id=user_id,
-                        title=title,  # 确保设置title
-                        description=description,  # 确保设置description
-                        goal=goal,
-                        estimated_time=estimated_time,  # 确保设置estimated_time
-                        path_data=json.dumps(path_data)
-                    )
-                            
-                    db.session.add(path)
-                    db.session.commit()
-                except Exception as e:
-                        db.session.rollback()
-                        print(f"保存学习路径失败: {str(e)}")
+            # 保存到数据库（复用的路径已在索引中，不再重复登记）
+            self.save_generated_path(goal, path_data, user_id, reusable=not reused)
             
             return path_data
             
@@ -85,6 +44,207 @@ class LearningPathService:
             # 返回一个默认的学习路径
             return self._get_default_path(goal)
     
+    def build_learning_path(self, goal):
+        """生成学习路径数据（不保存，不访问数据库），生成失败时抛出异常"""
+        # 优先基于知识图谱规划，图谱中没有相关资源时再调用大模型生成
+        path_data = self._plan_from_graph(goal) if config.PATH_PLANNER_ENABLED else None
+        if path_data is not None:
+            return path_data
+        
+        # 大模型生成的结果按目标缓存
+        cache = get_response_cache()
+        if cache is not None:
+            path_data = cache.get('learning_path', goal, self.prompt_fingerprint())
+            if path_data is not None:
+                return path_data
+        
+        # 其次检索候选资源，由大模型只返回阶段结构和资源ID
+        tier = None
+        if config.PATH_RAG_ENABLED:
+            path_data, tier = self._generate_with_retrieval(goal)
+        if path_data is None:
+            path_data, tier = self._generate_with_llm(goal)
+        
+        # 降级为小模型时的输出不按配置模型的指纹缓存
+        if cache is not None and not get_model_router().downgraded('learning_path', tier):
+            cache.put('learning_path', goal, self.prompt_fingerprint(), path_data)
+        return path_data
+    
+    def prompt_fingerprint(self):
+        """学习路径提示词和模型的指纹，作为响应缓存键的一部分"""
+        return prompt_fingerprint(*get_model_router().configuration('learning_path'), config.PATH_RAG_ENABLED,
+                                  self._build_retrieval_prompt('{goal}', {}), self._build_prompt('{goal}'))
+    
+    def find_similar_path(self, goal):
+        """查找与学习目标近似的历史目标，返回其已保存的学习路径数据，未命中时返回None"""
+        try:
+            path_data, path_id, similarity = get_goal_index().find(goal)
+        except Exception as e:
+            logger.error(f"查找近似学习目标失败: {str(e)}")
+            return None
+        if path_data is not None:
+            logger.info(f"复用近似目标的学习路径 {path_id}（相似度 {similarity:.2f}）: {goal}")
+        return path_data
+    
+    def save_generated_path(self, goal, path_data, user_id=None, reusable=True):
+        """
+        保存生成的学习路径，只有登录用户才保存到数据库
+        
+        reusable 表示路径只由学习目标生成、未经个性化调整，可以登记到近似目标索引复用给其他用户。
+        """
+        if not user_id:
+            return None
+        try:
+            # 从path_data中提取title
+            title = path_data.get('title', goal)  # 如果没有title，使用goal作为默认值
+            description = path_data.get('description', goal)  # 如果没有description，使用goal作为默认值
+            estimated_time = path_data.get('estimated_time', "48小时")  # 如果没有description，使用48小时作为默认值
+            
+            # 创建学习路径记录
+            path = LearningPath(
+                user_id=user_id,
+                title=title,  # 确保设置title
+                description=description,  # 确保设置description
+                goal=goal,
+                estimated_time=estimated_time,  # 确保设置estimated_time
+                reusable=reusable
+            )
+            path.set_path_data(path_data)
+            
+            db.session.add(path)
+            User.bump_data_version(user_id)
+            db.session.commit()
+            if config.GOAL_REUSE_ENABLED and reusable:
+                get_goal_index().add(path.id, goal)
+            return path
+        except Exception as e:
+            db.session.rollback()
+            print(f"保存学习路径失败: {str(e)}")
+            return None
+    
+    def _call_ollama(self, prompt, timeout=None):
+        """调用Ollama API，返回响应文本中的JSON对象、完整的响应结果和实际使用的模型级别"""
+        response = post_generate(self.ollama_api, prompt, 'learning_path', timeout=timeout)
+        
+        if response.status_code != 200:
+            raise Exception(f"Ollama API调用失败: {response.text}")
+        
+        # 解析响应
+        result = response.json()
+        response_text = result.get("response", "")
+        
+        # 提取JSON部分
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if not json_match:
+            raise Exception("无法解析学习路径")
+        
+        return json.loads(json_match.group(0)), result, response.model_tier
+    
+    def _generate_with_llm(self, goal):
+        """调用大模型生成学习路径，返回 (学习路径数据, 实际使用的模型级别)"""
+        path_data, result, tier = self._call_ollama(self._build_prompt(goal))
+        logger.info(f"大模型生成学习路径，输出 {result.get('eval_count')} tokens")
+        return path_data, tier
+    
+    def _generate_with_retrieval(self, goal):
+        """
+        检索增强生成：提示词中给出带短ID的候选资源，模型只返回阶段结构和资源ID，
+        由服务端展开为完整的资源记录，返回 (学习路径数据, 实际使用的模型级别)；
+        候选资源不足或模型没有引用任何资源时学习路径数据为None
+        """
+        if self._catalog is None:
+            self._catalog = ResourceCatalog()
+        candidates = self._catalog.retrieve(goal)
+        if len(candidates) < config.PATH_RAG_MIN_CANDIDATES:
+            return None, None
+        
+        id_map = assign_short_ids(candidates)
+        path_data, result, tier = self._call_ollama(self._build_retrieval_prompt(goal, id_map))
+        expanded = expand_resource_ids(path_data, id_map)
+        logger.info(f"检索增强生成学习路径，候选资源 {len(id_map)} 个，引用 {expanded} 个，输出 {result.get('eval_count')} tokens")
+        return (path_data if expanded else None), tier
+    
+    def _plan_from_graph(self, goal):
+        """基于知识图谱规划学习路径，不调用大模型；图谱中没有相关资源时返回None"""
+        try:
+            path_data = PathPlanner().plan(goal)
+        except Exception as e:
+            logger.error(f"基于知识图谱规划学习路径失败: {str(e)}")
+            return None
+        
+        if path_data is not None and config.PATH_PLANNER_POLISH:
+            self._polish_path(goal, path_data)
+        return path_data
+    
+    def _polish_path(self, goal, path_data):
+        """调用大模型润色规划结果的标题和描述，资源和阶段结构保持不变；失败时保留原文"""
+        outline = {
+            'title': path_data['title'],
+            'description': path_data['description'],
+            'stages': [
+                {'name': stage['name'], 'resources': [resource['name'] for resource in stage['resources']]}
+                for stage in path_data['stages']
+            ]
+        }
+        prompt = f"""
+        用户的学习目标是: {goal}
+        
+        下面是已经规划好的学习路径大纲:
+        {json.dumps(outline, ensure_ascii=False)}
+        
+        请为这条学习路径撰写更自然的标题、总体描述，以及每个阶段的描述，阶段数量和顺序保持不变。
+        请以JSON格式返回，格式如下:
+        {{
+            "title": "学习路径标题",
+            "description": "学习路径总体描述",
+            "stages": [
+                {{"name": "阶段名称", "description": "阶段描述"}}
+            ]
+        }}
+        
+        只返回JSON格式，不要有其他文字。
+        """
+        try:
+            polished, _, _ = self._call_ollama(prompt, timeout=config.PATH_PLANNER_POLISH_TIMEOUT)
+            
+            path_data['title'] = polished.get('title') or path_data['title']
+            path_data['description'] = polished.get('description') or path_data['description']
+            for stage, polished_stage in zip(path_data['stages'], polished.get('stages') or []):
+                stage['name'] = polished_stage.get('name') or stage['name']
+                stage['description'] = polished_stage.get('description') or stage['description']
+        except Exception as e:
+            logger.error(f"润色学习路径失败: {str(e)}")
+    
+    def _build_retrieval_prompt(self, goal, id_map):
+        """构建检索增强生成的提示词：资源只能从候选列表中按ID选择"""
+        return f"""
+        你是一个专业的学习路径规划师，请根据用户的学习目标，从候选资源中选择合适的资源，制定分阶段的学习路径。
+        
+        用户的学习目标是: {goal}
+        
+        候选资源（ID | 类型 | 难度 | 价格 | 名称）:
+        {format_candidates(id_map)}
+        
+        请以JSON格式返回，resources 中只填写候选资源的ID，不要编写资源名称、链接或价格，格式如下:
+        {{
+            "title": "学习路径标题",
+            "description": "学习路径总体描述",
+            "estimated_time": "总预计学习时间",
+            "stages": [
+                {{
+                    "name": "阶段名称",
+                    "description": "阶段描述",
+                    "estimated_time": "阶段预计学习时间",
+                    "resources": ["R1", "R2"],
+                    "goals": ["目标1", "目标2"]
+                }}
+            ]
+        }}
+        
+        只返回JSON格式的学习路径，不要有其他文字。
+        需要确保总预计学习时间是所有阶段预计学习时间的总和。
+        """
+    
     def _build_prompt(self, goal):
         """构建提示词"""
         return f"""
@@ -137,271 +297,13 @@ class LearningPathService:
         """
     
     def _get_default_path(self, goal):
-        """获取默认学习路径"""
-        # 简单分析目标中的关键词
-        goal_lower = goal.lower()
-        
-        if "python" in goal_lower or "编程" in goal_lower:
-            return self._get_python_path()
-        elif "前端" in goal_lower or "web" in goal_lower:
-            return self._get_frontend_path()
-        elif "数据" in goal_lower or "分析" in goal_lower:
-            return self._get_data_analysis_path()
-        elif "ai" in goal_lower or "人工智能" in goal_lower or "机器学习" in goal_lower:
-            return self._get_ai_path()
-        else:
-            return self._get_general_path()
-    
-    def _get_python_path(self):
-        """获取Python学习路径"""
-        return {
-            "title": "Python编程从入门到精通",
-            "description": "这是一条从零基础开始学习Python编程的路径，适合完全没有编程经验的初学者。",
-            "estimated_time": "3-6个月",
-            "stages": [
-                {
-                    "name": "Python基础入门",
-                    "description": "学习Python的基本语法、数据类型、控制流和函数等基础知识。",
-                    "estimated_time": "4周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "Python编程：从入门到实践",
-                            "link": "https://book.douban.com/subject/26829016/",
-                            "description": "最受欢迎的Python入门书籍之一，通过实践项目学习Python编程。",
-                            "price": "79"
-                        },
-                        {
-                            "type": "课程",
-                            "name": "Python入门课程 - 中国大学MOOC",
-                            "link": "https://www.icourse163.org/course/BIT-268001",
-                            "description": "北京理工大学的Python入门课程，适合零基础学习。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握Python基本语法",
-                        "能够编写简单的Python程序",
-                        "理解变量、数据类型、条件语句和循环"
-                    ]
-                },
-                {
-                    "name": "Python进阶与实践",
-                    "description": "学习更多Python高级特性，并开始构建实际项目。",
-                    "estimated_time": "8周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "Python进阶 - 慕课网",
-                            "link": "https://www.imooc.com/learn/317",
-                            "description": "学习Python的高级特性和编程技巧。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "工具",
-                            "name": "PyCharm社区版",
-                            "link": "https://www.jetbrains.com/pycharm/download/",
-                            "description": "专业的Python集成开发环境，提高编程效率。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握Python高级特性",
-                        "能够开发简单的Web应用",
-                        "理解面向对象编程概念"
-                    ]
-                }
-            ]
-        }
-    
-    def _get_frontend_path(self):
-        """获取前端学习路径"""
-        return {
-            "title": "前端开发学习路径",
-            "description": "从零开始学习前端开发，包括HTML、CSS、JavaScript和现代前端框架。",
-            "estimated_time": "4-8个月",
-            "stages": [
-                {
-                    "name": "HTML和CSS基础",
-                    "description": "学习网页结构和样式的基础知识。",
-                    "estimated_time": "4周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "MDN Web文档 - HTML入门",
-                            "link": "https://developer.mozilla.org/zh-CN/docs/Learn/HTML/Introduction_to_HTML",
-                            "description": "Mozilla开发者网络的HTML入门教程，非常全面。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "课程",
-                            "name": "CSS入门教程 - 菜鸟教程",
-                            "link": "https://www.runoob.com/css/css-tutorial.html",
-                            "description": "简单易懂的CSS入门教程。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握HTML基本标签和结构",
-                        "理解CSS选择器和样式属性",
-                        "能够创建简单的静态网页"
-                    ]
-                },
-                {
-                    "name": "JavaScript基础",
-                    "description": "学习JavaScript编程语言，为动态网页开发打下基础。",
-                    "estimated_time": "6周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "现代JavaScript教程",
-                            "link": "https://zh.javascript.info/",
-                            "description": "从基础到高级的JavaScript教程，内容全面且实用。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "工具",
-                            "name": "VS Code",
-                            "link": "https://code.visualstudio.com/",
-                            "description": "轻量级但功能强大的代码编辑器，前端开发必备。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握JavaScript基本语法",
-                        "理解DOM操作和事件处理",
-                        "能够为网页添加交互功能"
-                    ]
-                }
-            ]
-        }
-    
-    def _get_data_analysis_path(self):
-        """获取数据分析学习路径"""
-        return {
-            "title": "数据分析学习路径",
-            "description": "从零开始学习数据分析，包括统计学基础、Python数据分析工具和数据可视化。",
-            "estimated_time": "4-6个月",
-            "stages": [
-                {
-                    "name": "数据分析基础",
-                    "description": "学习数据分析的基本概念和统计学基础。",
-                    "estimated_time": "4周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "数据分析入门 - 中国大学MOOC",
-                            "link": "https://www.icourse163.org/course/XJTU-1206980804",
-                            "description": "西安交通大学的数据分析入门课程，适合零基础学习。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "书籍",
-                            "name": "深入浅出统计学",
-                            "link": "https://book.douban.com/subject/7056708/",
-                            "description": "通俗易懂的统计学入门书籍，适合零基础学习。",
-                            "price": "69"
-                        }
-                    ],
-                    "goals": [
-                        "理解数据分析的基本概念",
-                        "掌握基本的统计学知识",
-                        "能够进行简单的数据处理"
-                    ]
-                },
-                {
-                    "name": "Python数据分析工具",
-                    "description": "学习Python数据分析工具，如NumPy、Pandas和Matplotlib。",
-                    "estimated_time": "6周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "利用Python进行数据分析 - 第2版",
-                            "link": "https://book.douban.com/subject/26274624/",
-                            "description": "Pandas创始人Wes McKinney的经典著作，深入讲解Python数据分析。",
-                            "price": "99"
-                        },
-                        {
-                            "type": "工具",
-                            "name": "Jupyter Notebook",
-                            "link": "https://jupyter.org/",
-                            "description": "交互式数据分析工具，数据分析师必备。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握NumPy和Pandas的基本用法",
-                        "能够进行数据清洗和预处理",
-                        "掌握基本的数据可视化技能"
-                    ]
-                }
-            ]
-        }
-    
-    def _get_ai_path(self):
-        """获取AI学习路径"""
-        return {
-            "title": "人工智能学习路径",
-            "description": "从零开始学习人工智能，包括机器学习、深度学习和自然语言处理。",
-            "estimated_time": "6-12个月",
-            "stages": [
-                {
-                    "name": "数学和编程基础",
-                    "description": "学习人工智能所需的数学和编程基础。",
-                    "estimated_time": "8周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "机器学习的数学基础 - 3Blue1Brown",
-                            "link": "https://www.bilibili.com/video/BV1aE411o7qd",
-                            "description": "通过可视化方式讲解机器学习所需的线性代数和微积分知识。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "课程",
-                            "name": "Python编程入门 - 中国大学MOOC",
-                            "link": "https://www.icourse163.org/course/BIT-268001",
-                            "description": "北京理工大学的Python入门课程，适合零基础学习。",
-                            "price": "0"
-                        }
-                    ],
-                    "goals": [
-                        "掌握线性代数和微积分基础",
-                        "掌握Python编程基础",
-                        "理解概率论和统计学基础"
-                    ]
-                },
-                {
-                    "name": "机器学习基础",
-                    "description": "学习机器学习的基本概念和算法。",
-                    "estimated_time": "12周",
-                    "resources": [
-                        {
-                            "type": "课程",
-                            "name": "吴恩达机器学习课程 - Coursera",
-                            "link": "https://www.coursera.org/learn/machine-learning",
-                            "description": "最受欢迎的机器学习入门课程，由斯坦福大学教授吴恩达讲授。",
-                            "price": "0"
-                        },
-                        {
-                            "type": "书籍",
-                            "name": "《机器学习实战》",
-                            "link": "https://book.douban.com/subject/24703171/",
-                            "description": "通过实际案例学习机器学习算法。",
-                            "price": "69"
-                        }
-                    ],
-                    "goals": [
-                        "理解机器学习的基本概念",
-                        "掌握常见的机器学习算法",
-                        "能够使用scikit-learn实现简单的机器学习模型"
-                    ]
-                }
-            ]
-        }
+        """获取默认学习路径：模板库中最匹配的模板"""
+        metrics.record_fallback('learning_path')
+        path_data, _ = get_template_library().match(goal)
+        return path_data or self._get_general_path()
     
     def _get_general_path(self):
-        """获取通用学习路径"""
+        """获取通用学习路径（模板库不可用时使用）"""
         return {
             "title": "自定义学习路径",
             "description": "根据您的学习目标定制的学习路径。",
@@ -500,11 +402,16 @@ class LearningPathService:
             path.title = alternative_path_data.get('title', path.title)
             path.description = alternative_path_data.get('description', path.description)
             path.estimated_time = alternative_path_data.get('estimated_time', path.estimated_time)
-            path.path_data = json.dumps(alternative_path_data)
+            path.set_path_data(alternative_path_data)
+            # 备选路径按用户的挫折情况调整过，不再复用给其他用户
+            path.reusable = False
             
             # 保存到数据库
             db.session.add(path)
+            User.bump_data_version(path.user_id)
             db.session.commit()
+            if config.GOAL_REUSE_ENABLED:
+                get_goal_index().remove(path.id)
             
             print(f"成功保存备选学习路径，更新路径 ID: {path_id}")
             return True, None, alternative_path_data
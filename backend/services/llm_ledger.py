@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+import config
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+
+def prompt_hash(model, prompt, options=None):
+    """一次调用的键：模型、完整提示词和其他请求参数的 SHA-256"""
+    digest = hashlib.sha256()
+    for part in (model, prompt, json.dumps(options or {}, sort_keys=True)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+class LLMLedger:
+    """
+    大模型调用账本：逐条追加记录每次调用的用途、提示词哈希、模型、参数、原始响应、耗时和 token 数
+    
+    原始响应（Ollama 返回的完整 JSON）以 deflate 压缩存储，不保存提示词原文，只保存哈希。
+    回放时按提示词哈希查找最近一次记录，使调整解析逻辑或做基准测试时不必重新运行模型。
+    与响应缓存一样使用独立的 SQLite 文件，可在后台线程、脚本和多个工作进程间共享。
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS llm_ledger (
+                    id INTEGER PRIMARY KEY,
+                    recorded_at REAL NOT NULL,
+                    task TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    options TEXT,
+                    status INTEGER NOT NULL,
+                    response BLOB NOT NULL,
+                    duration REAL NOT NULL,
+                    prompt_eval_count INTEGER,
+                    eval_count INTEGER,
+                    eval_duration INTEGER
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_llm_ledger_prompt_hash ON llm_ledger (prompt_hash)')
+    
+    def append(self, task, key, model, options, status, body, duration, result=None):
+        """
+        追加一条调用记录
+        
+        Args:
+            key: 提示词哈希（prompt_hash 的返回值）
+            body: 原始响应字节
+            duration: 调用耗时（秒）
+            result: 解析后的响应体，用于提取 token 统计
+        """
+        result = result or {}
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT INTO llm_ledger (recorded_at, task, prompt_hash, model, options, status, response, duration, '
+                'prompt_eval_count, eval_count, eval_duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time(), task, key, model, json.dumps(options or {}, sort_keys=True), status,
+                 zlib.compress(body, 9), duration, result.get('prompt_eval_count'), result.get('eval_count'),
+                 result.get('eval_duration'))
+            )
+            self.recorded += 1
+    
+    def lookup(self, key):
+        """按提示词哈希查找最近一次成功的调用，返回 (原始响应字节, 耗时)，不存在时返回None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT response, duration FROM llm_ledger WHERE prompt_hash = ? AND status = 200 '
+                'ORDER BY id DESC LIMIT 1',
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.missed += 1
+                return None
+            self.replayed += 1
+        return zlib.decompress(row[0]), row[1]
+    
+    def entries(self, task=None):
+        """按记录顺序遍历调用记录（字典，response 为解压后的原始响应文本）"""
+        query = ('SELECT id, recorded_at, task, prompt_hash, model, options, status, response, duration, '
+                 'prompt_eval_count, eval_count, eval_duration FROM llm_ledger')
+        params = ()
+        if task:
+            query += ' WHERE task = ?'
+            params = (task,)
+        with self._connect() as conn:
+            for row in conn.execute(query + ' ORDER BY id', params):
+                entry = dict(zip(('id', 'recorded_at', 'task', 'prompt_hash', 'model', 'options', 'status',
+                                  'response', 'duration', 'prompt_eval_count', 'eval_count', 'eval_duration'), row))
+                entry['options'] = json.loads(entry['options'] or '{}')
+                entry['response'] = zlib.decompress(entry['response']).decode('utf-8')
+                yield entry
+    
+    def summary(self):
+        """按用途汇总：调用数、不同提示词数、平均耗时、输出速度和存储大小"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT task, COUNT(*), COUNT(DISTINCT prompt_hash), AVG(duration), SUM(eval_count), '
+                'SUM(eval_duration), SUM(LENGTH(response)) FROM llm_ledger GROUP BY task ORDER BY task'
+            ).fetchall()
+        return [{
+            'task': task,
+            'calls': calls,
+            'distinct_prompts': distinct,
+            'avg_seconds': round(avg_seconds or 0, 3),
+            'tokens_per_sec': round(eval_count / (eval_duration / 1e9), 1) if eval_count and eval_duration else None,
+            'stored_bytes': stored_bytes
+        } for task, calls, distinct, avg_seconds, eval_count, eval_duration, stored_bytes in rows]
+    
+    def stats(self):
+        """本进程的记录和回放统计"""
+        return {
+            'recorded': self.recorded,
+            'replayed': self.replayed,
+            'missed': self.missed
+        }
+    
+    @contextmanager
+    def _connect(self):
+        """打开连接，退出时提交事务并关闭连接"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+_llm_ledger = None
+_llm_ledger_lock = threading.Lock()
+
+def get_llm_ledger():
+    """进程内共享的调用账本，未启用（EVELYN_LLM_LEDGER=off）时返回None"""
+    global _llm_ledger
+    if config.LLM_LEDGER_MODE not in (RECORD, REPLAY):
+        return None
+    with _llm_ledger_lock:
+        if _llm_ledger is None:
+            _llm_ledger = LLMLedger(config.LLM_LEDGER_PATH)
+        return _llm_ledger
@@ -0,0 +1,135 @@
+from collections import deque
+from statistics import median
+import config
+import json
+import logging
+import threading
+import time
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+LARGE = 'large'
+SMALL = 'small'
+
+def _parse_pairs(spec, convert=str):
+    """解析 "任务=值,任务=值" 形式的配置"""
+    pairs = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, _, value = item.partition('=')
+        pairs[name.strip()] = convert(value.strip())
+    return pairs
+
+class ModelRouter:
+    """
+    按调用用途（task）选择模型和请求参数
+    
+    规划类任务（学习路径、备选路径）使用大模型；需求分析、页面资源推荐、目标分析这类抽取和分类任务
+    输出短小，使用小模型即可，不必等推理模型输出大段思考过程。
+    
+    为大模型任务配置了耗时目标时，统计最近若干次调用的耗时，中位数超过目标（如 Ollama 排队严重）
+    就在冷却期内改用小模型；冷却期结束后重新使用大模型并重新统计。
+    """
+    
+    def __init__(self, tiers, task_tiers, latency_targets, window=20, cooldown_seconds=300):
+        """
+        Args:
+            tiers: {级别: (模型名称, 请求参数)}，级别为 large / small
+            task_tiers: {任务: 级别}，未列出的任务使用大模型
+            latency_targets: {任务: 耗时目标（秒）}
+            window: 判断是否超过目标所用的最近调用次数
+            cooldown_seconds: 降级的持续时间（秒）
+        """
+        for task, tier in task_tiers.items():
+            if tier not in tiers:
+                raise ValueError(f"任务 {task} 的模型级别无效: {tier}")
+        self.tiers = tiers
+        self.task_tiers = task_tiers
+        self.latency_targets = latency_targets
+        self.window = window
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._downgraded_until = {}
+        self.downgrades = 0
+    
+    def tier(self, task):
+        return self.task_tiers.get(task, LARGE)
+    
+    def configuration(self, task):
+        """任务配置的 (模型名称, 请求参数)，不考虑降级，用于响应缓存的提示词指纹"""
+        return self.tiers[self.tier(task)]
+    
+    def downgraded(self, task, tier):
+        """本次调用使用的级别是否不是任务配置的级别（降级期间的调用）"""
+        return tier != self.tier(task)
+    
+    def route(self, task):
+        """本次调用使用的 (级别, 模型名称, 请求参数)：大模型任务处于降级期时使用小模型"""
+        tier = self.tier(task)
+        if tier == LARGE:
+            with self._lock:
+                until = self._downgraded_until.get(task)
+                if until is not None and time.time() < until:
+                    tier = SMALL
+                elif until is not None:
+                    del self._downgraded_until[task]
+                    logger.info(f"{task} 降级期结束，恢复使用大模型")
+        model, options = self.tiers[tier]
+        return tier, model, options
+    
+    def observe(self, task, tier, seconds):
+        """记录一次调用的耗时（含超时等失败的调用），大模型最近调用耗时的中位数超过目标时降级"""
+        target = self.latency_targets.get(task)
+        if not target or tier != LARGE or self.tiers[SMALL] == self.tiers[LARGE]:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(task, deque(maxlen=self.window))
+            samples.append(seconds)
+            if len(samples) < min(3, self.window):
+                return
+            recent = median(samples)
+            if recent <= target:
+                return
+            samples.clear()
+            self._downgraded_until[task] = time.time() + self.cooldown_seconds
+            self.downgrades += 1
+        metrics.LLM_DOWNGRADES.inc(task)
+        logger.warning(f"{task} 最近调用耗时中位数 {recent:.1f}s 超过目标 {target}s，"
+                       f"{self.cooldown_seconds}s 内改用 {self.tiers[SMALL][0]}")
+    
+    def stats(self):
+        """各任务使用的模型和当前处于降级期的任务"""
+        now = time.time()
+        with self._lock:
+            downgraded = {task: round(until - now, 1) for task, until in self._downgraded_until.items()
+                          if until > now}
+        return {
+            'tiers': {tier: {'model': model, 'options': options} for tier, (model, options) in self.tiers.items()},
+            'task_tiers': dict(self.task_tiers),
+            'latency_targets': dict(self.latency_targets),
+            'downgraded': downgraded,
+            'downgrades': self.downgrades
+        }
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+def get_model_router():
+    """进程内共享的模型路由"""
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            _model_router = ModelRouter(
+                {
+                    LARGE: (config.LLM_MODEL_LARGE, json.loads(config.LLM_OPTIONS_LARGE)),
+                    SMALL: (config.LLM_MODEL_SMALL, json.loads(config.LLM_OPTIONS_SMALL))
+                },
+                _parse_pairs(config.LLM_TASK_TIERS),
+                _parse_pairs(config.LLM_LATENCY_TARGETS, float),
+                config.LLM_LATENCY_WINDOW,
+                config.LLM_DOWNGRADE_SECONDS
+            )
+        return _model_router
@@ -1,29 +1,32 @@
-import requests
+from services.ollama_client import post_generate
 import json
 import re
+from services.model_router import get_model_router
+from services.response_cache import get_response_cache, prompt_fingerprint
+from utils import metrics
+import config
 
 class NeedAnalysisService:
     """需求分析服务"""
     
     def __init__(self):
-        self.ollama_api = "http://127.0.0.1:11434/api/generate"
-        self.model = "deepseek-r1:8b"
+        self.ollama_api = config.OLLAMA_API
     
     def analyze_learning_need(self, goal):
         """分析学习需求"""
         try:
+            # 优先使用缓存的分析结果
+            cache = get_response_cache()
+            if cache is not None:
+                analysis_data = cache.get('need_analysis', goal, self.prompt_fingerprint())
+                if analysis_data is not None:
+                    return analysis_data
+            
             # 构建提示词
             prompt = self._build_prompt(goal)
             
             # 调用Ollama API
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'need_analysis')
             
             if response.status_code != 200:
                 raise Exception(f"Ollama API调用失败: {response.text}")
@@ -40,13 +43,22 @@ class NeedAnalysisService:
             json_str = json_match.group(0)
             analysis_data = json.loads(json_str)
             
+            # 降级为小模型时的输出不按配置模型的指纹缓存
+            if cache is not None and not get_model_router().downgraded('need_analysis', response.model_tier):
+                cache.put('need_analysis', goal, self.prompt_fingerprint(), analysis_data)
+            
             return analysis_data
             
         except Exception as e:
             print(f"分析学习需求失败: {str(e)}")
             # 返回一个默认的分析结果
+            metrics.record_fallback('need_analysis')
             return self._get_default_analysis(goal)
     
+    def prompt_fingerprint(self):
+        """需求分析提示词和模型的指纹，作为响应缓存键的一部分"""
+        return prompt_fingerprint(*get_model_router().configuration('need_analysis'), self._build_prompt('{goal}'))
+    
     def _build_prompt(self, goal):
         """构建提示词"""
         return f"""
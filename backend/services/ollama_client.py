@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from services.llm_ledger import REPLAY, get_llm_ledger, prompt_hash
+from services.model_router import get_model_router
+from utils import metrics
+import config
+
+# 进程内共享的 HTTP 会话，复用到 Ollama 的连接；连接池大小与允许同时等待的调用数一致
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_maxsize=config.OLLAMA_MAX_CONCURRENCY or 100))
+_session.mount('https://', HTTPAdapter(pool_maxsize=config.OLLAMA_MAX_CONCURRENCY or 100))
+_slots = threading.BoundedSemaphore(config.OLLAMA_MAX_CONCURRENCY) if config.OLLAMA_MAX_CONCURRENCY > 0 else None
+_cancel_state = threading.local()
+
+class GenerationCancelled(Exception):
+    """生成已被取消，在下一次调用模型之前中止"""
+
+@contextmanager
+def cancellable(event):
+    """在此范围内（当前线程），每次调用模型之前检查 event，已设置时抛出 GenerationCancelled"""
+    previous = getattr(_cancel_state, 'event', None)
+    _cancel_state.event = event
+    try:
+        yield
+    finally:
+        _cancel_state.event = previous
+
+def _check_cancelled():
+    event = getattr(_cancel_state, 'event', None)
+    if event is not None and event.is_set():
+        raise GenerationCancelled()
+
+@contextmanager
+def _slot(task):
+    """占用一个调用名额，超出 EVELYN_OLLAMA_MAX_CONCURRENCY 时排队等待（等待时间计入运行指标）"""
+    if _slots is None:
+        yield
+        return
+    started = time.perf_counter()
+    _slots.acquire()
+    metrics.OLLAMA_SLOT_WAIT.observe(task, value=time.perf_counter() - started)
+    try:
+        yield
+    finally:
+        _slots.release()
+
+def _release_db_connection():
+    """
+    等待模型响应之前归还本请求占用的数据库连接
+    
+    生成要持续几秒到几分钟，协程工作模式下一个进程可同时等待上百个生成，一直占用连接时连接池很快耗尽，
+    只读数据库的接口也会被阻塞。会话中有未提交的修改时不处理；关闭会话后已加载的对象仍可读取已加载的属性，
+    之后的查询会重新取得连接。
+    """
+    from flask import has_app_context
+    if not has_app_context():
+        return
+    from models.user import db
+    session = db.session
+    if session.new or session.dirty or session.deleted:
+        return
+    session.close()
+
+def _make_response(status_code, body):
+    """构造与 requests.post 返回值相同的响应对象（回放时使用）"""
+    response = requests.models.Response()
+    response.status_code = status_code
+    response._content = body
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    return response
+
+def _replay(ledger, key, task):
+    """
+    从调用账本回放响应：按 EVELYN_LLM_REPLAY_SPEED 缩放原始耗时后返回（0 表示不等待）
+    
+    没有记录时，允许穿透则返回None（由调用方请求模型并记录），否则返回 404 响应，
+    调用方按调用失败处理（与模型不可用时一样回退到默认结果）。
+    """
+    started = time.perf_counter()
+    entry = ledger.lookup(key)
+    if entry is None:
+        if config.LLM_REPLAY_PASSTHROUGH:
+            return None
+        metrics.observe_ollama(task, time.perf_counter() - started, 'replay_miss')
+        return _make_response(404, b'{"error": "no recorded response for this prompt"}')
+    
+    body, duration = entry
+    if config.LLM_REPLAY_SPEED > 0:
+        time.sleep(duration * config.LLM_REPLAY_SPEED)
+    response = _make_response(200, body)
+    metrics.observe_ollama(task, time.perf_counter() - started, 'replay', response.json())
+    return response
+
+def post_generate(api, prompt, task, timeout=None):
+    """
+    调用 Ollama 的 /api/generate（非流式），并记录调用耗时和 token 统计
+    
+    模型和请求参数由模型路由按调用用途选择，调用耗时反馈给模型路由，用于超过耗时目标时降级。
+    响应体中的 prompt_eval_count、eval_count、eval_duration 计入运行指标，
+    返回值与 requests.post 相同，由调用方检查状态码并解析响应；响应对象的 model_tier 属性为本次实际使用的
+    模型级别，降级期间为小模型，调用方据此避免把降级的输出按大模型的指纹缓存。
+    启用调用账本时，记录模式下追加每次成功的调用，回放模式下直接返回记录的响应。
+    发送请求前归还本请求占用的数据库连接，请求通过进程内共享的会话发送。
+    在 cancellable 范围内调用时，发送请求之前（含排队取得名额之后）检查是否已取消。
+    
+    Args:
+        api: 生成接口地址
+        prompt: 提示词
+        task: 调用用途，决定使用的模型，并作为指标的标签（如 need_analysis / learning_path）
+        timeout: 请求超时时间（秒）
+    """
+    _check_cancelled()
+    router = get_model_router()
+    tier, model, model_options = router.route(task)
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": False
+    }
+    if model_options:
+        payload["options"] = model_options
+    ledger = get_llm_ledger()
+    options = {name: value for name, value in payload.items() if name not in ('model', 'prompt')}
+    key = prompt_hash(model, prompt, options) if ledger is not None else None
+    if ledger is not None and config.LLM_LEDGER_MODE == REPLAY:
+        response = _replay(ledger, key, task)
+        if response is not None:
+            response.model_tier = tier
+            return response
+    
+    _release_db_connection()
+    with _slot(task):
+        _check_cancelled()
+        started = time.perf_counter()
+        try:
+            response = _session.post(api, json=payload, timeout=timeout)
+        except requests.RequestException:
+            metrics.observe_ollama(task, time.perf_counter() - started, 'error')
+            router.observe(task, tier, time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+    response.model_tier = tier
+    if response.status_code != 200:
+        metrics.observe_ollama(task, elapsed, 'http_error')
+        return response
+    try:
+        result = response.json()
+    except ValueError:
+        result = None
+    metrics.observe_ollama(task, elapsed, 'ok', result)
+    router.observe(task, tier, elapsed)
+    if ledger is not None and result is not None:
+        ledger.append(task, key, model, options, response.status_code, response.content, elapsed, result)
+    return response
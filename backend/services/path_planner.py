@@ -0,0 +1,277 @@
+import heapq
+import logging
+import re
+from services.graph_store import get_query_graph
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DIFFICULTY_ORDER = {'初级': 0, '中级': 1, '高级': 2}
+STAGE_LABELS = {'初级': '入门', '中级': '进阶', '高级': '精通'}
+STAGE_GOALS = {
+    '初级': '理解{skill}的基础概念，完成入门练习',
+    '中级': '掌握{skill}的核心技能，能够独立完成实战项目',
+    '高级': '深入{skill}的高级主题与底层原理'
+}
+RESOURCE_TYPE_NAMES = {'course': '课程', 'book': '书籍', 'tool': '工具', 'article': '文章'}
+# 单个资源的预计学习时长（小时），按类型和难度估算
+RESOURCE_HOURS = {
+    ('course', '初级'): 10, ('course', '中级'): 20, ('course', '高级'): 30,
+    ('book', '初级'): 15, ('book', '中级'): 25, ('book', '高级'): 35
+}
+DEFAULT_RESOURCE_HOURS = 15
+# 学习时间描述换算为小时：按每天2小时、每周10小时、每月40小时估算
+DURATION_UNITS = (('小时', 1), ('天', 2), ('周', 10), ('星期', 10), ('个月', 40), ('月', 40), ('年', 480))
+LEVEL_KEYWORDS = (
+    ('高级', ('精通', '高级', '深入', '资深', '专家')),
+    ('中级', ('进阶', '中级', '提升', '有基础', '提高')),
+    ('初级', ('零基础', '入门', '初学', '新手', '初级'))
+)
+
+_NUMBER_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+_BUDGET_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(万)?\s*(?:元|块|rmb)', re.IGNORECASE)
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(' + '|'.join(unit for unit, _ in DURATION_UNITS) + ')')
+
+def parse_budget(value):
+    """将预算（数字或"1000元"等文本）转换为金额，无法识别或不大于0时返回None（不限制）"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not value:
+        return None
+    text = str(value)
+    match = _BUDGET_PATTERN.search(text) or _NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    amount = float(match.group(1))
+    if match.re is _BUDGET_PATTERN and match.group(2):
+        amount *= 10000
+    return amount if amount > 0 else None
+
+def parse_duration_hours(value):
+    """将学习时间（"3个月"、"100小时"等）换算为小时，无法识别时返回None（不限制）"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not value:
+        return None
+    match = _DURATION_PATTERN.search(str(value))
+    if not match:
+        return None
+    hours_per_unit = dict(DURATION_UNITS)[match.group(2)]
+    return float(match.group(1)) * hours_per_unit
+
+def parse_goal(goal, known_skills):
+    """
+    不调用大模型，从学习目标文本中提取规划所需的信息
+    
+    技能取知识图谱中已有且出现在目标文本里的技能名称（较长的名称优先匹配）。
+    
+    Returns:
+        dict: 与 analyze_learning_goal 相同结构的信息
+    """
+    text = goal.lower()
+    skills = []
+    covered = []
+    for skill in sorted(known_skills, key=len, reverse=True):
+        if len(skill) < 2 or skill not in text:
+            continue
+        # 已被更长技能名覆盖的子串不重复匹配（例如 "java" 与 "javascript"）
+        if any(skill in longer for longer in covered):
+            continue
+        covered.append(skill)
+        skills.append(skill)
+    skills.sort(key=text.find)
+    
+    level = '初级'
+    for candidate, keywords in LEVEL_KEYWORDS:
+        if any(keyword in goal for keyword in keywords):
+            level = candidate
+            break
+    
+    budget_match = _BUDGET_PATTERN.search(goal)
+    duration_match = _DURATION_PATTERN.search(goal)
+    return {
+        'domain': '',
+        'skills': skills,
+        'level': level,
+        'duration': duration_match.group(0) if duration_match else '',
+        'budget': budget_match.group(0) if budget_match else 0,
+        'purpose': ''
+    }
+
+class PathPlanner:
+    """
+    基于知识图谱的确定性学习路径规划
+    
+    从图谱中选取目标技能的课程和书籍，按前置关系拓扑排序并分组为阶段，
+    同时满足预算和学习时间限制。输出与大模型生成的学习路径结构相同。
+    """
+    
+    def __init__(self, graph=None, resources_per_stage=3):
+        self.graph = graph
+        self.resources_per_stage = resources_per_stage
+    
+    def plan(self, goal, goal_info=None):
+        """
+        规划学习路径
+        
+        Args:
+            goal: 学习目标文本
+            goal_info: analyze_learning_goal 的分析结果，为空时从目标文本中直接提取
+        
+        Returns:
+            dict: 学习路径数据，图谱中没有相关资源时返回None
+        """
+        graph = self.graph or get_query_graph()
+        if goal_info is None:
+            goal_info = parse_goal(goal, graph.skills())
+        
+        skills = goal_info.get('skills') or []
+        if isinstance(skills, str):
+            skills = [skills]
+        skills = [str(skill).strip().lower() for skill in skills if str(skill).strip()]
+        if not skills:
+            return None
+        
+        level = goal_info.get('level') if goal_info.get('level') in DIFFICULTY_ORDER else '初级'
+        budget = parse_budget(goal_info.get('budget'))
+        max_hours = parse_duration_hours(goal_info.get('duration'))
+        
+        candidates = self.select_candidates(graph, skills, level)
+        if not candidates:
+            return None
+        
+        ordered = self._topological_order(graph, candidates)
+        selected = self._apply_limits(ordered, candidates, budget, max_hours)
+        if not selected:
+            return None
+        return self._build_path(goal, selected, candidates)
+    
+    def select_candidates(self, graph, skills, level):
+        """
+        每个技能、每个不低于用户基础的难度，选取评分最高的若干资源（尽量同时包含课程和书籍）
+        
+        Returns:
+            dict: 节点ID -> (节点, 技能)
+        """
+        min_rank = DIFFICULTY_ORDER[level]
+        candidates = {}
+        for skill in skills:
+            for difficulty, rank in DIFFICULTY_ORDER.items():
+                if rank < min_rank:
+                    continue
+                nodes = [graph.get_node(node_id) for node_id in graph.nodes_for_skill(skill, difficulty=difficulty)]
+                nodes.sort(key=lambda node: (-node['rating'], node['price'], node['id']))
+                
+                picked = []
+                for node_type in ('course', 'book'):
+                    first = next((node for node in nodes if node['type'] == node_type), None)
+                    if first is not None:
+                        picked.append(first)
+                for node in nodes:
+                    if len(picked) >= self.resources_per_stage:
+                        break
+                    if node not in picked:
+                        picked.append(node)
+                
+                for node in picked[:self.resources_per_stage]:
+                    candidates.setdefault(node['id'], (node, skill))
+        return candidates
+    
+    def _topological_order(self, graph, candidates):
+        """
+        按前置关系对候选节点拓扑排序（Kahn算法，同层按难度、评分排序以保证结果确定）
+        
+        Returns:
+            list: [(节点ID, 阶段层级)]，阶段层级为该节点在前置关系中的最长路径深度
+        """
+        in_degree = {node_id: 0 for node_id in candidates}
+        successors = {}
+        for node_id in candidates:
+            targets = [target for target in graph.successors(node_id, 'prerequisite') if target in candidates]
+            successors[node_id] = targets
+            for target in targets:
+                in_degree[target] += 1
+        
+        def sort_key(node_id):
+            node = candidates[node_id][0]
+            return (DIFFICULTY_ORDER.get(node['difficulty'], 1), -node['rating'], node_id)
+        
+        depth = {node_id: 0 for node_id in candidates}
+        heap = [(sort_key(node_id), node_id) for node_id, degree in in_degree.items() if degree == 0]
+        heapq.heapify(heap)
+        ordered = []
+        while heap:
+            _, node_id = heapq.heappop(heap)
+            ordered.append(node_id)
+            for target in successors[node_id]:
+                depth[target] = max(depth[target], depth[node_id] + 1)
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    heapq.heappush(heap, (sort_key(target), target))
+        
+        if len(ordered) < len(candidates):
+            # 存在环时，剩余节点按排序键追加在最后
+            visited = set(ordered)
+            ordered.extend(sorted((node_id for node_id in candidates if node_id not in visited), key=sort_key))
+        return [(node_id, depth[node_id]) for node_id in ordered]
+    
+    def _apply_limits(self, ordered, candidates, budget, max_hours):
+        """按拓扑顺序依次加入资源，超出预算或学习时间的资源跳过"""
+        selected = []
+        spent = 0.0
+        hours = 0.0
+        for node_id, depth in ordered:
+            node = candidates[node_id][0]
+            price = float(node['price'] or 0)
+            node_hours = RESOURCE_HOURS.get((node['type'], node['difficulty']), DEFAULT_RESOURCE_HOURS)
+            if budget is not None and spent + price > budget:
+                continue
+            if max_hours is not None and selected and hours + node_hours > max_hours:
+                continue
+            spent += price
+            hours += node_hours
+            selected.append((node_id, depth, node_hours))
+        return selected
+    
+    def _build_path(self, goal, selected, candidates):
+        """按 (前置深度, 难度) 分组为阶段，生成学习路径数据"""
+        groups = {}
+        for node_id, depth, node_hours in selected:
+            node, skill = candidates[node_id]
+            key = (depth, DIFFICULTY_ORDER.get(node['difficulty'], 1))
+            groups.setdefault(key, []).append((node, skill, node_hours))
+        
+        stages = []
+        total_hours = 0
+        for index, key in enumerate(sorted(groups), start=1):
+            items = groups[key]
+            difficulty = items[0][0]['difficulty']
+            stage_skills = list(dict.fromkeys(skill for _, skill, _ in items))
+            stage_hours = sum(node_hours for _, _, node_hours in items)
+            total_hours += stage_hours
+            label = STAGE_LABELS.get(difficulty, '学习')
+            stages.append({
+                'name': f"{'、'.join(stage_skills)}{label}",
+                'description': f"通过{len(items)}个精选资源完成{'、'.join(stage_skills)}的{label}阶段学习。",
+                'estimated_time': f"{stage_hours}小时",
+                'resources': [self._format_resource(node) for node, _, _ in items],
+                'goals': [STAGE_GOALS.get(difficulty, '掌握{skill}').format(skill=skill) for skill in stage_skills]
+            })
+        
+        all_skills = list(dict.fromkeys(skill for _, skill in candidates.values()))
+        return {
+            'title': f"{'、'.join(all_skills)}学习路径",
+            'description': f"根据学习目标「{goal}」从知识图谱中选取资源，按前置关系由浅入深安排的学习路径。",
+            'estimated_time': f"{total_hours}小时",
+            'stages': stages
+        }
+    
+    def _format_resource(self, node):
+        """将图谱节点转换为学习路径中的资源格式"""
+        return {
+            'type': RESOURCE_TYPE_NAMES.get(node['type'], node['type']),
+            'name': node['title'],
+            'link': node['url'],
+            'description': node['description'],
+            'price': str(node['price'])
+        }
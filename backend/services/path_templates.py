@@ -0,0 +1,119 @@
+from services.path_planner import DIFFICULTY_ORDER
+import config
+import copy
+import json
+import logging
+import os
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GENERAL_DOMAIN = '通用'
+DEFAULT_LEVEL = '零基础'
+# 需求分析的基础水平与模板等级的顺序，零基础排在最前
+LEVEL_ORDER = {DEFAULT_LEVEL: -1, **DIFFICULTY_ORDER}
+
+class PathTemplateLibrary:
+    """
+    学习路径模板库
+    
+    模板保存在 JSON 文件中，按领域和基础水平索引：
+        {
+            "levels": {"初级": ["进阶", ...], ...},        // 基础水平 -> 关键词
+            "domains": {"编程": ["python", ...], ...},     // 领域 -> 关键词
+            "templates": [{"domain": "编程", "level": "零基础", "path": {学习路径}}, ...]
+        }
+    文件修改后在下一次匹配时自动重新加载，便于运营直接维护模板而不必重启服务。
+    """
+    
+    def __init__(self, path=None):
+        self.path = path or config.PATH_TEMPLATE_LIBRARY_PATH
+        self.levels = {}
+        self.domains = {}
+        self.templates = {}  # (领域, 基础水平) -> 学习路径
+        self._mtime = None
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """读取模板文件（文件未修改时直接返回）"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self
+        if mtime == self._mtime:
+            return self
+        with self._lock:
+            if mtime == self._mtime:
+                return self
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"读取学习路径模板库失败: {str(e)}")
+                return self
+            self.levels = {level: [word.lower() for word in words] for level, words in data.get('levels', {}).items()}
+            self.domains = {domain: [word.lower() for word in words] for domain, words in data.get('domains', {}).items()}
+            self.templates = {
+                (template['domain'], template.get('level', DEFAULT_LEVEL)): template['path']
+                for template in data.get('templates', [])
+            }
+            self._mtime = mtime
+            logger.info(f"已加载学习路径模板库: {len(self.templates)} 个模板")
+        return self
+    
+    def classify(self, goal):
+        """
+        按关键词判断学习目标的领域和基础水平
+        
+        Returns:
+            tuple: (领域, 基础水平)，没有命中任何领域关键词时领域为"通用"
+        """
+        goal_lower = (goal or '').lower()
+        domain = GENERAL_DOMAIN
+        best = 0
+        for name, words in self.domains.items():
+            hits = sum(1 for word in words if word in goal_lower)
+            if hits > best:
+                domain, best = name, hits
+        level = DEFAULT_LEVEL
+        for name, words in self.levels.items():
+            if any(word in goal_lower for word in words):
+                level = name
+        return domain, level
+    
+    def match(self, goal, domain=None, level=None):
+        """
+        为学习目标选择最合适的模板：同领域同水平，其次同领域最接近的水平，最后是通用模板
+        
+        Args:
+            goal: 学习目标
+            domain: 领域（如需求分析已给出），为空时按关键词判断
+            level: 基础水平，为空时按关键词判断
+        
+        Returns:
+            tuple: (学习路径副本, 是否命中具体领域)，模板库为空时返回 (None, False)
+        """
+        self.load()
+        guessed_domain, guessed_level = self.classify(goal)
+        domain = domain if domain in self.domains else guessed_domain
+        level = level if level in LEVEL_ORDER else guessed_level
+        
+        for candidate in (domain, GENERAL_DOMAIN):
+            levels = [key[1] for key in self.templates if key[0] == candidate]
+            if not levels:
+                continue
+            nearest = min(levels, key=lambda name: abs(LEVEL_ORDER.get(name, 0) - LEVEL_ORDER.get(level, 0)))
+            return copy.deepcopy(self.templates[(candidate, nearest)]), candidate != GENERAL_DOMAIN
+        return None, False
+
+_library = None
+_library_lock = threading.Lock()
+
+def get_template_library():
+    """进程内共享的模板库"""
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = PathTemplateLibrary()
+        return _library
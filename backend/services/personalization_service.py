@@ -1,10 +1,10 @@
-import datetime
 import logging
 import math
 import json
-from models.user_behavior import UserBehavior
 from models.learning_path import LearningPath
 from services.knowledge_service import KnowledgeService
+from services.behavior_profile_service import BehaviorProfileService
+from services.frustration_monitor import frustration_monitor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,6 +14,7 @@ class PersonalizationService:
     
     def __init__(self):
         self.knowledge_service = KnowledgeService()
+        self.behavior_profile_service = BehaviorProfileService()
     
     def detect_frustration(self, user_id):
         """
@@ -25,54 +26,8 @@ class PersonalizationService:
         Returns:
             list: 用户遇到挫折的技能列表，如果没有检测到挫折则返回空列表
         """
-        # 获取用户最近的搜索行为（增加数量以提高准确性）
-        recent_behaviors = UserBehavior.query.filter_by(user_id=user_id).order_by(
-            UserBehavior.timestamp.desc()
-        ).limit(30).all()
-        
-        if not recent_behaviors:
-            logger.info(f"用户 {user_id} 没有足够的行为数据进行挫折检测")
-            return []
-        
-        # 分析搜索关键词，检测挫折信号
-        frustration_keywords = ["太难了", "看不懂", "不理解", "困难", "放弃", "help", "难度大", 
-                               "confused", "stuck", "不会", "问题", "错误", "失败", "卡住"]
-        frustrated_skills = {}
-        
-        # 记录最近一周的行为
-        one_week_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-        
-        for behavior in recent_behaviors:
-            # 只考虑最近一周的行为
-            if behavior.timestamp < one_week_ago:
-                continue
-                
-            # 检查标题和搜索查询
-            text_to_check = ""
-            if behavior.search_query:
-                text_to_check += behavior.search_query.lower() + " "
-            #if behavior.title:
-            #    text_to_check += behavior.title.lower() + " "
-                
-            if not text_to_check:
-                continue
-            
-            # 检查是否包含挫折关键词
-            has_frustration = False
-            for keyword in frustration_keywords:
-                if keyword in text_to_check:
-                    has_frustration = True
-                    break
-                    
-            if has_frustration:
-                # 提取可能的技能名称
-                words = text_to_check.split()
-                for word in words:
-                    if word not in frustration_keywords and len(word) > 2:
-                        frustrated_skills[word] = frustrated_skills.get(word, 0) + 1
-        
-        # 返回出现频率超过3次的技能（降低阈值以提高敏感度）
-        result = [skill for skill, count in frustrated_skills.items() if count >= 3]
+        # 挫折信号在记录行为时增量计算，这里直接读取结果
+        result = frustration_monitor.get_frustrated_skills(user_id)
         
         logger.info(f"用户 {user_id} 的挫折检测结果: {result}")
         return result
@@ -97,7 +52,7 @@ class PersonalizationService:
         
         # 解析路径数据
         try:
-            path_data = json.loads(path.path_data) if isinstance(path.path_data, str) else path.path_data
+            path_data = path.get_path_data()
         except Exception as e:
             logger.error(f"解析路径数据失败: {str(e)}")
             return None
@@ -157,12 +112,10 @@ class PersonalizationService:
         Returns:
             str: 调整后的学习路径数据（JSON字符串），如果生成失败则返回None
         """
-        # 获取用户行为数据
-        behaviors = UserBehavior.query.filter_by(user_id=user_id).order_by(
-            UserBehavior.timestamp.desc()
-        ).limit(50).all()
+        # 获取用户最常访问的域名和搜索关键词（来自按时间衰减的频繁项统计）
+        top_domains, top_keywords = self.behavior_profile_service.get_top_interests(user_id)
         
-        if not behaviors:
+        if not top_domains and not top_keywords:
             return None
         
         # 获取原始学习路径
@@ -171,34 +124,14 @@ class PersonalizationService:
             return None
         
         # 解析路径数据
-        path_data = json.loads(path.path_data) if isinstance(path.path_data, str) else path.path_data
-        
-        # 分析用户行为，提取兴趣和倾向
-        domains = {}
-        keywords = {}
-        
-        for behavior in behaviors:
-            # 分析域名
-            if behavior.url:
-                domain = behavior.url.split('/')[2] if '/' in behavior.url else ''
-                domains[domain] = domains.get(domain, 0) + 1
-            
-            # 分析搜索关键词
-            if behavior.search_query:
-                for keyword in behavior.search_query.split():
-                    if len(keyword) > 2:
-                        keywords[keyword] = keywords.get(keyword, 0) + 1
-        
-        # 获取用户最常访问的域名和搜索关键词
-        top_domains = sorted(domains.items(), key=lambda x: x[1], reverse=True)[:5]
-        top_keywords = sorted(keywords.items(), key=lambda x: x[1], reverse=True)[:10]
+        path_data = path.get_path_data()
         
         # 构建提示词，请求调整路径
         prompt = f"""
         根据用户的浏览行为，请调整以下学习路径，使其更符合用户的兴趣和倾向。
         
-        用户常访问的网站: {', '.join([domain for domain, _ in top_domains])}
-        用户常搜索的关键词: {', '.join([keyword for keyword, _ in top_keywords])}
+        用户常访问的网站: {', '.join(top_domains)}
+        用户常搜索的关键词: {', '.join(top_keywords)}
         
         原始学习路径:
         {json.dumps(path_data, ensure_ascii=False, indent=2)}
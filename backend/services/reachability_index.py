@@ -0,0 +1,394 @@
+import logging
+import threading
+from services.graph_store import get_query_graph
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _iter_bits(bits):
+    """遍历整数位集中被置位的下标"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class ReachabilityIndex:
+    """
+    前置关系的传递闭包索引
+    
+    节点按弱连通分组，组内为每个节点分配局部下标，用 Python 整数位集保存每个节点的全部
+    后继（desc）和全部前驱（anc）。前置关系只在同一技能内建立，分组通常很小，位集也很短。
+    
+    - 构建：Tarjan 算法求强连通分量，在缩点后的有向无环图上按逆拓扑序合并位集
+    - 增量更新：新增边 s -> t 时，s 及其所有前驱并入 t 的后继集合，t 及其所有后继并入 s 的前驱集合；
+      跨组的边先把较小的组合并进较大的组（位集整体左移）
+    - 查询：A 是否为 B 的前置为一次位运算；前置闭包的开销与结果数量成正比
+    
+    读写都在同一把锁下进行，订阅图谱增量更新时查询也不会看到合并到一半的分组。
+    """
+    
+    def __init__(self, relation='prerequisite'):
+        self.relation = relation
+        self._group_of = {}  # 节点ID -> 组ID
+        self._local = {}  # 节点ID -> 组内下标
+        self._members = {}  # 组ID -> [节点ID]（按组内下标排列）
+        self._desc = {}  # 节点ID -> 后继位集（不含自身，除非在环上）
+        self._anc = {}  # 节点ID -> 前驱位集
+        self._next_group = 0
+        self.source = None  # 构建索引时使用的图谱
+        self._attached = []  # 订阅了新增边的图谱
+        self._resource_keys = {}  # 资源链接 / 小写标题 -> 节点ID（仅记录有前置关系的节点）
+        self.stale = False  # 订阅的图谱删除过边，传递闭包无法增量撤销，需要重新构建
+        self._lock = threading.RLock()
+    
+    # ---- 构建 ----
+    
+    def build(self, graph):
+        """从 KnowledgeGraph 或 CompactGraph 构建索引"""
+        with self._lock:
+            ids, adjacency = self._load_edges(graph)
+            self._group_of.clear()
+            self._local.clear()
+            self._members.clear()
+            self._desc.clear()
+            self._anc.clear()
+            self._resource_keys.clear()
+            self._next_group = 0
+            self.source = graph
+            self.stale = False
+            
+            # 1. 并查集求弱连通分组，分配组内下标
+            parent = list(range(len(ids)))
+            
+            def find(x):
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+            
+            for source, targets in enumerate(adjacency):
+                for target in targets:
+                    root_a, root_b = find(source), find(target)
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+            
+            group_ids = {}
+            local = [0] * len(ids)
+            for position, node_id in enumerate(ids):
+                root = find(position)
+                group_id = group_ids.get(root)
+                if group_id is None:
+                    group_id = group_ids[root] = self._new_group()
+                members = self._members[group_id]
+                local[position] = len(members)
+                members.append(node_id)
+                self._group_of[node_id] = group_id
+                self._local[node_id] = local[position]
+            
+            # 2. 强连通分量（按逆拓扑序给出），合并后继位集
+            desc = [0] * len(ids)
+            for component in self._strongly_connected(adjacency):
+                members = set(component)
+                reach = 0
+                for vertex in component:
+                    for target in adjacency[vertex]:
+                        if target not in members:
+                            reach |= desc[target] | (1 << local[target])
+                if len(component) > 1 or component[0] in adjacency[component[0]]:
+                    for vertex in component:
+                        reach |= 1 << local[vertex]
+                for vertex in component:
+                    desc[vertex] = reach
+            
+            # 3. 由后继位集转置得到前驱位集
+            for position, bits in enumerate(desc):
+                if not bits:
+                    continue
+                node_id = ids[position]
+                self._desc[node_id] = bits
+                members = self._members[self._group_of[node_id]]
+                node_bit = 1 << local[position]
+                for index in _iter_bits(bits):
+                    other = members[index]
+                    self._anc[other] = self._anc.get(other, 0) | node_bit
+            
+            for node_id in set(self._desc) | set(self._anc):
+                self._register_resource(node_id)
+        logger.info(f"前置关系索引构建完成：{len(self._group_of)} 个节点，{len(self._members)} 个分组")
+        return self
+    
+    def attach(self, graph):
+        """订阅 KnowledgeGraph 的边变化：新增的边增量更新索引，删除边时标记为需要重新构建"""
+        with self._lock:
+            self._attached.append(graph)
+        
+        def on_edge(source_id, target_id, relation, added):
+            if relation != self.relation:
+                return
+            if added:
+                self.add_edge(source_id, target_id)
+            else:
+                self.stale = True
+        graph.add_edge_listener(on_edge)
+        return self
+    
+    def add_edge(self, source_id, target_id):
+        """增量加入一条边"""
+        with self._lock:
+            for node_id in (source_id, target_id):
+                if node_id not in self._group_of:
+                    group_id = self._new_group()
+                    self._members[group_id].append(node_id)
+                    self._group_of[node_id] = group_id
+                    self._local[node_id] = 0
+                    self._register_resource(node_id)
+            
+            if self._group_of[source_id] != self._group_of[target_id]:
+                self._merge_groups(self._group_of[source_id], self._group_of[target_id])
+            
+            target_bit = 1 << self._local[target_id]
+            if self._desc.get(source_id, 0) & target_bit:
+                return False
+            
+            members = self._members[self._group_of[source_id]]
+            new_desc = self._desc.get(target_id, 0) | target_bit
+            new_anc = self._anc.get(source_id, 0) | (1 << self._local[source_id])
+            for index in _iter_bits(new_anc):
+                node_id = members[index]
+                self._desc[node_id] = self._desc.get(node_id, 0) | new_desc
+            for index in _iter_bits(new_desc):
+                node_id = members[index]
+                self._anc[node_id] = self._anc.get(node_id, 0) | new_anc
+            return True
+    
+    # ---- 查询 ----
+    
+    def is_upstream(self, source_id, target_id):
+        """source 是否为 target 的（直接或间接）前置"""
+        with self._lock:
+            group_id = self._group_of.get(source_id)
+            if group_id is None or group_id != self._group_of.get(target_id):
+                return False
+            return bool(self._desc.get(source_id, 0) >> self._local[target_id] & 1)
+    
+    def prerequisites(self, node_id):
+        """节点的全部（直接或间接）前置节点ID"""
+        return self._expand(node_id, self._anc)
+    
+    def dependents(self, node_id):
+        """以该节点为前置的全部节点ID"""
+        return self._expand(node_id, self._desc)
+    
+    def missing_prerequisites(self, node_ids, known_ids=()):
+        """
+        检查一组节点（如学习路径中的资源）缺少的前置
+        
+        Args:
+            node_ids: 按学习顺序排列的节点ID
+            known_ids: 用户已经掌握的节点ID
+        
+        Returns:
+            dict: 节点ID -> {'missing': [不在路径中的前置], 'out_of_order': [在路径中但排在后面的前置]}
+        """
+        position = {}
+        for index, node_id in enumerate(node_ids):
+            position.setdefault(node_id, index)
+        known = set(known_ids)
+        
+        result = {}
+        for index, node_id in enumerate(node_ids):
+            missing = []
+            out_of_order = []
+            for prerequisite in self.prerequisites(node_id):
+                if prerequisite == node_id or prerequisite in known:
+                    continue
+                if prerequisite not in position:
+                    missing.append(prerequisite)
+                elif position[prerequisite] > index:
+                    out_of_order.append(prerequisite)
+            if missing or out_of_order:
+                result[node_id] = {'missing': sorted(missing), 'out_of_order': sorted(out_of_order)}
+        return result
+    
+    def resolve_resource(self, resource):
+        """将学习路径中的资源（按链接或名称）对应到图谱节点ID，没有对应的节点时返回None"""
+        link = resource.get('link') or resource.get('url')
+        name = resource.get('name') or resource.get('title')
+        with self._lock:
+            if link and link in self._resource_keys:
+                return self._resource_keys[link]
+            if name:
+                return self._resource_keys.get(name.strip().lower())
+            return None
+    
+    def node_info(self, node_id):
+        """从构建或订阅的图谱中获取节点详情"""
+        for graph in [self.source] + self._attached:
+            if graph is None:
+                continue
+            node = graph.get_node(node_id)
+            if node is not None:
+                return node
+        return None
+    
+    def stats(self):
+        """索引统计信息"""
+        with self._lock:
+            return {
+                'nodes': len(self._group_of),
+                'groups': len(self._members),
+                'largest_group': max((len(members) for members in self._members.values()), default=0),
+                'closure_pairs': sum(bin(bits).count('1') for bits in self._desc.values())
+            }
+    
+    # ---- 内部方法 ----
+    
+    def _expand(self, node_id, bitsets):
+        with self._lock:
+            group_id = self._group_of.get(node_id)
+            if group_id is None:
+                return []
+            members = self._members[group_id]
+            return [members[index] for index in _iter_bits(bitsets.get(node_id, 0))]
+    
+    def _register_resource(self, node_id):
+        node = self.node_info(node_id)
+        if node is None:
+            return
+        if node.get('url'):
+            self._resource_keys[node['url']] = node_id
+        if node.get('title'):
+            self._resource_keys.setdefault(node['title'].strip().lower(), node_id)
+    
+    def _new_group(self):
+        group_id = self._next_group
+        self._next_group += 1
+        self._members[group_id] = []
+        return group_id
+    
+    def _merge_groups(self, group_a, group_b):
+        """把较小的组合并进较大的组：较小组的下标整体后移，位集相应左移"""
+        if len(self._members[group_a]) < len(self._members[group_b]):
+            group_a, group_b = group_b, group_a
+        target_members = self._members[group_a]
+        offset = len(target_members)
+        for node_id in self._members.pop(group_b):
+            self._group_of[node_id] = group_a
+            self._local[node_id] += offset
+            if node_id in self._desc:
+                self._desc[node_id] <<= offset
+            if node_id in self._anc:
+                self._anc[node_id] <<= offset
+            target_members.append(node_id)
+    
+    def _load_edges(self, graph):
+        """读取节点ID列表和按下标表示的邻接表"""
+        if hasattr(graph, 'successor_indices'):
+            ids = [graph.string('id', index) for index in range(len(graph))]
+            adjacency = [list(graph.successor_indices(index, self.relation)) for index in range(len(graph))]
+            return ids, adjacency
+        
+        with graph._lock:
+            ids = list(graph.nodes)
+            positions = {node_id: index for index, node_id in enumerate(ids)}
+            out_edges = graph.out_edges[self.relation]
+            adjacency = [[positions[target] for target in out_edges.get(node_id, ()) if target in positions]
+                         for node_id in ids]
+        return ids, adjacency
+    
+    def _strongly_connected(self, adjacency):
+        """非递归的 Tarjan 算法，按逆拓扑序（汇点所在分量在前）返回强连通分量"""
+        index_of = [-1] * len(adjacency)
+        lowlink = [0] * len(adjacency)
+        on_stack = [False] * len(adjacency)
+        stack = []
+        components = []
+        counter = 0
+        
+        for root in range(len(adjacency)):
+            if index_of[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                vertex, edge_index = work.pop()
+                if edge_index == 0:
+                    index_of[vertex] = lowlink[vertex] = counter
+                    counter += 1
+                    stack.append(vertex)
+                    on_stack[vertex] = True
+                recurse = False
+                targets = adjacency[vertex]
+                while edge_index < len(targets):
+                    target = targets[edge_index]
+                    edge_index += 1
+                    if index_of[target] == -1:
+                        work.append((vertex, edge_index))
+                        work.append((target, 0))
+                        recurse = True
+                        break
+                    if on_stack[target]:
+                        lowlink[vertex] = min(lowlink[vertex], index_of[target])
+                if recurse:
+                    continue
+                if lowlink[vertex] == index_of[vertex]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == vertex:
+                            break
+                    components.append(component)
+                if work:
+                    parent_vertex = work[-1][0]
+                    lowlink[parent_vertex] = min(lowlink[parent_vertex], lowlink[vertex])
+        return components
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+_rebuilding = False
+
+def get_prerequisite_index():
+    """
+    获取进程内的前置关系索引
+    
+    索引只从查询图谱（共享的列式文件，不存在时为进程内图谱）构建，与查询使用同一套节点ID；发布后不再修改，
+    读取无需加锁。查询图谱更新后在后台线程中构建新索引并整体替换，构建期间的请求继续使用旧索引；
+    进程内还没有索引时同步构建一次。
+    """
+    global _index, _index_version
+    graph = get_query_graph()
+    version = getattr(graph, 'version', None)
+    index = _index
+    if index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ReachabilityIndex().build(graph)
+                _index_version = version
+            return _index
+    if index.source is not graph or _index_version != version:
+        _schedule_rebuild(graph, version)
+    return index
+
+def _schedule_rebuild(graph, version):
+    """在后台线程中重新构建索引，同一时间只有一个构建任务"""
+    global _rebuilding
+    with _index_lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild, args=(graph, version), name='prerequisite-index', daemon=True).start()
+
+def _rebuild(graph, version):
+    global _index, _index_version, _rebuilding
+    try:
+        index = ReachabilityIndex().build(graph)
+        with _index_lock:
+            _index = index
+            _index_version = version
+    except Exception as e:
+        logger.error(f"重新构建前置关系索引失败: {str(e)}")
+    finally:
+        with _index_lock:
+            _rebuilding = False
@@ -0,0 +1,124 @@
+import logging
+from services.graph_store import get_query_graph
+from services.path_planner import PathPlanner, RESOURCE_TYPE_NAMES, parse_goal
+from services.resource_service import ResourceService
+from utils.text import tokenize
+import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 不区分学习主题的通用词语：只共有这些词语（如 "学习吉他入门" 与 "Python编程从入门到实践" 共有 "入门"）不算相关
+GENERIC_WORDS = frozenset([
+    '入门', '基础', '零基础', '进阶', '初级', '中级', '高级', '精通', '实战', '实践', '教程', '课程', '书籍',
+    '经典', '深入', '讲解', '受欢迎', '平台', '提供', '项目', '工具', '必备', '专业', '之一', '通过', '免费',
+    '大量', '案例', '视频', '编写', '配有', '方法', '工作', '基本', '学习', '想学'
+])
+
+class ResourceCatalog:
+    """
+    学习资源目录：预设资源 + 知识图谱中爬取的课程和书籍
+    
+    生成学习路径前先从目录中检索候选资源，以短ID（R1、R2……）提供给大模型，
+    大模型只需返回阶段结构和资源ID，资源的名称、链接、价格由服务端补全。
+    预设资源只按学习主题词语匹配（忽略通用词语）；未开启页面抓取时知识图谱中是模拟数据，不作为候选。
+    """
+    
+    def __init__(self, graph=None, max_candidates=None):
+        self.graph = graph
+        self.max_candidates = max_candidates or config.PATH_RAG_MAX_CANDIDATES
+        self._preloaded = []
+        self._preloaded_index = {}  # 词语 -> 预设资源下标
+        for resources in ResourceService().preloaded_resources.values():
+            for resource in resources:
+                position = len(self._preloaded)
+                self._preloaded.append(resource)
+                for word in set(tokenize(f"{resource['title']} {resource['description']}")) - GENERIC_WORDS:
+                    self._preloaded_index.setdefault(word, []).append(position)
+    
+    def retrieve(self, goal):
+        """
+        检索与学习目标相关的候选资源
+        
+        Returns:
+            list: [资源记录]，资源记录与学习路径中的资源格式相同，另带 difficulty 字段
+        """
+        candidates = []
+        seen_links = set()
+        
+        # 1. 知识图谱：目标中出现的技能，按难度各取评分最高的资源（未抓取真实页面时图谱是模拟数据，跳过）
+        if config.CRAWLER_FETCH_PAGES:
+            graph = self.graph or get_query_graph()
+            goal_info = parse_goal(goal, graph.skills())
+            if goal_info['skills']:
+                planner = PathPlanner(graph=graph)
+                for node, _ in planner.select_candidates(graph, goal_info['skills'], '初级').values():
+                    record = self._from_node(node)
+                    if record['link'] not in seen_links:
+                        seen_links.add(record['link'])
+                        candidates.append(record)
+        
+        # 2. 预设资源：按与目标共有的主题词语数量排序，只共有通用词语的资源不算相关
+        scores = {}
+        for word in set(tokenize(goal)) - GENERIC_WORDS:
+            for position in self._preloaded_index.get(word, ()):
+                scores[position] = scores.get(position, 0) + 1
+        for position in sorted(scores, key=lambda key: (-scores[key], key)):
+            record = self._from_preloaded(self._preloaded[position])
+            if record['link'] not in seen_links:
+                seen_links.add(record['link'])
+                candidates.append(record)
+        
+        return candidates[:self.max_candidates]
+    
+    def _from_node(self, node):
+        return {
+            'type': RESOURCE_TYPE_NAMES.get(node['type'], node['type']),
+            'name': node['title'],
+            'link': node['url'],
+            'description': node['description'],
+            'price': str(node['price']),
+            'difficulty': node['difficulty']
+        }
+    
+    def _from_preloaded(self, resource):
+        return {
+            'type': RESOURCE_TYPE_NAMES.get(resource['type'], resource['type']),
+            'name': resource['title'],
+            'link': resource['link'],
+            'description': resource['description'],
+            'price': str(resource['price']),
+            'difficulty': resource.get('difficulty', '')
+        }
+
+def assign_short_ids(candidates):
+    """为候选资源分配短ID，返回 {短ID: 资源记录}"""
+    return {f"R{index}": candidate for index, candidate in enumerate(candidates, start=1)}
+
+def format_candidates(id_map):
+    """将候选资源格式化为提示词中的紧凑列表：一行一个资源"""
+    lines = []
+    for short_id, candidate in id_map.items():
+        price = '免费' if candidate['price'] in ('0', '0.0') else f"¥{candidate['price']}"
+        lines.append(f"{short_id} | {candidate['type']} | {candidate['difficulty'] or '-'} | {price} | {candidate['name']}")
+    return '\n'.join(lines)
+
+def expand_resource_ids(path_data, id_map):
+    """
+    将模型返回的阶段资源ID展开为完整的资源记录，未知的ID丢弃
+    
+    Returns:
+        int: 展开的资源数量
+    """
+    expanded = 0
+    for stage in path_data.get('stages', []):
+        resources = []
+        for item in stage.get('resources', []):
+            short_id = item if isinstance(item, str) else (item or {}).get('id')
+            candidate = id_map.get(str(short_id).strip().upper()) if short_id else None
+            if candidate is None:
+                continue
+            resources.append({key: candidate[key] for key in ('type', 'name', 'link', 'description', 'price')})
+        stage['resources'] = resources
+        expanded += len(resources)
+    return expanded
@@ -1,14 +1,15 @@
-import requests
+from services.ollama_client import post_generate
 import json
 from urllib.parse import urlparse
 import re
+from utils import metrics
+import config
 
 class ResourceService:
     """资源推荐服务"""
     
     def __init__(self):
-        self.ollama_api = "http://127.0.0.1:11434/api/generate"
-        self.model = "deepseek-r1:8b"
+        self.ollama_api = config.OLLAMA_API
         
         # 预加载一些常见领域的资源
         self.preloaded_resources = self._load_preloaded_resources()
@@ -166,14 +167,7 @@ class ResourceService:
             """
             
             # 调用Ollama API
-            response = requests.post(
-                self.ollama_api,
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                }
-            )
+            response = post_generate(self.ollama_api, prompt, 'page_resources')
             
             if response.status_code != 200:
                 raise Exception(f"Ollama API调用失败: {response.text}")
@@ -190,8 +184,10 @@ class ResourceService:
                 return resources
             
             # 如果无法解析JSON，返回默认资源
+            metrics.record_fallback('page_resources')
             return self.preloaded_resources["programming"][:3]
             
         except Exception as e:
             print(f"LLM生成资源推荐失败: {str(e)}")
+            metrics.record_fallback('page_resources')
             return self.preloaded_resources["programming"][:3]
\ No newline at end of file
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from utils.text import normalize_goal
+import config
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def prompt_fingerprint(*parts):
+    """提示词模板和模型的指纹：修改提示词或更换模型后旧的缓存自然失效"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:16]
+
+class ResponseCache:
+    """
+    大模型响应缓存，以 (类型, 规范化的学习目标, 提示词指纹) 为键
+    
+    与抓取缓存一样使用独立的 SQLite 文件，不依赖 Flask 应用上下文，可在后台线程、
+    预热脚本和多个工作进程间共享。只缓存模型成功返回的结果，不缓存兜底的默认结果。
+    """
+    
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    kind TEXT NOT NULL,
+                    goal_key TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (kind, goal_key, fingerprint)
+                )
+            ''')
+        self.purge_expired()
+    
+    def get(self, kind, goal, fingerprint):
+        """获取缓存的响应，不存在或已过期时返回None"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT response, created_at FROM response_cache '
+                'WHERE kind = ? AND goal_key = ? AND fingerprint = ?',
+                (kind, normalize_goal(goal), fingerprint)
+            ).fetchone()
+        
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+    
+    def contains(self, kind, goal, fingerprint):
+        """是否已有未过期的缓存（不计入命中统计）"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                'SELECT created_at FROM response_cache WHERE kind = ? AND goal_key = ? AND fingerprint = ?',
+                (kind, normalize_goal(goal), fingerprint)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+    
+    def put(self, kind, goal, fingerprint, response):
+        """写入或覆盖缓存"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO response_cache (kind, goal_key, fingerprint, response, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (kind, normalize_goal(goal), fingerprint, json.dumps(response, ensure_ascii=False), time.time())
+            )
+    
+    def purge_expired(self):
+        """删除过期的记录"""
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute(
+                'DELETE FROM response_cache WHERE created_at < ?',
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+        if deleted:
+            logger.info(f"清理了 {deleted} 条过期的响应缓存")
+    
+    def stats(self):
+        """缓存命中统计"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses
+        }
+    
+    @contextmanager
+    def _connect(self):
+        """打开连接，退出时提交事务并关闭连接"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """进程内共享的响应缓存，未启用时返回None"""
+    global _response_cache
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(config.RESPONSE_CACHE_PATH, config.RESPONSE_CACHE_TTL_SECONDS)
+        return _response_cache
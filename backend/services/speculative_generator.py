@@ -0,0 +1,341 @@
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from services.ollama_client import GenerationCancelled, cancellable
+from utils.text import normalize_goal
+import config
+import logging
+import os
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 推测任务的状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+
+class _Job:
+    """一次推测生成"""
+    __slots__ = ('key', 'goal', 'client', 'state', 'result', 'created_at', 'started_at',
+                 'finished_at', 'cancelled', 'finished', 'on_done')
+    
+    def __init__(self, key, goal, client):
+        self.key = key
+        self.goal = goal
+        self.client = client
+        self.state = QUEUED
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.on_done = None
+    
+    def work_seconds(self):
+        """实际花费的生成时间（秒）"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class SpeculativeGenerator:
+    """
+    推测式学习路径预生成
+    
+    需求分析完成后，在后台以低优先级为同一目标预先生成学习路径，结果按 (客户端, 规范化的目标) 存放，
+    只有发起推测的客户端能取走；随后的创建学习路径请求直接取走结果（生成尚未完成时等待其完成）。
+    
+    - 低优先级：后台线程降低调度优先级，并且只在没有前台生成请求时才开始新的推测任务
+    - 可取消：同一客户端发起新的需求分析时，取消其上一个尚未被取走的推测任务；
+      排队中的任务直接丢弃，运行中的任务在下一次调用模型之前中止
+    - 统计：命中率，以及被取消、过期的推测所浪费的生成时间
+    """
+    
+    def __init__(self, generate_func, workers=None, ttl=None, max_parked=None):
+        self.generate_func = generate_func
+        self.workers = workers or config.SPECULATIVE_WORKERS
+        self.ttl = ttl or config.SPECULATIVE_TTL_SECONDS
+        self.max_parked = max_parked or config.SPECULATIVE_MAX_PARKED
+        self._jobs = OrderedDict()  # (客户端, 规范化的目标) -> _Job（排队、运行中或已完成待取走）
+        self._client_jobs = {}  # 客户端 -> 任务键
+        self._queue = deque()
+        self._foreground = 0  # 正在进行的前台生成请求数
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._threads = []
+        self._stats = {
+            'scheduled': 0,  # 发起的推测任务
+            'hits': 0,  # 被请求取走的推测结果（含等待运行中的任务）
+            'hits_in_flight': 0,  # 其中需要等待生成完成的次数
+            'misses': 0,  # 请求时没有对应的推测任务
+            'cancelled': 0,  # 被取消的推测任务
+            'expired': 0,  # 生成完成但在有效期内未被取走
+            'failed': 0,  # 生成出错的推测任务
+            'wasted_seconds': 0.0,  # 被取消或过期的任务花费的生成时间
+            'saved_seconds': 0.0  # 命中时为请求节省的生成时间
+        }
+    
+    # ---- 推测 ----
+    
+    def speculate(self, goal, client=None, urgent=False, on_done=None):
+        """
+        为学习目标发起推测生成；已有同一目标的任务时不重复发起
+
+        Args:
+            goal: 学习目标
+            client: 客户端标识，同一客户端的新推测会取消上一个
+            urgent: 用户已在等待结果（如先返回了临时模板），排到队首
+            on_done: 生成成功后在工作线程中调用 on_done(结果)（如为登录用户保存），结果仍保留待取走
+        """
+        key = _job_key(goal, client)
+        if key is None:
+            return False
+        with self._condition:
+            self._expire()
+            previous_key = self._client_jobs.get(client)
+            if previous_key is not None and previous_key != key:
+                self._cancel(previous_key)
+            self._client_jobs[client] = key
+            job = self._jobs.get(key)
+            if job is None:
+                job = _Job(key, goal, client)
+                job.on_done = on_done
+                self._jobs[key] = job
+                if urgent:
+                    self._queue.appendleft(job)
+                else:
+                    self._queue.append(job)
+                self._stats['scheduled'] += 1
+                self._ensure_workers()
+                self._condition.notify()
+                return True
+            
+            if urgent and job.state == QUEUED:
+                self._queue.remove(job)
+                self._queue.appendleft(job)
+            # 已有的任务补上完成回调；已经生成完成的立即处理
+            notify = False
+            if on_done is not None and job.on_done is None:
+                job.on_done = on_done
+                notify = job.state == DONE
+        if notify:
+            self._notify_done(job, job.result)
+        return False
+    
+    def cancel(self, goal, client=None):
+        """取消客户端为学习目标发起的推测任务"""
+        with self._condition:
+            return self._cancel(_job_key(goal, client))
+    
+    def status(self, goal, client=None):
+        """客户端为学习目标发起的推测任务的状态：queued / running / done，没有任务时返回None"""
+        with self._condition:
+            self._expire()
+            job = self._jobs.get(_job_key(goal, client))
+            return job.state if job is not None else None
+
+    def take(self, goal, client=None, timeout=None):
+        """
+        取走客户端为学习目标发起的推测结果
+        
+        Args:
+            goal: 学习目标
+            client: 客户端标识，与发起推测时相同
+            timeout: 推测任务仍在进行时最多等待的秒数
+        
+        Returns:
+            dict: 学习路径数据，没有可用的推测结果时返回None
+        """
+        return self.take_result(goal, client, timeout)[0]
+    
+    def take_result(self, goal, client=None, timeout=None):
+        """
+        取走推测结果，同时返回任务是否带有完成回调：带回调的任务由工作线程处理结果（如已为登录用户保存），
+        调用方不应再次保存
+        
+        Returns:
+            tuple: (学习路径数据, 是否由完成回调处理)，没有可用的推测结果时返回 (None, False)
+        """
+        key = _job_key(goal, client)
+        with self._condition:
+            self._expire()
+            job = self._jobs.get(key)
+            if job is None or job.state == CANCELLED:
+                self._stats['misses'] += 1
+                return None, False
+            if job.state == QUEUED:
+                # 还没开始生成，不如直接由请求自己生成
+                self._cancel(key, counted=False)
+                self._stats['misses'] += 1
+                return None, False
+            in_flight = job.state == RUNNING
+        
+        if in_flight:
+            job.finished.wait(timeout if timeout is not None else config.SPECULATIVE_WAIT_SECONDS)
+        
+        with self._condition:
+            if self._jobs.get(key) is not job or job.state != DONE or job.result is None:
+                self._stats['misses'] += 1
+                return None, False
+            del self._jobs[key]
+            if self._client_jobs.get(job.client) == key:
+                del self._client_jobs[job.client]
+            self._stats['hits'] += 1
+            if in_flight:
+                self._stats['hits_in_flight'] += 1
+            self._stats['saved_seconds'] += job.work_seconds()
+            # 完成回调在任务完成后（或登记时任务已完成则立即）执行，取走结果不影响回调
+            return job.result, job.on_done is not None
+    
+    @contextmanager
+    def foreground(self):
+        """标记一个前台生成请求，期间不启动新的推测任务"""
+        with self._condition:
+            self._foreground += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._foreground -= 1
+                self._condition.notify_all()
+    
+    def stats(self):
+        """推测生成的统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._queue)
+            stats['running'] = sum(1 for job in self._jobs.values() if job.state == RUNNING)
+            stats['parked'] = sum(1 for job in self._jobs.values() if job.state == DONE)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        finished = stats['hits'] + stats['cancelled'] + stats['expired']
+        stats['waste_rate'] = round((stats['cancelled'] + stats['expired']) / finished, 4) if finished else 0.0
+        stats['wasted_seconds'] = round(stats['wasted_seconds'], 3)
+        stats['saved_seconds'] = round(stats['saved_seconds'], 3)
+        return stats
+    
+    # ---- 内部方法（调用方需持有锁） ----
+    
+    def _cancel(self, key, counted=True):
+        job = self._jobs.get(key)
+        if job is None or job.state == CANCELLED:
+            return False
+        if job.state == QUEUED:
+            try:
+                self._queue.remove(job)
+            except ValueError:
+                pass
+        elif job.state == DONE:
+            self._stats['wasted_seconds'] += job.work_seconds()
+        job.cancelled.set()
+        if job.state != RUNNING:
+            # 运行中的任务由工作线程在完成后计入浪费的时间
+            job.state = CANCELLED
+            del self._jobs[key]
+        if counted:
+            self._stats['cancelled'] += 1
+        return True
+    
+    def _expire(self):
+        now = time.time()
+        for key, job in list(self._jobs.items()):
+            if job.state == DONE and now - job.finished_at > self.ttl:
+                del self._jobs[key]
+                self._stats['expired'] += 1
+                self._stats['wasted_seconds'] += job.work_seconds()
+        # 待取走的结果过多时，丢弃最早完成的
+        parked = [key for key, job in self._jobs.items() if job.state == DONE]
+        for key in parked[:max(0, len(parked) - self.max_parked)]:
+            job = self._jobs.pop(key)
+            self._stats['expired'] += 1
+            self._stats['wasted_seconds'] += job.work_seconds()
+    
+    def _ensure_workers(self):
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._worker, name='speculative-path', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    # ---- 工作线程 ----
+    
+    def _worker(self):
+        try:
+            # 降低线程的调度优先级（Linux 上 nice 值按线程生效）；协程模式下所有请求共用一个系统线程，不调整
+            if not _threading_patched():
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), config.SPECULATIVE_NICE)
+        except (AttributeError, OSError):
+            pass
+        
+        while True:
+            with self._condition:
+                while not self._queue or self._foreground > 0:
+                    self._condition.wait()
+                job = self._queue.popleft()
+                job.state = RUNNING
+                job.started_at = time.time()
+            
+            result = None
+            try:
+                # 取消后在下一次调用模型之前中止，不再占用模型
+                with cancellable(job.cancelled):
+                    result = self.generate_func(job.goal)
+            except GenerationCancelled:
+                logger.info(f"推测生成学习路径已取消: {job.goal}")
+            except Exception as e:
+                logger.error(f"推测生成学习路径失败: {str(e)}")
+            
+            with self._condition:
+                job.finished_at = time.time()
+                if job.cancelled.is_set():
+                    job.state = CANCELLED
+                    self._stats['wasted_seconds'] += job.work_seconds()
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+                elif result is None:
+                    job.state = CANCELLED
+                    self._stats['failed'] += 1
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+                else:
+                    job.state = DONE
+                    job.result = result
+                    logger.info(f"推测生成学习路径完成: {job.goal}（{job.work_seconds():.1f}s）")
+                on_done = job.on_done if job.state == DONE else None
+                job.finished.set()
+            if on_done is not None:
+                self._notify_done(job, result)
+    
+    def _notify_done(self, job, result):
+        try:
+            job.on_done(result)
+        except Exception as e:
+            logger.error(f"处理推测生成结果失败: {str(e)}")
+
+def _job_key(goal, client):
+    """推测任务的键：(客户端, 规范化的目标)，目标为空时返回None"""
+    normalized = normalize_goal(goal)
+    return (client, normalized) if normalized else None
+
+def _threading_patched():
+    """是否运行在 gevent 协程模式下（threading 已被替换为协程实现）"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+_generator = None
+_generator_lock = threading.Lock()
+
+def get_speculative_generator():
+    """进程内共享的后台学习路径生成器（推测预生成和临时模板的后台替换共用）"""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            from services.learning_path_service import LearningPathService
+            _generator = SpeculativeGenerator(LearningPathService().build_learning_path)
+        return _generator
@@ -97,6 +97,10 @@ class UserBehaviorStatsService:
             UserBehavior.user_id == user_id
         ).all()
         
+        return self._compute_domain_distribution(behaviors)
+    
+    def _compute_domain_distribution(self, behaviors):
+        """根据行为记录的标题和搜索查询计算领域分布（不访问数据库）"""
         # 提取关键词
         keywords = []
         for behavior in behaviors:
@@ -0,0 +1,45 @@
+"""
+测试公共配置：数据库、缓存和共享文件都放在临时目录中，模型接口指向不可达的地址
+
+环境变量必须在导入 config 之前设置，因此放在这里（pytest 最先加载 conftest）。
+"""
+import os
+import tempfile
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='evelyn-tests-')
+for _name, _value in {
+    'EVELYN_DATABASE_URI': f"sqlite:///{os.path.join(_TMP_DIR, 'evelyn.db')}",
+    'EVELYN_OLLAMA_API': 'http://127.0.0.1:9/api/generate',
+    'EVELYN_RESPONSE_CACHE_PATH': os.path.join(_TMP_DIR, 'response_cache.db'),
+    'EVELYN_CRAWL_CACHE_PATH': os.path.join(_TMP_DIR, 'crawl_cache.db'),
+    'EVELYN_GRAPH_STORE_PATH': os.path.join(_TMP_DIR, 'knowledge_graph.bin'),
+    'EVELYN_FRUSTRATION_SIGNAL_PATH': os.path.join(_TMP_DIR, 'frustration_signals.bin'),
+    'EVELYN_LLM_LEDGER': 'off'
+}.items():
+    os.environ[_name] = _value
+
+@pytest.fixture
+def app():
+    """每个测试使用重新建表的应用"""
+    from app import app as flask_app
+    from models.user import db
+    from utils.db_migrate import ensure_columns
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        ensure_columns(db)
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(client):
+    """登录（首次登录自动注册）并返回带 Token 的请求头"""
+    response = client.post('/api/auth/login', json={'email': 'tester@example.com', 'password': 'secret1'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
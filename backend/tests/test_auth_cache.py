@@ -0,0 +1,61 @@
+"""
+认证缓存测试：按最近使用淘汰、过期时间不超过 Token 的有效期、用户数据变更后失效，缓存命中时仍读取最新的画像字段
+"""
+import time
+from utils.auth import AuthUserCache, auth_cache_stats
+
+def test_least_recently_used_token_is_evicted():
+    cache = AuthUserCache(max_size=2, ttl=60)
+    cache.put('t1', 1, {'id': 1})
+    cache.put('t2', 2, {'id': 2})
+    assert cache.get('t1') == (1, {'id': 1})
+    cache.put('t3', 3, {'id': 3})
+
+    assert cache.get('t2') is None
+    assert cache.get('t1') is not None and cache.get('t3') is not None
+    assert cache.stats()['size'] == 2
+
+def test_entries_expire_with_ttl_or_token_exp():
+    cache = AuthUserCache(max_size=4, ttl=60)
+    cache.put('expired-token', 1, {'id': 1}, token_exp=time.time() - 1)
+    assert cache.get('expired-token') is None
+    assert cache.stats()['size'] == 0
+
+    cache = AuthUserCache(max_size=4, ttl=-1)
+    cache.put('t', 1, {'id': 1})
+    assert cache.get('t') is None
+
+def test_invalidate_user_removes_all_tokens():
+    cache = AuthUserCache(max_size=8, ttl=60)
+    cache.put('a1', 1, {'id': 1})
+    cache.put('a2', 1, {'id': 1})
+    cache.put('b1', 2, {'id': 2})
+    cache.invalidate_user(1)
+
+    assert cache.get('a1') is None and cache.get('a2') is None
+    assert cache.get('b1') == (2, {'id': 2})
+    assert cache.stats()['invalidations'] == 1
+
+def test_cached_user_reads_current_profile_fields(client, auth_headers):
+    from models.user import User, db
+    client.get('/api/user/1/profile', headers=auth_headers)
+    hits = auth_cache_stats()['hits']
+
+    # 其他工作进程更新了画像字段：本进程的认证缓存只保存身份字段，不会返回旧值
+    User.query.get(1).learning_time = '每天2小时'
+    User.bump_data_version(1)
+    db.session.commit()
+    db.session.expire_all()
+
+    response = client.get('/api/user/1/profile', headers=auth_headers)
+    assert auth_cache_stats()['hits'] == hits + 1
+    assert response.get_json()['learning_time'] == '每天2小时'
+
+def test_profile_update_invalidates_cached_tokens(client, auth_headers):
+    client.get('/api/user/1/profile', headers=auth_headers)
+    invalidations = auth_cache_stats()['invalidations']
+
+    response = client.put('/api/user/1/profile', headers=auth_headers, json={'budget': 500})
+    assert response.status_code == 200
+    assert auth_cache_stats()['invalidations'] == invalidations + 1
+    assert client.get('/api/user/1/profile', headers=auth_headers).get_json()['budget'] == 500
@@ -0,0 +1,79 @@
+"""
+用户行为画像测试：频繁项统计的淘汰顺序与时间衰减，首次统计的并发插入，画像ETag随衰减时段变化
+"""
+from models.user import db
+from models.user_behavior import UserBehavior
+from models.user_behavior_sketch import UserBehaviorSketch
+from services.behavior_profile_service import BehaviorProfileService
+from utils.topk_sketch import DecayedSpaceSaving
+
+DAY = 24 * 3600
+
+def test_space_saving_evicts_the_smallest_counter():
+    sketch = DecayedSpaceSaving(capacity=2, half_life=DAY)
+    for item in ('a', 'a', 'a', 'b'):
+        sketch.add(item, 0)
+    sketch.add('c', 0)
+
+    # b 计数最小被替换，c 继承其计数作为误差上界
+    assert dict(sketch.top(3, 0)) == {'a': 3.0, 'c': 2.0}
+    assert sketch.counters['c'][1] == 1.0
+    sketch.add('d', 0)
+    assert dict(sketch.top(3, 0)) == {'a': 3.0, 'd': 3.0}
+
+def test_older_occurrences_decay():
+    sketch = DecayedSpaceSaving(capacity=4, half_life=DAY)
+    sketch.add('old', 0)
+    sketch.add('old', 0)
+    sketch.add('new', 3 * DAY)
+
+    top = dict(sketch.top(2, 3 * DAY))
+    assert top['old'] == 0.25 and top['new'] == 1.0
+    restored = DecayedSpaceSaving.from_json(sketch.to_json(), 4, DAY)
+    assert restored.top(2, 3 * DAY) == sketch.top(2, 3 * DAY)
+
+def _behavior(url):
+    behavior = UserBehavior(user_id=1, url=url, title='', search_query='python 入门', duration=5)
+    db.session.add(behavior)
+    return behavior
+
+def test_concurrent_first_insert_falls_back_to_update(app, auth_headers, monkeypatch):
+    service = BehaviorProfileService()
+    service.record_behavior(_behavior('https://docs.python.org/3/'))
+    db.session.commit()
+
+    # 模拟并发：读取时统计记录还不存在，插入时已被其他请求创建
+    real_query = db.session.query
+    calls = []
+
+    class Missing:
+        def filter_by(self, **kwargs):
+            return self
+
+        def first(self):
+            return None
+
+    def racing_query(*entities):
+        calls.append(entities)
+        return Missing() if len(calls) == 1 else real_query(*entities)
+    monkeypatch.setattr(db.session, 'query', racing_query)
+
+    behavior = _behavior('https://pypi.org/')
+    service.record_behavior(behavior)
+    db.session.commit()
+    monkeypatch.undo()
+
+    sketch = UserBehaviorSketch.query.get(1)
+    assert sketch.behavior_count == 2 and sketch.total_duration == 10
+    assert UserBehavior.query.get(behavior.id) is not None
+    assert 'pypi.org' in dict(service.get_behavior_analysis(1)['top_domains'])
+
+def test_profile_etag_changes_with_decay_epoch(client, auth_headers, monkeypatch):
+    from routes import user as user_routes
+    response = client.get('/api/user/1/profile', headers=auth_headers)
+    etag = response.headers['ETag']
+
+    headers = dict(auth_headers, **{'If-None-Match': etag})
+    assert client.get('/api/user/1/profile', headers=headers).status_code == 304
+    monkeypatch.setattr(user_routes.behavior_profile_service, 'decay_epoch', lambda now=None: 1)
+    assert client.get('/api/user/1/profile', headers=headers).status_code == 200
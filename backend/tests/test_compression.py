@@ -0,0 +1,47 @@
+"""
+压缩测试：已压缩的路径数据不解压直接拼接进 deflate 响应体，校验和由 adler32_combine 合并
+"""
+import json
+import os
+import random
+import zlib
+from utils import compression
+
+def test_adler32_combine_matches_zlib():
+    rng = random.Random(3)
+    for length1, length2 in ((0, 10), (10, 0), (100, 70000), (65521, 65521), (3, 200000)):
+        first, second = os.urandom(length1), bytes(rng.randrange(256) for _ in range(length2))
+        combined = compression.adler32_combine(zlib.adler32(first), zlib.adler32(second), len(second))
+        assert combined == zlib.adler32(first + second)
+
+def test_spliced_segments_decompress_with_zlib():
+    first = json.dumps({'stages': ['第一阶段'] * 200}, ensure_ascii=False).encode('utf-8')
+    second = os.urandom(5000)
+    writer = compression.DeflateWriter()
+    writer.write(b'[')
+    writer.write_segment(*compression.deflate_segment(compression.compress(first, compression.DEFLATE)), len(first))
+    writer.write(b',')
+    writer.write_segment(*compression.deflate_segment(compression.compress(second, compression.DEFLATE)), len(second))
+    writer.write(b']')
+
+    # zlib.decompress 会校验 Adler-32，校验和合并错误时抛出异常
+    assert zlib.decompress(writer.finish()) == b'[' + first + b',' + second + b']'
+
+def test_segment_requires_sync_flush():
+    raw = b'learning path' * 100
+    assert compression.decompress(compression.compress(raw, compression.DEFLATE), compression.DEFLATE) == raw
+    assert compression.deflate_segment(zlib.compress(raw)) is None
+
+def test_path_list_response_is_spliced(client, auth_headers):
+    from services.learning_path_service import LearningPathService
+    service = LearningPathService()
+    for title in ('python', 'java'):
+        stages = [{'name': f'{title} 阶段{index}', 'description': '学习内容' * 50} for index in range(10)]
+        service.save_generated_path(f'学习{title}', {'title': title, 'stages': stages}, user_id=1)
+
+    plain = client.get('/api/learning-path', headers=auth_headers)
+    encoded = client.get('/api/learning-path', headers=dict(auth_headers, **{'Accept-Encoding': 'deflate'}))
+    assert 'Content-Encoding' not in plain.headers
+    assert encoded.headers['Content-Encoding'] == 'deflate'
+    assert json.loads(zlib.decompress(encoded.data)) == plain.get_json()
+    assert sorted(path['path_data']['title'] for path in plain.get_json()) == ['java', 'python']
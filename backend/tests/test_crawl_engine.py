@@ -0,0 +1,131 @@
+"""
+抓取引擎测试：按主机限速（假时钟）、取消和整体超时，请求发往本地替身服务器
+
+在 backend 目录下运行：
+    python -m pytest tests
+"""
+import threading
+import time
+import pytest
+from benchmarks.stand_in_server import StandInServer
+from services.crawl_engine import CrawlCancelled, CrawlEngine, CrawlTask, HostRateLimiter
+
+def status_code(response):
+    return response.status_code
+
+@pytest.fixture
+def servers():
+    started = []
+    
+    def start(**kwargs):
+        server = StandInServer(**kwargs).start()
+        started.append(server)
+        return server
+    
+    yield start
+    for server in started:
+        server.stop()
+
+def make_tasks(server, count, prefix='task'):
+    return [CrawlTask(f'{prefix}-{index}', f'{server.url}?page={index}', status_code) for index in range(count)]
+
+class FakeClock:
+    """假时钟：等待时直接推进时间，不真正休眠"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds, cancel_event=None):
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        with self._lock:
+            self.now += seconds
+        return False
+
+def test_per_host_spacing_does_not_block_other_hosts():
+    clock = FakeClock()
+    limiter = HostRateLimiter(min_interval=0.3, clock=clock, sleep=clock.sleep)
+    granted = []
+    for host in ('a', 'b', 'a', 'b', 'a', 'b'):
+        limiter.acquire(host)
+        granted.append((host, round(clock(), 6)))
+    
+    # 同一主机的请求间隔 min_interval；等待主机 a 的配额期间主机 b 的配额同样在补充，不需要额外等待
+    assert granted == [('a', 0.0), ('b', 0.0), ('a', 0.3), ('b', 0.3), ('a', 0.6), ('b', 0.6)]
+
+def test_burst_and_deadline():
+    clock = FakeClock()
+    limiter = HostRateLimiter(min_interval=1.0, burst=2, clock=clock, sleep=clock.sleep)
+    limiter.acquire('a')
+    limiter.acquire('a')
+    assert clock() == 0.0
+    
+    with pytest.raises(CrawlCancelled):
+        limiter.acquire('a', deadline=0.5)
+    cancel_event = threading.Event()
+    cancel_event.set()
+    with pytest.raises(CrawlCancelled):
+        limiter.acquire('a', cancel_event=cancel_event)
+    limiter.acquire('a')
+    assert clock() == 1.0
+
+def test_engine_requests_use_the_rate_limiter(servers):
+    first, second = servers(), servers()
+    clock = FakeClock()
+    granted = []
+    limiter = HostRateLimiter(min_interval=0.3, clock=clock, sleep=clock.sleep)
+    acquire = limiter.acquire
+    
+    def recording_acquire(host, *args, **kwargs):
+        acquire(host, *args, **kwargs)
+        granted.append((host, clock()))
+    limiter.acquire = recording_acquire
+    engine = CrawlEngine(max_workers=6, rate_limiter=limiter)
+    
+    results = engine.run(make_tasks(first, 3) + make_tasks(second, 3))
+    
+    assert [result for _, result, _ in results] == [200] * 6
+    for host in {host for host, _ in granted}:
+        times = sorted(at for name, at in granted if name == host)
+        assert len(times) == 3
+        assert all(later - earlier >= 0.3 - 1e-9 for earlier, later in zip(times, times[1:]))
+
+def test_cancel_stops_waiting_tasks(servers):
+    server = servers()
+    engine = CrawlEngine(max_workers=3, min_interval=5)
+    
+    run = engine.start(make_tasks(server, 3), timeout=30)
+    threading.Timer(0.3, run.cancel).start()
+    started = time.monotonic()
+    results = run.result()
+    
+    assert time.monotonic() - started < 2
+    assert run.cancelled()
+    assert sum(1 for _, result, _ in results if result == 200) == 1
+    assert sum(1 for _, _, error in results if isinstance(error, CrawlCancelled)) == 2
+    assert len(server.request_times) == 1
+
+def test_cancel_only_affects_its_own_run(servers):
+    slow_host, other_host = servers(), servers(latency=0.3)
+    engine = CrawlEngine(max_workers=4, min_interval=5)
+    
+    cancelled_run = engine.start(make_tasks(slow_host, 2, 'cancelled'), timeout=30)
+    other_run = engine.start(make_tasks(other_host, 1, 'other'), timeout=30)
+    cancelled_run.cancel()
+    
+    assert [result for _, result, _ in other_run.result()] == [200]
+    assert any(isinstance(error, CrawlCancelled) for _, _, error in cancelled_run.result())
+
+def test_overall_timeout(servers):
+    server = servers(latency=2)
+    engine = CrawlEngine(max_workers=2, min_interval=0)
+    
+    started = time.monotonic()
+    results = engine.run(make_tasks(server, 2), timeout=0.5)
+    
+    assert time.monotonic() - started < 1.5
+    assert all(isinstance(error, CrawlCancelled) for _, _, error in results)
@@ -0,0 +1,35 @@
+"""
+条件GET测试：用户数据版本号不变时返回304，保存学习路径后ETag变化
+"""
+from services.knowledge_service import KnowledgeService
+from services.learning_path_service import LearningPathService
+
+PROFILE_URL = '/api/user/1/profile'
+
+def _get(client, headers, etag=None):
+    headers = dict(headers)
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get(PROFILE_URL, headers=headers)
+
+def test_unchanged_version_returns_304(client, auth_headers):
+    response = _get(client, auth_headers)
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and etag
+
+    response = _get(client, auth_headers, etag)
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+
+def test_saving_paths_invalidates_etag(client, auth_headers):
+    etag = _get(client, auth_headers).headers['ETag']
+    LearningPathService().save_generated_path('学习Go并发编程', {'title': 'go', 'stages': []}, user_id=1)
+    response = _get(client, auth_headers, etag)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # 高级学习路径的保存同样递增用户数据版本号
+    KnowledgeService().save_learning_path(1, '学习Rust', {'title': 'rust', 'estimated_time': '3个月', 'stages': []})
+    response = _get(client, auth_headers, etag)
+    assert response.status_code == 200 and response.headers['ETag'] != etag
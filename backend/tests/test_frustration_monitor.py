@@ -0,0 +1,70 @@
+"""
+挫折检测测试：关键词提取、按时间衰减的技能计数、挫折事件序号，以及其他工作进程记录的搜索经变更通知同步
+"""
+from datetime import datetime, timedelta
+import pytest
+import config
+from models.user import db
+from models.user_behavior import UserBehavior
+from services.frustration_monitor import FrustrationMonitor, extract_frustrated_skills
+
+@pytest.fixture
+def monitors(app, tmp_path, monkeypatch):
+    """共享同一个变更通知文件的监视器（模拟多个工作进程）"""
+    monkeypatch.setattr(config, 'FRUSTRATION_SIGNAL_PATH', str(tmp_path / 'signals.bin'))
+    monkeypatch.setattr(config, 'FRUSTRATION_THRESHOLD', 2.5)
+    monkeypatch.setattr(config, 'FRUSTRATION_HALF_LIFE_HOURS', 72)
+    return lambda: FrustrationMonitor()
+
+def _search(user_id, query, timestamp=None):
+    behavior = UserBehavior(user_id=user_id, url='https://www.baidu.com/s', title='', search_query=query,
+                            timestamp=timestamp or datetime.now())
+    db.session.add(behavior)
+    db.session.commit()
+    return behavior
+
+def test_extract_frustrated_skills():
+    assert extract_frustrated_skills('python 太难了') == ('python',)
+    assert extract_frustrated_skills('React hooks 看不懂') == ('react', 'hooks')
+    assert extract_frustrated_skills('python 入门教程') == ()
+    assert extract_frustrated_skills('') == ()
+
+def test_repeated_frustration_is_flagged_once(auth_headers, monitors):
+    monitor = monitors()
+    for query in ('python 太难了', 'python 看不懂', 'java 入门'):
+        behavior = _search(1, query)
+        monitor.observe(1, behavior.id, behavior.search_query, behavior.timestamp)
+    assert monitor.get_frustrated_skills(1) == []
+    assert monitor.get_seq(1) == 0
+
+    behavior = _search(1, 'python 卡住')
+    monitor.observe(1, behavior.id, behavior.search_query, behavior.timestamp)
+    assert monitor.get_frustrated_skills(1) == ['python']
+    assert monitor.get_seq(1) == 1
+
+    # 同一技能再次受挫不产生新事件
+    behavior = _search(1, 'python 放弃')
+    monitor.observe(1, behavior.id, behavior.search_query, behavior.timestamp)
+    assert monitor.get_seq(1) == 1
+
+def test_old_searches_decay_below_threshold(auth_headers, monitors):
+    # 两个半衰期之前的 4 次搜索衰减为 1，低于阈值
+    old = datetime.now() - timedelta(hours=144)
+    for _ in range(4):
+        _search(1, 'rust 太难了', old)
+    assert monitors().get_frustrated_skills(1) == []
+
+    for _ in range(3):
+        _search(1, 'rust 看不懂')
+    assert monitors().get_frustrated_skills(1) == ['rust']
+
+def test_searches_from_other_workers_are_synced(auth_headers, monitors):
+    reader, writer = monitors(), monitors()
+    assert reader.get_frustrated_skills(1) == []
+
+    for query in ('golang 太难了', 'golang 看不懂', 'golang 卡住'):
+        behavior = _search(1, query)
+        writer.observe(1, behavior.id, behavior.search_query, behavior.timestamp)
+
+    assert reader.get_frustrated_skills(1) == ['golang']
+    assert reader.wait_for_event(1, after_seq=0, timeout=0)[1] == ['golang']
@@ -0,0 +1,69 @@
+"""
+近似目标复用测试：MinHash/LSH 索引的命中与淘汰，约束不同的近似目标不复用
+"""
+from services.goal_index import GoalSimilarityIndex, StoredGoalIndex, goal_constraints
+from utils.text import tokenize
+
+BUDGET_500 = '零基础学Python，预算500元'
+BUDGET_0 = '零基础学Python，预算0元'
+
+def test_tokenize_keeps_numbers():
+    assert '0' in tokenize(BUDGET_0)
+    assert '500' in tokenize(BUDGET_500)
+
+def test_near_duplicate_goal_hits_and_unrelated_goal_misses():
+    index = GoalSimilarityIndex(threshold=0.6)
+    index.add(1, '我想学Python做数据分析')
+    index.add(2, '学习Java后端开发')
+
+    entry_id, similarity = index.query('学习用python进行数据分析')
+    assert entry_id == 1 and similarity >= 0.6
+    assert index.query('学习吉他弹唱')[0] is None
+
+def test_eviction_removes_oldest_entries_from_buckets():
+    index = GoalSimilarityIndex(threshold=0.6, max_entries=2)
+    for entry_id, goal in enumerate(['学习python数据分析', '学习java后端开发', '学习go并发编程']):
+        index.add(entry_id, goal)
+
+    assert len(index) == 2
+    assert index.query('学习python数据分析')[0] is None
+    assert index.query('学习go并发编程')[0] == 2
+    assert sum(len(bucket) for buckets in index._buckets for bucket in buckets.values()) == 2 * index.bands
+
+def test_budget_level_and_duration_are_compared():
+    assert goal_constraints(BUDGET_0) != goal_constraints(BUDGET_500)
+    assert goal_constraints('零基础学Python') != goal_constraints('进阶学Python')
+    assert goal_constraints('3个月学Python') != goal_constraints('1个月学Python')
+    assert goal_constraints('零基础学Python，预算500元') == goal_constraints('零基础想学python 预算500元')
+
+def _save(service, goal, title, reusable=True):
+    return service.save_generated_path(goal, {'title': title, 'stages': []}, user_id=1, reusable=reusable)
+
+def test_near_miss_with_different_budget_is_not_reused(app, auth_headers):
+    from services.learning_path_service import LearningPathService
+    service = LearningPathService()
+    _save(service, BUDGET_500, 'paid')
+    index = StoredGoalIndex(GoalSimilarityIndex(threshold=0.6), refresh_interval=0)
+    index.refresh(force=True)
+
+    # 词语几乎相同（Jaccard 达到阈值），但预算不同
+    assert index.index.query(BUDGET_0)[0] is not None
+    path_data, path_id, _ = index.find(BUDGET_0)
+    assert path_data is None and path_id is None
+
+    path_data, _, _ = index.find('零基础想学python 预算500元')
+    assert path_data['title'] == 'paid'
+
+def test_personalised_paths_are_not_reused(app, auth_headers):
+    from services.learning_path_service import LearningPathService
+    service = LearningPathService()
+    _save(service, '学习Java后端开发', 'personal', reusable=False)
+    generated = _save(service, '学习Go并发编程', 'generated')
+    index = StoredGoalIndex(GoalSimilarityIndex(threshold=0.6), refresh_interval=0)
+
+    assert index.find('学习Java后端开发')[0] is None
+    assert index.find('学习Go并发编程')[0]['title'] == 'generated'
+
+    # 替换为备选路径后不再复用
+    service.save_alternative_path(generated.id, {'title': 'alternative', 'stages': []}, 1)
+    assert index.find('学习Go并发编程')[0] is None
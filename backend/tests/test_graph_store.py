@@ -0,0 +1,108 @@
+"""
+知识图谱列式存储测试：CSR 查询与字典图谱一致，增量持久化后重新打开的文件包含增量，与完整重建的结果相同
+"""
+import random
+import time
+import config
+from benchmarks.bench_knowledge_graph import generate_items
+from services.graph_store import (build_columns, load_graph_store, merge_delta_columns, persist_graph,
+                                  schedule_persist, write_columns, write_graph_store)
+from services.knowledge_graph import KnowledgeGraph
+
+def _graph(items):
+    graph = KnowledgeGraph()
+    for node_type, skill, data in items:
+        graph.add_node(node_type, data, skill=skill)
+    return graph
+
+def _snapshot(store):
+    """与下标无关的文件内容：节点、边、技能成员"""
+    skills = store.node_skills()
+    return (
+        {node['id']: node for node in store.iter_nodes()},
+        {(edge['source'], edge['target'], edge['relation']) for edge in store.iter_edges()},
+        {(store.string('id', index), skill) for index, names in skills.items() for skill in names}
+    )
+
+def test_compact_graph_matches_dict_graph(tmp_path):
+    graph = _graph(generate_items(300, 12))
+    path = str(tmp_path / 'graph.bin')
+    write_graph_store(graph, path)
+    store = load_graph_store(path)
+
+    assert len(store) == len(graph.nodes) and store.edge_count() == graph.edge_count
+    assert sorted(store.skills()) == sorted(graph.skills())
+    for node_id in random.Random(1).sample(sorted(graph.nodes), 50):
+        assert store.get_node(node_id)['url'] == graph.nodes[node_id]['url']
+        for relation in ('prerequisite', 'complementary'):
+            assert store.successors(node_id, relation) == graph.successors(node_id, relation)
+            assert store.predecessors(node_id, relation) == graph.predecessors(node_id, relation)
+    for skill in graph.skills():
+        assert store.nodes_for_skill(skill, difficulty='初级') == graph.nodes_for_skill(skill, difficulty='初级')
+        assert store.nodes_for_skill(skill, node_type='book') == graph.nodes_for_skill(skill, node_type='book')
+    assert store.get_node('course_missing') is None
+    store.close()
+
+def test_delta_merge_matches_full_rebuild(tmp_path):
+    items = generate_items(400, 20)
+    base, extra = items[:300], items[300:]
+    # 增量中还有已有节点的更新：难度变化、价格变化、加入新技能
+    updates = [(node_type, skill, dict(data, difficulty='高级' if data['difficulty'] != '高级' else '初级'))
+               for node_type, skill, data in base[:5]]
+    updates += [(node_type, 'new-skill', dict(data, price=1)) for node_type, _, data in base[5:8]]
+
+    path = str(tmp_path / 'graph.bin')
+    write_graph_store(_graph(base), path)
+    store = load_graph_store(path)
+    merged_path = str(tmp_path / 'merged.bin')
+    write_columns(*merge_delta_columns(store, _graph(extra + updates)), merged_path)
+    store.close()
+
+    full = _graph(base)
+    full.merge_graph(_graph(extra + updates))
+    full_path = str(tmp_path / 'full.bin')
+    write_graph_store(full, full_path)
+
+    merged, expected = load_graph_store(merged_path), load_graph_store(full_path)
+    assert _snapshot(merged) == _snapshot(expected)
+    node_id = next(iter(_graph(extra[:1]).nodes))
+    assert merged.get_node(node_id) is not None
+    assert merged.nodes_for_skill('new-skill') == expected.nodes_for_skill('new-skill')
+    merged.close()
+    expected.close()
+
+def test_persisted_store_contains_delta_after_reopen(tmp_path):
+    path = str(tmp_path / 'graph.bin')
+    graph = KnowledgeGraph()
+    beginner = graph.add_node('course', {'title': 'Python入门', 'difficulty': '初级', 'url': 'u1'}, skill='python')
+    assert persist_graph(graph, path, force=True)
+    assert not graph.nodes
+
+    advanced = graph.add_node('book', {'title': 'Python进阶', 'difficulty': '高级', 'url': 'u2'}, skill='python')
+    assert persist_graph(graph, path, force=True)
+
+    store = load_graph_store(path)
+    assert {node['id'] for node in store.iter_nodes()} == {beginner, advanced}
+    assert store.successors(beginner, 'prerequisite') == {advanced}
+    assert store.successors(beginner, 'complementary') == {advanced}
+    assert store.nodes_for_skill('python') == {beginner, advanced}
+    store.close()
+
+def test_schedule_persist_writes_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'KNOWLEDGE_GRAPH_PERSIST_INTERVAL', 0)
+    path = str(tmp_path / 'graph.bin')
+    graph = KnowledgeGraph()
+    node_id = graph.add_node('course', {'title': 'Go并发', 'difficulty': '中级', 'url': 'u3'}, skill='go')
+    schedule_persist(graph, path)
+
+    deadline = time.time() + 5
+    while graph.nodes or not (tmp_path / 'graph.bin').exists():
+        assert time.time() < deadline
+        time.sleep(0.01)
+    store = load_graph_store(path)
+    assert store.get_node(node_id)['title'] == 'Go并发'
+    store.close()
+
+def test_build_columns_of_empty_graph():
+    categories, skills, columns = build_columns(KnowledgeGraph())
+    assert skills == [] and len(columns['type']) == 0
@@ -0,0 +1,56 @@
+"""
+模型路由测试：按任务选择模型级别，大模型耗时中位数超过目标时在冷却期内降级为小模型
+"""
+from services.model_router import LARGE, SMALL, ModelRouter, _parse_pairs
+
+TIERS = {LARGE: ('big-model', {'num_ctx': 8192}), SMALL: ('small-model', {'num_ctx': 2048})}
+
+def _router(**kwargs):
+    return ModelRouter(TIERS, {'need_analysis': SMALL}, {'learning_path': 10.0}, window=5, **kwargs)
+
+def test_tasks_use_their_configured_tier():
+    router = _router()
+    assert router.route('need_analysis') == (SMALL, 'small-model', {'num_ctx': 2048})
+    assert router.route('learning_path') == (LARGE, 'big-model', {'num_ctx': 8192})
+    assert router.route('unlisted_task')[0] == LARGE
+    assert router.configuration('need_analysis') == TIERS[SMALL]
+
+def test_slow_large_model_is_downgraded_until_cooldown_ends():
+    router = _router(cooldown_seconds=300)
+    router.observe('learning_path', LARGE, 30.0)
+    router.observe('learning_path', LARGE, 30.0)
+    assert router.route('learning_path')[0] == LARGE  # 样本不足 3 个时不判断
+
+    router.observe('learning_path', LARGE, 30.0)
+    tier = router.route('learning_path')[0]
+    assert tier == SMALL
+    assert router.downgraded('learning_path', tier)
+    assert not router.downgraded('need_analysis', SMALL)
+    assert router.stats()['downgrades'] == 1 and 'learning_path' in router.stats()['downgraded']
+
+    # 小模型的耗时和没有耗时目标的任务不参与判断
+    router.observe('learning_path', SMALL, 60.0)
+    router.observe('need_analysis', SMALL, 60.0)
+    assert router.stats()['downgrades'] == 1
+
+def test_recovers_after_cooldown_and_ignores_fast_calls():
+    router = _router(cooldown_seconds=0)
+    for seconds in (30.0, 30.0, 30.0):
+        router.observe('learning_path', LARGE, seconds)
+    assert router.route('learning_path')[0] == LARGE
+
+    router = _router()
+    for seconds in (1.0, 30.0, 2.0):
+        router.observe('learning_path', LARGE, seconds)
+    assert router.route('learning_path')[0] == LARGE
+
+def test_no_downgrade_when_both_tiers_are_the_same_model():
+    router = ModelRouter({LARGE: TIERS[LARGE], SMALL: TIERS[LARGE]}, {}, {'learning_path': 1.0})
+    for _ in range(5):
+        router.observe('learning_path', LARGE, 30.0)
+    assert router.route('learning_path')[0] == LARGE
+
+def test_parse_pairs():
+    assert _parse_pairs('need_analysis=small, learning_path = large,') == {
+        'need_analysis': 'small', 'learning_path': 'large'}
+    assert _parse_pairs('learning_path=20', float) == {'learning_path': 20.0}
@@ -0,0 +1,38 @@
+"""
+资源目录检索测试：只共有通用词语的预设资源不算候选，候选不足时不走检索增强生成
+"""
+import config
+from services.knowledge_graph import KnowledgeGraph
+from services.resource_catalog import ResourceCatalog
+
+def _graph():
+    graph = KnowledgeGraph()
+    graph.add_node('course', {'title': 'Python爬虫实战', 'url': 'https://example.com/spider',
+                              'difficulty': '初级', 'rating': 4.5}, skill='python')
+    return graph
+
+def test_generic_words_do_not_match_unrelated_resources():
+    catalog = ResourceCatalog(graph=_graph())
+    assert catalog.retrieve('学习吉他入门') == []
+
+    names = [candidate['name'] for candidate in catalog.retrieve('零基础学Python')]
+    assert '《Python编程：从入门到实践》' in names
+    assert all('Python' in name for name in names)
+
+def test_graph_nodes_only_when_pages_are_fetched(monkeypatch):
+    catalog = ResourceCatalog(graph=_graph())
+    monkeypatch.setattr(config, 'CRAWLER_FETCH_PAGES', False)
+    assert 'https://example.com/spider' not in [candidate['link'] for candidate in catalog.retrieve('学习python')]
+
+    monkeypatch.setattr(config, 'CRAWLER_FETCH_PAGES', True)
+    assert 'https://example.com/spider' in [candidate['link'] for candidate in catalog.retrieve('学习python')]
+
+def test_unrelated_goal_falls_back_to_normal_prompt(monkeypatch):
+    from services.learning_path_service import LearningPathService
+    service = LearningPathService()
+    service._catalog = ResourceCatalog(graph=_graph())
+
+    def fail(prompt):
+        raise AssertionError('候选资源不足时不应调用模型')
+    monkeypatch.setattr(service, '_call_ollama', fail)
+    assert service._generate_with_retrieval('学习吉他入门') == (None, None)
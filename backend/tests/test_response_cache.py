@@ -0,0 +1,51 @@
+"""
+响应缓存测试：键的规范化、指纹和过期，降级调用的输出不写缓存、预热时不算成功
+"""
+import config
+from services.model_router import LARGE, SMALL
+from services.response_cache import ResponseCache, prompt_fingerprint
+
+def test_put_get_by_normalized_goal_and_fingerprint(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=60)
+    fingerprint = prompt_fingerprint('model', 'prompt {goal}')
+    cache.put('learning_path', '  我想学Python ', fingerprint, {'title': 'python'})
+
+    assert cache.get('learning_path', '我想学python', fingerprint) == {'title': 'python'}
+    assert cache.contains('learning_path', '我想学python', fingerprint)
+    # 修改提示词或模型后旧的缓存不再命中
+    assert cache.get('learning_path', '我想学python', prompt_fingerprint('model', 'new prompt {goal}')) is None
+    assert cache.get('need_analysis', '我想学python', fingerprint) is None
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+
+def test_expired_entries_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl_seconds=-1)
+    cache.put('learning_path', '学习java', 'f', {'title': 'java'})
+    assert cache.get('learning_path', '学习java', 'f') is None
+    assert not cache.contains('learning_path', '学习java', 'f')
+
+def _prewarmer(monkeypatch, tier):
+    from tools.prewarm_cache import Prewarmer
+    prewarmer = Prewarmer(['path'])
+    service = prewarmer.learning_path_service
+    monkeypatch.setattr(service, '_generate_with_retrieval', lambda goal: (None, None))
+    monkeypatch.setattr(service, '_generate_with_llm', lambda goal: ({'title': goal, 'stages': []}, tier))
+    return prewarmer
+
+def test_downgraded_generation_is_not_reported_as_warmed(monkeypatch):
+    prewarmer = _prewarmer(monkeypatch, SMALL)
+    assert prewarmer.needs_llm('path', '学习吉他弹唱')
+    assert prewarmer.run('path', '学习吉他弹唱') is False
+    assert prewarmer.needs_llm('path', '学习吉他弹唱')
+
+    prewarmer = _prewarmer(monkeypatch, LARGE)
+    assert prewarmer.run('path', '学习吉他弹唱') is True
+    assert not prewarmer.needs_llm('path', '学习吉他弹唱')
+
+def test_planner_is_not_consulted_when_disabled(monkeypatch):
+    prewarmer = _prewarmer(monkeypatch, LARGE)
+    monkeypatch.setattr(prewarmer.planner, 'plan', lambda goal: {'title': goal, 'stages': []})
+    monkeypatch.setattr(config, 'PATH_PLANNER_ENABLED', False)
+    assert prewarmer.needs_llm('path', '学习摄影后期')
+
+    monkeypatch.setattr(config, 'PATH_PLANNER_ENABLED', True)
+    assert not prewarmer.needs_llm('path', '学习摄影后期')
@@ -0,0 +1,61 @@
+"""
+后台学习路径生成测试：临时模板对应的路径在生成完成时保存，再次提交同一目标时不重复保存
+"""
+import time
+import config
+from services import speculative_generator
+from services.speculative_generator import DONE, SpeculativeGenerator
+
+GOAL = '零基础学Python数据分析'
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, '等待超时'
+        time.sleep(0.01)
+
+def test_take_result_reports_completion_callback():
+    saved = []
+    generator = SpeculativeGenerator(lambda goal: {'title': goal, 'stages': []}, workers=1)
+    generator.speculate(GOAL, client='a', on_done=saved.append)
+    generator.speculate('学习Java', client='b')
+    _wait(lambda: generator.status(GOAL, 'a') == DONE and generator.status('学习Java', 'b') == DONE)
+
+    assert generator.take_result(GOAL, 'a') == ({'title': GOAL, 'stages': []}, True)
+    assert generator.take_result('学习Java', 'b') == ({'title': '学习Java', 'stages': []}, False)
+    assert generator.take_result(GOAL, 'a') == (None, False)
+    _wait(lambda: len(saved) == 1)
+
+def test_provisional_path_is_saved_once(app, client, auth_headers, monkeypatch):
+    from models.learning_path import LearningPath
+    monkeypatch.setattr(config, 'PATH_TEMPLATE_PROVISIONAL', True)
+    generator = SpeculativeGenerator(lambda goal: {'title': 'generated', 'stages': []}, workers=1)
+    monkeypatch.setattr(speculative_generator, '_generator', generator)
+
+    response = client.post('/api/learning-path', json={'goal': GOAL}, headers=auth_headers)
+    assert response.status_code == 202 and response.get_json()['provisional']
+    _wait(lambda: LearningPath.query.count() == 1)
+
+    response = client.post('/api/learning-path', json={'goal': GOAL}, headers=auth_headers)
+    assert response.status_code == 201 and response.get_json()['title'] == 'generated'
+    assert LearningPath.query.count() == 1
+
+def test_jobs_run_concurrently_up_to_worker_count():
+    import threading
+    release = threading.Event()
+    started = []
+
+    def generate(goal):
+        started.append(goal)
+        release.wait(5)
+        return {'title': goal, 'stages': []}
+
+    generator = SpeculativeGenerator(generate, workers=2)
+    generator.speculate('学习Java', client='a')
+    generator.speculate('学习Go', client='b')
+    generator.speculate('学习Rust', client='c')
+    # 两个任务同时运行，第三个排队等待空闲线程
+    _wait(lambda: len(started) == 2)
+    assert generator.stats()['queued'] == 1
+    release.set()
+    _wait(lambda: generator.status('学习Rust', 'c') == DONE)
@@ -0,0 +1,264 @@
+"""
+扩容测试数据生成
+
+向数据库批量写入合成的 User、UserBehavior 和 LearningPath 记录，用于在接近生产规模（千万级行为记录）
+的数据上观察统计、画像、挫折检测等读接口的表现。
+
+- 用户活跃度服从 Zipf 分布：少数重度用户贡献大部分行为
+- 行为按浏览会话生成：每个会话访问若干页面，插件对同一页面按心跳间隔重复上报，停留时间逐次累加；
+  搜索页面的 URL 带查询参数并写入 search_query，其中一小部分包含挫折关键词
+- 会话时间集中在白天和晚上，分布在结束日期之前的 --days 天内
+- 学习路径的阶段数和资源数各不相同，按与应用相同的方式规范化、压缩存储
+
+相同的种子、规模和结束日期生成完全相同的数据。使用 executemany 分批写入，每批一个事务，
+写入期间关闭同步以加快速度。只追加新用户，不修改已有数据；同一种子重复生成会被拒绝。
+
+用法（在 backend 目录下）：
+    python -m tools.generate_synthetic_data --users 10000 --behaviors 10000000 --seed 1
+    python -m tools.generate_synthetic_data --database /tmp/scale.db --users 1000 --behaviors 100000
+"""
+from datetime import datetime, timedelta
+from urllib.parse import quote
+import argparse
+import math
+import random
+import sqlite3
+import time
+
+SQLITE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+TOPICS = ['Python', 'pandas', 'React', 'Vue3', 'Java', 'Spring Boot', 'SQL', 'Docker', 'Kubernetes', 'PyTorch',
+          'TensorFlow', 'Go', 'Rust', 'C++', 'TypeScript', 'Node.js', 'Excel', 'Tableau', 'Figma', 'Linux',
+          '机器学习', '深度学习', '数据分析', '前端开发', '后端开发', '自然语言处理', '计算机视觉', '数据结构', '算法',
+          '产品经理', '用户增长', '内容营销', '区块链', '微服务', '云计算', '大数据', '神经网络', '统计学', '线性代数',
+          '股票', '基金', '会计', 'SEO', '短视频', 'Photoshop', 'UI设计', '英语', '日语', '摄影', '剪辑']
+SEARCH_SITES = [
+    ('https://www.baidu.com/s?wd={query}', '{query}_百度搜索'),
+    ('https://www.google.com/search?q={query}', '{query} - Google Search'),
+    ('https://search.bilibili.com/all?keyword={query}', '{query}-哔哩哔哩_bilibili'),
+    ('https://www.zhihu.com/search?type=content&q={query}', '{query} - 搜索结果 - 知乎'),
+]
+CONTENT_SITES = [
+    ('https://blog.csdn.net/weixin_{n}/article/details/{m}', '{topic}入门教程（超详细）_CSDN博客'),
+    ('https://juejin.cn/post/{m}', '一文搞懂{topic}的核心概念 - 掘金'),
+    ('https://www.zhihu.com/question/{n}', '如何系统地学习{topic}？ - 知乎'),
+    ('https://www.bilibili.com/video/BV1{n}', '{topic} 从零到精通 完整版 -哔哩哔哩_bilibili'),
+    ('https://www.runoob.com/{slug}/{slug}-tutorial.html', '{topic} 教程 | 菜鸟教程'),
+    ('https://developer.mozilla.org/zh-CN/docs/Web/{slug}', '{topic} | MDN'),
+    ('https://github.com/awesome/{slug}', 'GitHub - awesome-{slug}: A curated list of {topic} resources'),
+    ('https://www.coursera.org/learn/{slug}', '{topic} | Coursera'),
+    ('https://time.geekbang.org/column/intro/{n}', '{topic}实战 | 极客时间'),
+    ('https://www.icourse163.org/course/{slug}-{n}', '{topic} - 中国大学MOOC'),
+]
+QUERY_TEMPLATES = ['{topic} 入门', '{topic} 教程', '{topic} 面试题', '{topic} 实战项目', 'how to learn {topic}',
+                   '{topic} best practices', '{topic} 和 {other} 的区别', '{topic} 学习路线']
+FRUSTRATION_TEMPLATES = ['{topic} 太难了 看不懂', '{topic} 报错 不会', '{topic} stuck help', '{topic} 卡住 放弃']
+STAGE_NAMES = ['基础入门', '核心概念', '进阶提升', '项目实战', '性能优化', '源码阅读', '面试准备', '拓展应用']
+RESOURCE_TYPES = ['课程', '书籍', '视频', '文章', '工具']
+
+def zipf_counts(total, buckets, exponent):
+    """将 total 按 Zipf 分布（第 k 名的权重为 1/k^exponent）分配给 buckets 个桶"""
+    weights = [1 / math.pow(rank, exponent) for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in range(total - sum(counts)):
+        counts[index % buckets] += 1
+    return counts
+
+def _slug(topic):
+    return quote(topic.lower().replace(' ', '-'))
+
+def _session_start(rng, end, days):
+    """会话开始时间：白天和晚上更集中"""
+    day = end - timedelta(days=rng.randrange(days) + 1)
+    hour = min(23, max(0, int(rng.gauss(rng.choice((10, 15, 21)), 2.5))))
+    return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+
+def generate_behaviors(rng, user_id, count, end, days, frustration_rate, heartbeat_seconds):
+    """
+    生成一个用户的 count 条行为记录
+    
+    Yields:
+        tuple: (user_id, url, title, search_query, duration, timestamp)
+    """
+    interests = rng.sample(TOPICS, rng.randint(2, 6))
+    produced = 0
+    while produced < count:
+        current = _session_start(rng, end, days)
+        for _ in range(rng.randint(1, 12)):
+            topic = rng.choice(interests) if rng.random() < 0.85 else rng.choice(TOPICS)
+            search_query = None
+            if rng.random() < 0.3:
+                templates = FRUSTRATION_TEMPLATES if rng.random() < frustration_rate else QUERY_TEMPLATES
+                search_query = rng.choice(templates).format(topic=topic, other=rng.choice(TOPICS))
+                url_template, title_template = rng.choice(SEARCH_SITES)
+                url = url_template.format(query=quote(search_query))
+                title = title_template.format(query=search_query)
+            else:
+                url_template, title_template = rng.choice(CONTENT_SITES)
+                url = url_template.format(n=rng.randrange(10 ** 6, 10 ** 7), m=rng.randrange(10 ** 9, 10 ** 10),
+                                          slug=_slug(topic))
+                title = title_template.format(topic=topic, slug=_slug(topic))
+            # 同一页面按心跳重复上报，停留时间累加
+            duration = 0
+            for _ in range(max(1, int(rng.expovariate(1 / 3)))):
+                duration += heartbeat_seconds
+                current += timedelta(seconds=heartbeat_seconds + rng.random())
+                yield (user_id, url[:500], title[:200], search_query, duration, current.strftime(SQLITE_TIME_FORMAT))
+                produced += 1
+                if produced >= count:
+                    return
+            current += timedelta(seconds=rng.randint(5, 120))
+
+def generate_path_data(rng, goal, topic):
+    """生成一条阶段数和资源数各不相同的学习路径"""
+    stage_count = rng.randint(2, 8)
+    stages = []
+    for index in range(stage_count):
+        stages.append({
+            'name': f'{topic}{STAGE_NAMES[index]}',
+            'description': f'{STAGE_NAMES[index]}阶段，掌握{topic}的相关知识。',
+            'estimated_time': f'{rng.randint(1, 6)}周',
+            'resources': [{
+                'type': rng.choice(RESOURCE_TYPES),
+                'name': f'{topic}{STAGE_NAMES[index]}资源{item + 1}',
+                'link': f'https://example.com/{_slug(topic)}/{index}/{item}',
+                'description': f'适合{STAGE_NAMES[index]}阶段的{topic}学习资源。' * rng.randint(1, 4),
+                'price': str(rng.choice((0, 0, 0, 49, 99, 199)))
+            } for item in range(rng.randint(1, 6))],
+            'goals': [f'理解{topic}的{STAGE_NAMES[index]}内容', '完成练习']
+        })
+    return {'title': f'{topic}学习路径', 'description': f'根据目标“{goal}”生成的学习路径。',
+            'estimated_time': f'{stage_count * 3}周', 'stages': stages}
+
+def generate(database, users, behaviors, seed=1, paths_per_user=2.0, days=180, zipf_exponent=1.1,
+             frustration_rate=0.05, heartbeat_seconds=30, end=None, batch_size=50000, progress=print):
+    """
+    向 SQLite 数据库追加合成数据（表须已存在）
+    
+    Returns:
+        dict: 写入的用户、行为、学习路径数量和耗时
+    """
+    from models.learning_path import LearningPath
+    rng = random.Random(seed)
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    email_prefix = f'synthetic-{seed}-'
+    started = time.perf_counter()
+    
+    conn = sqlite3.connect(database)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        if conn.execute('SELECT 1 FROM user WHERE email LIKE ? LIMIT 1', (email_prefix + '%',)).fetchone():
+            raise SystemExit(f'种子 {seed} 的数据已生成过，请换一个种子')
+        first_id = (conn.execute('SELECT MAX(id) FROM user').fetchone()[0] or 0) + 1
+        user_ids = list(range(first_id, first_id + users))
+        
+        # 所有合成用户使用同一个密码哈希，避免逐个计算
+        from werkzeug.security import generate_password_hash
+        password = generate_password_hash('synthetic-password')
+        with conn:
+            conn.executemany(
+                'INSERT INTO user (id, email, password, created_at, data_version) VALUES (?, ?, ?, ?, 0)',
+                [(user_id, f'{email_prefix}{user_id}@example.com', password,
+                  (end - timedelta(days=days)).strftime(SQLITE_TIME_FORMAT)) for user_id in user_ids]
+            )
+        progress(f"用户: {users} 个（ID {first_id}-{first_id + users - 1}）")
+        
+        # 按 Zipf 分布分配行为数量，活跃度排名随机打乱到各用户
+        counts = zipf_counts(behaviors, users, zipf_exponent)
+        rng.shuffle(counts)
+        written = 0
+        batch = []
+        for user_id, count in zip(user_ids, counts):
+            for row in generate_behaviors(rng, user_id, count, end, days, frustration_rate, heartbeat_seconds):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    with conn:
+                        conn.executemany(
+                            'INSERT INTO user_behavior (user_id, url, title, search_query, duration, timestamp) '
+                            'VALUES (?, ?, ?, ?, ?, ?)', batch)
+                    written += len(batch)
+                    batch = []
+                    elapsed = time.perf_counter() - started
+                    progress(f"行为: {written}/{behaviors}（{written / elapsed:.0f} 行/秒）")
+        if batch:
+            with conn:
+                conn.executemany(
+                    'INSERT INTO user_behavior (user_id, url, title, search_query, duration, timestamp) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', batch)
+            written += len(batch)
+        
+        # 学习路径：活跃用户更多，与应用相同的方式规范化和压缩
+        path_rows = []
+        mean_count = behaviors / users if users else 1
+        for user_id, count in zip(user_ids, counts):
+            expected = paths_per_user * min(5.0, 0.5 + 0.5 * count / mean_count)
+            for _ in range(round(rng.expovariate(1 / expected)) if expected else 0):
+                topic = rng.choice(TOPICS)
+                goal = rng.choice(QUERY_TEMPLATES).format(topic=topic, other=rng.choice(TOPICS))
+                path_data = generate_path_data(rng, goal, topic)
+                path = LearningPath()
+                path.set_path_data(path_data)
+                created = _session_start(rng, end, days).strftime(SQLITE_TIME_FORMAT)
+                path_rows.append((user_id, path_data['title'], path_data['description'], goal,
+                                  path_data['estimated_time'], created, created, path.path_data, path.path_blob,
+                                  path.path_encoding, path.path_hash, path.path_size, round(rng.random(), 2), 1))
+        with conn:
+            conn.executemany(
+                'INSERT INTO learning_paths (user_id, title, description, goal, estimated_time, created_at, '
+                'updated_at, path_data, path_blob, path_encoding, path_hash, path_size, completion_rate, reusable) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', path_rows)
+        progress(f"学习路径: {len(path_rows)} 条")
+    finally:
+        conn.close()
+    
+    return {
+        'users': users,
+        'behaviors': written,
+        'learning_paths': len(path_rows),
+        'first_user_id': first_id,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def prepare_database(database=None):
+    """
+    创建表并返回 SQLite 文件路径；未指定 database 时使用应用配置的数据库
+    
+    必须在导入应用之前设置好 EVELYN_DATABASE_URI，这里按需设置。
+    """
+    import os
+    if database:
+        os.environ['EVELYN_DATABASE_URI'] = f'sqlite:///{os.path.abspath(database)}'
+    from app import app
+    from models.user import db
+    from utils.db_migrate import ensure_columns
+    with app.app_context():
+        db.create_all()
+        ensure_columns(db)
+        return db.engine.url.database
+
+def main():
+    parser = argparse.ArgumentParser(description='扩容测试数据生成')
+    parser.add_argument('--database', help='SQLite 文件路径，默认使用应用配置的数据库（evelyn.db）')
+    parser.add_argument('--users', type=int, default=1000, help='用户数')
+    parser.add_argument('--behaviors', type=int, default=100000, help='行为记录总数')
+    parser.add_argument('--paths-per-user', type=float, default=2.0, help='平均每个用户的学习路径数')
+    parser.add_argument('--days', type=int, default=180, help='行为分布的天数')
+    parser.add_argument('--zipf', type=float, default=1.1, help='用户活跃度的 Zipf 指数')
+    parser.add_argument('--frustration-rate', type=float, default=0.05, help='搜索中包含挫折关键词的比例')
+    parser.add_argument('--end-date', help='数据的结束日期（YYYY-MM-DD），默认今天；固定后可完全复现')
+    parser.add_argument('--batch-size', type=int, default=50000, help='每个事务写入的行数')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args()
+    
+    database = prepare_database(args.database)
+    end = datetime.strptime(args.end_date, '%Y-%m-%d') if args.end_date else None
+    print(f"写入 {database}")
+    result = generate(database, args.users, args.behaviors, seed=args.seed, paths_per_user=args.paths_per_user,
+                      days=args.days, zipf_exponent=args.zipf, frustration_rate=args.frustration_rate,
+                      end=end, batch_size=args.batch_size)
+    print(f"完成: {result}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+大模型调用账本查看与导出
+
+    python -m tools.llm_ledger summary                          # 按用途汇总调用数、耗时、输出速度和存储大小
+    python -m tools.llm_ledger export --task learning_path > out.jsonl
+    python -m tools.llm_ledger summary --ledger /tmp/llm_ledger.db
+
+账本默认位于 EVELYN_LLM_LEDGER_PATH（instance/llm_ledger.db），在 EVELYN_LLM_LEDGER=record 时写入。
+导出的每行是一条调用记录，response 为 Ollama 返回的完整 JSON 文本，可用于离线调整解析逻辑。
+"""
+import argparse
+import json
+import sys
+from services.llm_ledger import LLMLedger
+import config
+
+def main():
+    parser = argparse.ArgumentParser(description='大模型调用账本查看与导出')
+    parser.add_argument('command', choices=('summary', 'export'), help='汇总或导出')
+    parser.add_argument('--ledger', default=config.LLM_LEDGER_PATH, help='账本文件')
+    parser.add_argument('--task', help='只导出该用途的调用')
+    args = parser.parse_args()
+    
+    ledger = LLMLedger(args.ledger)
+    if args.command == 'summary':
+        print(f"{'用途':<20}{'调用数':>8}{'不同提示词':>10}{'平均耗时':>10}{'tokens/s':>10}{'存储':>10}")
+        for row in ledger.summary():
+            speed = f"{row['tokens_per_sec']:.1f}" if row['tokens_per_sec'] else '-'
+            print(f"{row['task']:<20}{row['calls']:>8}{row['distinct_prompts']:>10}{row['avg_seconds']:>9.2f}s"
+                  f"{speed:>10}{row['stored_bytes'] / 1024:>8.0f}KB")
+        return
+    
+    for entry in ledger.entries(args.task):
+        sys.stdout.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+响应缓存预热
+
+部署或修改提示词后，热门学习目标的第一次请求都要等待完整的大模型生成。本脚本取出最常见的学习目标
+（learning_paths.goal 列，或文件中的目标列表），以有限的并发调用需求分析和学习路径生成，提前写入响应缓存。
+
+- 进度：每完成一个任务输出一行，包含耗时和预计剩余时间
+- 断点续跑：已缓存的目标自动跳过，中断（Ctrl+C）后重新运行即可从未完成的目标继续
+- 吞吐统计：结束时输出成功/失败数、平均耗时和每分钟完成的任务数
+- 试运行：--dry-run 只统计需要调用大模型的次数和提示词字数，并按单次耗时估算总时间
+
+用法（在 backend 目录下）：
+    python -m tools.prewarm_cache --limit 200 --workers 2
+    python -m tools.prewarm_cache --file goals.txt --tasks path --dry-run
+目标文件每行一个目标，可用制表符在后面附上出现次数，# 开头的行为注释。
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import sys
+import threading
+import time
+from services.learning_path_service import LearningPathService
+from services.need_analysis_service import NeedAnalysisService
+from services.path_planner import PathPlanner
+from services.response_cache import get_response_cache
+from utils.text import normalize_goal
+import config
+
+TASKS = ('analysis', 'path')
+
+def load_goals_from_db(limit):
+    """learning_paths 表中出现次数最多的学习目标，规范化后相同的目标合并计数"""
+    from app import app
+    from models.learning_path import LearningPath, db
+    with app.app_context():
+        rows = (db.session.query(LearningPath.goal, db.func.count(LearningPath.id))
+                .filter(LearningPath.goal.isnot(None))
+                .group_by(LearningPath.goal).all())
+    return merge_goals(rows, limit)
+
+def load_goals_from_file(path, limit):
+    """从文件读取学习目标"""
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            goal, _, count = line.partition('\t')
+            rows.append((goal.strip(), int(count) if count.strip().isdigit() else 1))
+    return merge_goals(rows, limit)
+
+def merge_goals(rows, limit):
+    """
+    合并规范化后相同的目标
+    
+    Returns:
+        list: [(目标, 次数)]，按次数从多到少排列，目标取该组中出现最多的写法
+    """
+    groups = {}
+    for goal, count in rows:
+        key = normalize_goal(goal)
+        if not key:
+            continue
+        total, best_goal, best_count = groups.get(key, (0, goal, 0))
+        if count > best_count:
+            best_goal, best_count = goal, count
+        groups[key] = (total + count, best_goal, best_count)
+    merged = sorted(((goal, total) for total, goal, _ in groups.values()), key=lambda item: (-item[1], item[0]))
+    return merged[:limit] if limit else merged
+
+class Prewarmer:
+    """按目标和任务类型调用服务，写入响应缓存"""
+    
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.cache = get_response_cache()
+        if self.cache is None:
+            raise SystemExit('响应缓存未启用（EVELYN_RESPONSE_CACHE=0），无需预热')
+        self.need_analysis_service = NeedAnalysisService()
+        self.learning_path_service = LearningPathService()
+        self.planner = PathPlanner()
+    
+    def is_cached(self, task, goal):
+        if task == 'analysis':
+            return self.cache.contains('need_analysis', goal, self.need_analysis_service.prompt_fingerprint())
+        return self.cache.contains('learning_path', goal, self.learning_path_service.prompt_fingerprint())
+    
+    def needs_llm(self, task, goal):
+        """任务是否需要调用大模型：已缓存的不需要，启用知识图谱规划时图谱能规划的学习路径也不需要"""
+        if self.is_cached(task, goal):
+            return False
+        if task == 'path' and config.PATH_PLANNER_ENABLED and self.planner.plan(goal) is not None:
+            return False
+        return True
+    
+    def prompt_chars(self, task, goal):
+        if task == 'analysis':
+            return len(self.need_analysis_service._build_prompt(goal))
+        return len(self.learning_path_service._build_prompt(goal))
+    
+    def run(self, task, goal):
+        """执行一个预热任务，返回是否写入了缓存"""
+        # 需求分析失败时返回默认结果、降级为小模型时的输出也不写缓存，都以缓存是否存在判断成功
+        if task == 'analysis':
+            self.need_analysis_service.analyze_learning_need(goal)
+        else:
+            self.learning_path_service.build_learning_path(goal)
+        return self.is_cached(task, goal)
+
+def dry_run(prewarmer, jobs, workers, seconds_per_call):
+    """统计需要调用大模型的任务并估算耗时"""
+    calls = {task: 0 for task in TASKS}
+    chars = 0
+    skipped = 0
+    for task, goal, _ in jobs:
+        if prewarmer.needs_llm(task, goal):
+            calls[task] += 1
+            chars += prewarmer.prompt_chars(task, goal)
+        else:
+            skipped += 1
+    total = sum(calls.values())
+    print(f"任务 {len(jobs)} 个，已缓存或由知识图谱规划 {skipped} 个，需要调用大模型 {total} 次"
+          f"（需求分析 {calls['analysis']}，学习路径 {calls['path']}）")
+    print(f"提示词共约 {chars} 字（学习路径启用检索增强时还包含候选资源列表）")
+    print(f"按单次 {seconds_per_call:.0f}s、并发 {workers} 估算：约 {total * seconds_per_call / max(workers, 1) / 60:.1f} 分钟")
+
+def main():
+    parser = argparse.ArgumentParser(description='响应缓存预热')
+    parser.add_argument('--file', help='学习目标文件，不指定时取 learning_paths 表中最常见的目标')
+    parser.add_argument('--limit', type=int, default=100, help='预热的目标数量，0 表示全部')
+    parser.add_argument('--tasks', default='analysis,path', help='预热的任务：analysis（需求分析）、path（学习路径）')
+    parser.add_argument('--workers', type=int, default=2, help='并发数（不宜超过 Ollama 的并行处理能力）')
+    parser.add_argument('--dry-run', action='store_true', help='只估算需要调用大模型的次数和耗时')
+    parser.add_argument('--seconds-per-call', type=float, default=30, help='试运行估算时单次大模型调用的耗时（秒）')
+    args = parser.parse_args()
+    
+    tasks = [task.strip() for task in args.tasks.split(',') if task.strip()]
+    unknown = [task for task in tasks if task not in TASKS]
+    if unknown:
+        parser.error(f"未知的任务: {', '.join(unknown)}")
+    
+    goals = load_goals_from_file(args.file, args.limit) if args.file else load_goals_from_db(args.limit)
+    jobs = [(task, goal, count) for goal, count in goals for task in tasks]
+    print(f"共 {len(goals)} 个目标，{len(jobs)} 个任务")
+    prewarmer = Prewarmer(tasks)
+    
+    if args.dry_run:
+        dry_run(prewarmer, jobs, args.workers, args.seconds_per_call)
+        return
+    
+    pending = [job for job in jobs if prewarmer.needs_llm(job[0], job[1])]
+    print(f"已缓存或由知识图谱规划 {len(jobs) - len(pending)} 个，待预热 {len(pending)} 个")
+    if not pending:
+        return
+    
+    stats = {'done': 0, 'ok': 0, 'failed': 0, 'seconds': 0.0}
+    stop = threading.Event()
+    started = time.perf_counter()
+    
+    def run_job(job):
+        task, goal, _ = job
+        if stop.is_set():
+            return job, None, 0.0
+        job_started = time.perf_counter()
+        try:
+            ok = prewarmer.run(task, goal)
+        except Exception as e:
+            print(f"  失败 [{task}] {goal}: {str(e)}", file=sys.stderr)
+            ok = False
+        return job, ok, time.perf_counter() - job_started
+    
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    futures = [executor.submit(run_job, job) for job in pending]
+    try:
+        for future in as_completed(futures):
+            (task, goal, count), ok, seconds = future.result()
+            if ok is None:
+                continue
+            stats['done'] += 1
+            stats['ok' if ok else 'failed'] += 1
+            stats['seconds'] += seconds
+            elapsed = time.perf_counter() - started
+            remaining = elapsed / stats['done'] * (len(pending) - stats['done'])
+            print(f"[{stats['done']}/{len(pending)}] {'完成' if ok else '失败'} [{task}] {goal}"
+                  f"（出现 {count} 次）{seconds:.1f}s，预计剩余 {remaining / 60:.1f} 分钟")
+    except KeyboardInterrupt:
+        stop.set()
+        for future in futures:
+            future.cancel()
+        print('已中断，等待进行中的任务结束；重新运行将跳过已缓存的目标')
+    finally:
+        executor.shutdown(wait=True)
+    
+    elapsed = time.perf_counter() - started
+    done = stats['done']
+    print(f"完成 {done} 个任务（成功 {stats['ok']}，失败 {stats['failed']}），用时 {elapsed:.1f}s")
+    if done:
+        print(f"平均每个任务 {stats['seconds'] / done:.1f}s，吞吐 {done / elapsed * 60:.1f} 个/分钟")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,149 @@
 from flask import request, jsonify
 from functools import wraps
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+import threading
+import time
 import jwt
-from models.user import User
+from jwt.algorithms import HMACAlgorithm
+from models.user import User, db
+import config
+
+# JWT 配置
+JWT_SECRET_KEY = 'evelyn-secret-key'
+JWT_ALGORITHM = 'HS256'
+
+# 验证密钥只解析一次，避免每次请求重复处理
+_jwt_verify_key = HMACAlgorithm(HMACAlgorithm.SHA256).prepare_key(JWT_SECRET_KEY)
+
+# 认证缓存只保存不会变化的身份字段，画像等其他字段在访问时从数据库读取，
+# 多个工作进程中任一进程更新用户数据后，其他进程不会返回旧值
+CACHED_USER_FIELDS = ('id', 'email')
+
+class AuthUserCache:
+    """已验证用户的进程内缓存（有界、带过期时间），以Token为键"""
+    
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (user_id, 用户字段快照, 过期时间)
+        self._tokens_by_user = {}  # user_id -> {token}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, token):
+        """获取缓存的用户字段快照，未命中或已过期时返回None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= now:
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0], entry[1]
+    
+    def put(self, token, user_id, values, token_exp=None):
+        """缓存用户字段快照，过期时间不超过Token本身的过期时间"""
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (user_id, values, expires_at)
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest_token = next(iter(self._entries))
+                self._remove(oldest_token)
+    
+    def invalidate_user(self, user_id):
+        """用户数据变更后，清除该用户的所有缓存项"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+            self.invalidations += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+    
+    def stats(self):
+        """缓存命中统计，命中次数即节省的用户查询次数"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / total, 4) if total else 0,
+                'saved_queries': self.hits
+            }
+    
+    def _remove(self, token):
+        """删除缓存项（调用方需持有锁）"""
+        user_id = self._entries.pop(token)[0]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+_user_cache = AuthUserCache(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL)
+
+def decode_token(token):
+    """验证并解码Token"""
+    return jwt.decode(token, _jwt_verify_key, algorithms=[JWT_ALGORITHM])
+
+def optional_user_id():
+    """请求携带有效Token时返回其中的用户ID，未登录或Token无效时返回None"""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return decode_token(auth_header.split(' ')[1]).get('user_id')
+    except jwt.InvalidTokenError:
+        return None
+
+def client_key():
+    """区分客户端：已登录用户按用户ID，否则按来源地址"""
+    user_id = optional_user_id()
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"addr:{request.remote_addr}"
+
+def invalidate_cached_user(user_id):
+    """用户数据变更后调用，使认证缓存失效"""
+    _user_cache.invalidate_user(user_id)
+
+def auth_cache_stats():
+    """获取认证用户缓存的命中统计"""
+    return _user_cache.stats()
+
+def _snapshot_user(user):
+    """提取用户的身份字段，用于缓存"""
+    return {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+
+def _attach_cached_user(values):
+    """
+    根据缓存的身份字段重建用户对象，并以不查询数据库的方式关联到当前会话
+    
+    未缓存的字段处于过期状态，首次访问时从数据库读取当前值（只使用用户ID的接口不查询数据库）。
+    """
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 def token_required(f):
     """验证Token的装饰器"""
@@ -19,12 +161,18 @@ def token_required(f):
             return jsonify({'message': '缺少认证Token'}), 401
         
         try:
-            # 解码token
-            data = jwt.decode(token, 'evelyn-secret-key', algorithms=['HS256'])
-            current_user = User.query.filter_by(id=data['user_id']).first()
-            
-            if not current_user:
-                return jsonify({'message': '无效的Token'}), 401
+            cached = _user_cache.get(token)
+            if cached:
+                current_user = _attach_cached_user(cached[1])
+            else:
+                # 解码token
+                data = decode_token(token)
+                current_user = User.query.filter_by(id=data['user_id']).first()
+                
+                if not current_user:
+                    return jsonify({'message': '无效的Token'}), 401
+                
+                _user_cache.put(token, current_user.id, _snapshot_user(current_user), data.get('exp'))
             
         except Exception as e:
             return jsonify({'message': f'无效的Token: {str(e)}'}), 401
@@ -32,4 +180,4 @@ def token_required(f):
         # 将用户信息传递给被装饰的函数
         return f(current_user, *args, **kwargs)
     
-    return decorated
\ No newline at end of file
+    return decorated
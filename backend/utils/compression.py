@@ -0,0 +1,124 @@
+import struct
+import zlib
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖
+    zstandard = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# HTTP 的 "deflate" 编码即 zlib 格式（RFC 1950），与 zlib.compress 的输出一致
+DEFLATE = 'deflate'
+ZSTD = 'zstd'
+
+# deflate 数据在同步点结束时的标记（空的非最终存储块），以及紧随其后的空最终块
+_SYNC_MARKER = b'\x00\x00\xff\xff'
+_FINAL_BLOCK = b'\x03\x00'
+_ZLIB_HEADER = b'\x78\x9c'
+_ADLER_BASE = 65521
+
+
+def available_encodings():
+    """返回当前环境可用的压缩编码"""
+    encodings = [DEFLATE]
+    if zstandard is not None:
+        encodings.append(ZSTD)
+    return encodings
+
+
+def resolve_encoding(name):
+    """将配置的编码名称解析为可用编码，不可用时返回None（不压缩）"""
+    if not name or name in ('none', 'identity'):
+        return None
+    if name == ZSTD and zstandard is None:
+        logger.warning("未安装 zstandard，路径数据改用 deflate 压缩")
+        return DEFLATE
+    if name not in (DEFLATE, ZSTD):
+        logger.warning(f"未知的压缩编码 {name}，路径数据不压缩")
+        return None
+    return name
+
+
+def compress(raw, encoding):
+    """按指定编码压缩字节串"""
+    if encoding == DEFLATE:
+        # 先同步刷新再结束，压缩数据在字节边界结束，可以原样拼接进更大的 deflate 响应体（见 DeflateWriter）
+        compressor = zlib.compressobj(6)
+        return compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH) + compressor.flush(zlib.Z_FINISH)
+    if encoding == ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+def decompress(blob, encoding):
+    """按指定编码解压字节串"""
+    if encoding == DEFLATE:
+        return zlib.decompress(blob)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise ValueError("数据使用 zstd 压缩，但未安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    raise ValueError(f"不支持的压缩编码: {encoding}")
+
+
+
+def deflate_segment(blob):
+    """
+    取出 deflate 压缩数据中可直接拼接的部分
+
+    Returns:
+        (bytes, int): 去掉 zlib 头、最终块和校验和的压缩块，以及原始数据的 Adler-32 校验和；
+        数据不是以同步点结束的（如旧版本 zlib.compress 的输出）时返回None
+    """
+    if len(blob) < 12 or blob[-10:-6] != _SYNC_MARKER or blob[-6:-4] != _FINAL_BLOCK:
+        return None
+    return blob[2:-6], struct.unpack('>I', blob[-4:])[0]
+
+
+def adler32_combine(adler1, adler2, length2):
+    """由两段数据各自的 Adler-32 校验和计算拼接后的校验和（同 zlib 的 adler32_combine）"""
+    remainder = length2 % _ADLER_BASE
+    sum1 = adler1 & 0xffff
+    sum2 = (remainder * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xffff) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - remainder) % _ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+class DeflateWriter:
+    """
+    拼接生成 deflate 编码（zlib 格式）的响应体
+
+    普通字节即时压缩；已压缩存储的数据段（deflate_segment 的返回值）不解压，直接拼接。
+    拼接前完全刷新压缩器，之后的输出不会引用拼接段之前的数据。
+    """
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        self._parts = [_ZLIB_HEADER]
+        self._adler = zlib.adler32(b'')
+
+    def write(self, raw):
+        self._parts.append(self._compressor.compress(raw))
+        self._adler = zlib.adler32(raw, self._adler)
+
+    def write_segment(self, segment, adler, length):
+        """
+        拼接已压缩的数据段
+
+        Args:
+            segment: deflate_segment 返回的压缩块
+            adler: 原始数据的 Adler-32 校验和
+            length: 原始数据的字节数
+        """
+        self._parts.append(self._compressor.flush(zlib.Z_FULL_FLUSH))
+        self._parts.append(segment)
+        self._adler = adler32_combine(self._adler, adler, length)
+
+    def finish(self):
+        self._parts.append(self._compressor.flush(zlib.Z_FULL_FLUSH))
+        self._parts.append(_FINAL_BLOCK + struct.pack('>I', self._adler))
+        return b''.join(self._parts)
@@ -0,0 +1,31 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def ensure_columns(db):
+    """
+    为已存在的表补充模型中新增的列
+
+    db.create_all() 只创建不存在的表，不会修改已有表，
+    因此模型新增字段后需要在这里通过 ALTER TABLE 补齐。
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl}'
+            logger.info(f"为表 {table.name} 补充字段: {ddl}")
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
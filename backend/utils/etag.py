@@ -0,0 +1,40 @@
+from flask import request, make_response
+from functools import wraps
+import hashlib
+from models.user import User
+
+def conditional_get(scope, extra_key=None):
+    """
+    基于用户数据版本号的条件GET装饰器，需放在 token_required 之后
+
+    ETag 由接口范围、请求路径、用户ID和用户数据版本号组成。
+    客户端携带匹配的 If-None-Match 时，在执行任何统计计算之前直接返回 304。
+
+    Args:
+        scope: 接口范围，如 profile / stats / learning-path
+        extra_key: 可选的函数，返回额外参与ETag计算的字符串（如按日期变化的统计）
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(current_user, *args, **kwargs):
+            version = User.get_data_version(current_user.id)
+            key = f"{scope}:{request.path}:{current_user.id}:{version}"
+            if extra_key:
+                key += f":{extra_key()}"
+            etag = f"{scope}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = make_response(f(current_user, *args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,317 @@
+"""
+Prometheus 格式的运行指标
+
+不依赖 prometheus_client：指标保存在进程内，由 /metrics 接口按文本格式（0.0.4）导出。
+- 请求中间件：按路由规则和状态码统计的请求耗时直方图、按路由统计的进行中请求数
+- Ollama 调用：耗时、提示词和输出 token 数、输出速度（eval_count / eval_duration）
+- 数据库连接池：取得连接的等待时间
+- 缓存命中：导出时读取各缓存已有的命中统计
+- 生成失败后返回默认结果（如默认学习路径）的次数
+
+多进程部署时每个进程各自统计，由 Prometheus 按实例分别抓取。
+"""
+from bisect import bisect_left
+import threading
+import time
+from flask import Response, g, request
+
+# 请求耗时的桶（秒），覆盖从毫秒级的读接口到分钟级的大模型生成
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+OLLAMA_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """指标基类：按标签值保存各序列，所有序列共用一把锁"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(series))
+        return lines
+    
+    def _render_series(self, series):
+        for labels, value in series:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    
+    kind = 'counter'
+    
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def total(self):
+        """所有序列的合计"""
+        with self._lock:
+            return sum(self._series.values())
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+    
+    kind = 'gauge'
+    
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+    
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+    
+    def set(self, *labels, value):
+        with self._lock:
+            self._series[labels] = value
+
+class Histogram(_Metric):
+    """
+    直方图：每个序列保存各桶的（非累积）计数、总和与总数，导出时再累加为 Prometheus 的累积桶
+    """
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, *labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._series.get(labels)
+            if state is None:
+                state = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+    
+    def _render_series(self, series):
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {count}'
+
+class Registry:
+    """
+    指标注册表
+    
+    除了直接更新的指标，还可以注册收集函数：在导出时读取各缓存已有的命中统计，
+    避免在缓存的热路径上重复计数。收集函数返回 [(名称, 类型, 说明, [(标签字典, 值)])]。
+    """
+    
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+    
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def add_collector(self, func):
+        with self._lock:
+            self._collectors.append(func)
+        return func
+    
+    def render(self):
+        """导出 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception:
+                continue  # 单个收集函数失败不影响其他指标
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'evelyn_http_request_duration_seconds', '请求处理耗时（按路由规则、方法和状态码）',
+    ('route', 'method', 'status'))
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'evelyn_http_requests_in_flight', '正在处理的请求数（按路由规则）', ('route',))
+OLLAMA_LATENCY = REGISTRY.histogram(
+    'evelyn_ollama_request_duration_seconds', 'Ollama 生成调用耗时（按任务和结果）', ('task', 'outcome'),
+    buckets=OLLAMA_BUCKETS)
+OLLAMA_PROMPT_TOKENS = REGISTRY.counter(
+    'evelyn_ollama_prompt_tokens_total', 'Ollama 处理的提示词 token 数（prompt_eval_count）', ('task',))
+OLLAMA_EVAL_TOKENS = REGISTRY.counter(
+    'evelyn_ollama_eval_tokens_total', 'Ollama 输出的 token 数（eval_count）', ('task',))
+OLLAMA_EVAL_SECONDS = REGISTRY.counter(
+    'evelyn_ollama_eval_seconds_total', 'Ollama 输出 token 的耗时（eval_duration）', ('task',))
+OLLAMA_TOKENS_PER_SECOND = REGISTRY.histogram(
+    'evelyn_ollama_tokens_per_second', '单次调用的输出速度（eval_count / eval_duration）', ('task',),
+    buckets=TOKENS_PER_SECOND_BUCKETS)
+DB_POOL_WAIT = REGISTRY.histogram(
+    'evelyn_db_pool_wait_seconds', '从连接池取得数据库连接的等待时间', buckets=POOL_WAIT_BUCKETS)
+OLLAMA_SLOT_WAIT = REGISTRY.histogram(
+    'evelyn_ollama_slot_wait_seconds', '达到并发上限时等待 Ollama 调用名额的时间（按任务）', ('task',),
+    buckets=LATENCY_BUCKETS)
+LLM_DOWNGRADES = REGISTRY.counter(
+    'evelyn_llm_downgrades_total', '大模型任务超过耗时目标后改用小模型的次数（按任务）', ('task',))
+FALLBACKS = REGISTRY.counter(
+    'evelyn_fallback_total', '生成失败后返回默认结果的次数（按类型）', ('kind',))
+
+def observe_ollama(task, seconds, outcome, result=None):
+    """
+    记录一次 Ollama 调用
+    
+    Args:
+        task: 调用用途，如 need_analysis / learning_path
+        seconds: 调用耗时
+        outcome: ok / http_error / error
+        result: 响应体（含 prompt_eval_count、eval_count、eval_duration 时一并记录）
+    """
+    OLLAMA_LATENCY.observe(task, outcome, value=seconds)
+    if not result:
+        return
+    prompt_tokens = result.get('prompt_eval_count')
+    eval_tokens = result.get('eval_count')
+    eval_duration = result.get('eval_duration')  # 纳秒
+    if prompt_tokens:
+        OLLAMA_PROMPT_TOKENS.inc(task, amount=prompt_tokens)
+    if eval_tokens:
+        OLLAMA_EVAL_TOKENS.inc(task, amount=eval_tokens)
+    if eval_tokens and eval_duration:
+        eval_seconds = eval_duration / 1e9
+        OLLAMA_EVAL_SECONDS.inc(task, amount=eval_seconds)
+        OLLAMA_TOKENS_PER_SECOND.observe(task, value=eval_tokens / eval_seconds)
+
+def record_fallback(kind):
+    """记录一次回退到默认结果"""
+    FALLBACKS.inc(kind)
+
+def instrument_pool(engine):
+    """
+    统计从连接池取得连接的等待时间和当前借出的连接数
+    
+    包装的是引擎的 raw_connection（每次都从 engine.pool 取连接），收集函数也在导出时读取 engine.pool，
+    engine.dispose() 换成新的连接池（如派生工作进程前）后统计仍然有效。
+    """
+    if getattr(engine, '_evelyn_instrumented', False):
+        return
+    raw_connection = engine.raw_connection
+    
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            DB_POOL_WAIT.observe(value=time.perf_counter() - started)
+    
+    engine.raw_connection = timed_raw_connection
+    engine._evelyn_instrumented = True
+    
+    def collect_pool():
+        checked_out = getattr(engine.pool, 'checkedout', None)
+        if checked_out is None:
+            return []
+        return [('evelyn_db_pool_checked_out', 'gauge', '当前借出的数据库连接数', [({}, checked_out())])]
+    
+    REGISTRY.add_collector(collect_pool)
+
+def collect_caches():
+    """读取认证用户缓存、大模型响应缓存和抓取缓存的命中统计"""
+    from services.knowledge_crawler import get_crawl_cache
+    from services.response_cache import get_response_cache
+    from utils.auth import auth_cache_stats
+    
+    caches = {'auth_user': auth_cache_stats(), 'crawl': get_crawl_cache().stats()}
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        caches['llm_response'] = response_cache.stats()
+    samples = []
+    for cache, stats in caches.items():
+        for key, result in (('hits', 'hit'), ('misses', 'miss'), ('revalidations', 'revalidation')):
+            if key in stats:
+                samples.append(({'cache': cache, 'result': result}, stats[key]))
+    return [('evelyn_cache_requests_total', 'counter', '缓存查询次数（按缓存名称和结果）', samples)]
+
+def collect_model_router():
+    """读取各任务当前是否处于降级期（改用小模型）"""
+    from services.model_router import get_model_router
+    
+    router = get_model_router()
+    downgraded = router.stats()['downgraded']
+    samples = [({'task': task}, 1 if task in downgraded else 0) for task in router.latency_targets]
+    return [('evelyn_llm_downgraded', 'gauge', '大模型任务当前是否已降级为小模型（按任务）', samples)]
+
+def init_app(app, path='/metrics'):
+    """为应用的所有请求添加耗时统计，注册缓存统计、模型降级状态的收集函数和导出接口"""
+    REGISTRY.add_collector(collect_caches)
+    REGISTRY.add_collector(collect_model_router)
+    
+    @app.before_request
+    def _start_timer():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g._metrics_route = route
+        g._metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc(route)
+    
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            REQUEST_LATENCY.observe(g._metrics_route, request.method, str(response.status_code),
+                                    value=time.perf_counter() - started)
+        return response
+    
+    @app.teardown_request
+    def _finish_request(exc):
+        route = g.pop('_metrics_route', None)
+        if route is not None:
+            REQUESTS_IN_FLIGHT.dec(route)
+    
+    @app.route(path, endpoint='metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
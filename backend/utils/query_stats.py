@@ -0,0 +1,154 @@
+"""
+SQL 查询统计
+
+通过 SQLAlchemy 的游标事件统计每个请求执行的查询数和耗时：
+- 超过阈值的慢查询连同参数记录到日志
+- 同一请求中相同语句（参数可以不同）重复执行多次时记录警告，通常是循环中触发了延迟加载（N+1）
+- 可选地在响应头中返回查询数和耗时（X-Query-Count / X-Query-Time / Server-Timing）
+- 测试和基准中可以用 max_queries() 断言一段代码（如一次接口请求）最多执行多少条查询
+
+统计对象保存在 contextvars 中，请求之外（后台线程）执行的查询不计入任何请求。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import time
+from flask import g, request
+from sqlalchemy import event
+from utils import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_active_recorders = ContextVar('query_recorders', default=())
+
+QUERIES_PER_REQUEST = metrics.REGISTRY.histogram(
+    'evelyn_db_queries_per_request', '单个请求执行的 SQL 查询数（按路由规则）', ('route',),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 500))
+QUERY_SECONDS_PER_REQUEST = metrics.REGISTRY.histogram(
+    'evelyn_db_query_seconds_per_request', '单个请求的 SQL 查询总耗时（按路由规则）', ('route',))
+
+def _format_parameters(parameters, limit=300):
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+class QueryRecorder:
+    """记录一段时间内执行的查询：总数、总耗时、各语句的执行次数"""
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}  # 语句 -> [执行次数, 第一次的参数]
+    
+    def record(self, statement, parameters, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            self.statements[statement] = [1, parameters]
+        else:
+            entry[0] += 1
+    
+    def repeated(self, threshold):
+        """执行次数不少于 threshold 的语句，返回 [(语句, 次数, 第一次的参数)]，按次数降序"""
+        result = [(statement, count, parameters) for statement, (count, parameters) in self.statements.items()
+                  if count >= threshold]
+        return sorted(result, key=lambda item: -item[1])
+    
+    def summary(self):
+        """按执行次数降序列出各语句，用于断言失败时的提示"""
+        lines = [f'{self.count} 条查询，{self.seconds * 1000:.1f}ms']
+        for statement, (count, _) in sorted(self.statements.items(), key=lambda item: -item[1][0]):
+            lines.append(f'  {count} × {" ".join(statement.split())[:200]}')
+        return '\n'.join(lines)
+
+@contextmanager
+def record_queries():
+    """
+    统计代码块内执行的查询（可嵌套，也包含其中处理的请求）
+    
+    用法：
+        with record_queries() as recorder:
+            client.get('/api/learning-path', headers=headers)
+        print(recorder.count)
+    """
+    recorder = QueryRecorder()
+    token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+@contextmanager
+def max_queries(limit):
+    """
+    断言代码块内最多执行 limit 条查询，超过时抛出 AssertionError 并列出各语句的执行次数
+    
+    用法：
+        with max_queries(3):
+            client.get('/api/learning-path', headers=headers)
+    """
+    with record_queries() as recorder:
+        yield recorder
+    if recorder.count > limit:
+        raise AssertionError(f'预期最多 {limit} 条查询，实际 {recorder.summary()}')
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_recorders.get() and context is not None:
+        context._query_started = time.perf_counter()
+
+def _make_after_cursor_execute(slow_seconds):
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        recorders = _active_recorders.get()
+        started = getattr(context, '_query_started', None)
+        if not recorders or started is None:
+            return
+        elapsed = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.record(statement, parameters, elapsed)
+        if elapsed >= slow_seconds:
+            logger.warning(f"慢查询 {elapsed * 1000:.1f}ms: {' '.join(statement.split())} "
+                           f"参数: {_format_parameters(parameters)}")
+    return _after_cursor_execute
+
+def init_app(app, engine, slow_query_ms=200, repeat_threshold=5, debug_header=False):
+    """
+    为引擎注册查询事件，并统计应用的每个请求
+    
+    Args:
+        engine: SQLAlchemy 引擎
+        slow_query_ms: 慢查询阈值（毫秒）
+        repeat_threshold: 同一请求中相同语句执行多少次时记录 N+1 警告
+        debug_header: 是否在响应头中返回查询数和耗时
+    """
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(slow_query_ms / 1000))
+    
+    @app.before_request
+    def _start_recording():
+        recorder = QueryRecorder()
+        g._query_recorder = recorder
+        g._query_recorder_token = _active_recorders.set(_active_recorders.get() + (recorder,))
+    
+    @app.after_request
+    def _report_queries(response):
+        recorder = g.get('_query_recorder')
+        if recorder is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        QUERIES_PER_REQUEST.observe(route, value=recorder.count)
+        QUERY_SECONDS_PER_REQUEST.observe(route, value=recorder.seconds)
+        for statement, count, parameters in recorder.repeated(repeat_threshold):
+            logger.warning(f"{request.method} {request.path} 中同一语句执行了 {count} 次，可能是 N+1 查询: "
+                           f"{' '.join(statement.split())} 首次参数: {_format_parameters(parameters)}")
+        if debug_header:
+            response.headers['X-Query-Count'] = str(recorder.count)
+            response.headers['X-Query-Time'] = f'{recorder.seconds * 1000:.1f}'
+            response.headers.add('Server-Timing', f'db;dur={recorder.seconds * 1000:.1f};desc="{recorder.count} queries"')
+        return response
+    
+    @app.teardown_request
+    def _stop_recording(exc):
+        token = g.pop('_query_recorder_token', None)
+        if token is not None:
+            _active_recorders.reset(token)
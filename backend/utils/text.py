@@ -0,0 +1,41 @@
+import re
+import jieba
+
+# 英文单词、数字以及 c++ / c# / node.js 这类技术名词
+_ENGLISH_PATTERN = re.compile(r'[a-zA-Z0-9][-_a-zA-Z0-9.#+]*')
+_WORD_CHAR_PATTERN = re.compile(r'\w')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+STOP_WORDS = frozenset({
+    "的", "了", "和", "是", "在", "我", "有", "你", "他", "她", "它", "们",
+    "这", "那", "什么", "怎么", "如何", "为什么", "怎样", "哪些", "哪里",
+    "想要", "想学", "学习", "希望", "可以", "应该", "需要", "一个", "一些",
+    "进行", "使用", "学会", "掌握", "了解",
+    "the", "a", "an", "of", "to", "in", "on", "at", "by", "with", "and", "or",
+    "for", "how", "what", "learn", "want"
+})
+
+def tokenize(text):
+    """
+    将文本切分为小写词语：英文按单词切分，中文使用 jieba 分词，过滤停用词和单字（数字保留，如预算 0 元）
+    
+    Returns:
+        list: 词语列表（保留顺序和重复）
+    """
+    if not text:
+        return []
+    text = text.lower()
+    english_words = _ENGLISH_PATTERN.findall(text)
+    words = [word for word in english_words if len(word) > 1 or word.isdigit()]
+    # 移除英文单词后再做中文分词，避免干扰
+    chinese_text = _ENGLISH_PATTERN.sub(' ', text)
+    for word in jieba.cut(chinese_text):
+        word = word.strip()
+        if len(word) > 1 and _WORD_CHAR_PATTERN.search(word):
+            words.append(word)
+    return [word for word in words if word not in STOP_WORDS]
+
+def normalize_goal(goal):
+    """学习目标的规范化键：小写、合并空白、去掉首尾空白和标点"""
+    text = _WHITESPACE_PATTERN.sub(' ', (goal or '').lower()).strip()
+    return text.strip('。.!！?？,，;；~～ ')
@@ -0,0 +1,76 @@
+import json
+import math
+
+class DecayedSpaceSaving:
+    """
+    带指数时间衰减的 Space-Saving 频繁项统计
+    
+    最多保存 capacity 个计数器，内存占用与历史数据量无关。
+    时间衰减采用前向衰减（forward decay）：新数据按 2^((t - landmark) / half_life)
+    加权累加，读取时再统一除以当前时刻的权重，因此每次更新只需修改一个计数器。
+    """
+    
+    # 权重指数超过该值时重新设置基准时间，避免浮点溢出
+    _MAX_EXPONENT = 40
+    
+    def __init__(self, capacity, half_life, landmark=0.0, counters=None):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.landmark = landmark
+        # item -> [加权计数, 误差上界]
+        self.counters = counters if counters is not None else {}
+    
+    def add(self, item, timestamp, weight=1.0):
+        """记录一次出现"""
+        exponent = (timestamp - self.landmark) / self.half_life
+        if exponent > self._MAX_EXPONENT:
+            self._rescale(timestamp)
+            exponent = 0.0
+        value = weight * math.pow(2.0, exponent)
+        
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += value
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [value, 0.0]
+        else:
+            # 替换计数最小的项，新项继承其计数作为误差上界
+            min_item = min(self.counters, key=lambda key: self.counters[key][0])
+            min_count = self.counters.pop(min_item)[0]
+            self.counters[item] = [min_count + value, min_count]
+    
+    def top(self, k, now):
+        """返回衰减到 now 时刻后计数最高的 k 项：[(item, count), ...]"""
+        scale = math.pow(2.0, -(now - self.landmark) / self.half_life)
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)[:k]
+        return [(item, counter[0] * scale) for item, counter in ranked]
+    
+    def _rescale(self, timestamp):
+        """将基准时间移动到 timestamp，并同步缩放所有计数"""
+        scale = math.pow(2.0, -(timestamp - self.landmark) / self.half_life)
+        for counter in self.counters.values():
+            counter[0] *= scale
+            counter[1] *= scale
+        self.landmark = timestamp
+    
+    def to_json(self):
+        """序列化为紧凑的JSON文本"""
+        return json.dumps({
+            'l': self.landmark,
+            'c': [[item, float(f'{count:.6g}'), float(f'{error:.6g}')]
+                  for item, (count, error) in self.counters.items()]
+        }, ensure_ascii=False, separators=(',', ':'))
+    
+    @classmethod
+    def from_json(cls, text, capacity, half_life):
+        """从JSON文本恢复，text为空时返回空的统计结构"""
+        if not text:
+            return cls(capacity, half_life)
+        data = json.loads(text)
+        counters = {item: [count, error] for item, count, error in data.get('c', [])}
+        sketch = cls(capacity, half_life, data.get('l', 0.0), counters)
+        # 容量调小后，丢弃多余的低频项
+        while len(sketch.counters) > capacity:
+            min_item = min(sketch.counters, key=lambda key: sketch.counters[key][0])
+            del sketch.counters[min_item]
+        return sketch